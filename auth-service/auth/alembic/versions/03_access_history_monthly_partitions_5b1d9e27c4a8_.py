@@ -0,0 +1,28 @@
+"""access_history: default partition and covering index
+
+Revision ID: 5b1d9e27c4a8
+Revises: 0e82faaa4336
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5b1d9e27c4a8'
+down_revision = '0e82faaa4336'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Строки, для которых ещё нет месячной секции, попадают в секцию по
+    # умолчанию. Месячные секции создаёт команда src/commands/partitions.py.
+    op.execute(
+    """CREATE TABLE IF NOT EXISTS users.access_history_default PARTITION OF users.access_history DEFAULT"""
+    )
+    op.create_index('access_history_user_id_access_time_id_idx', 'access_history', ['user_id', 'access_time', 'id'], unique=False, schema='users', postgresql_include=['user_agent'])
+
+
+def downgrade():
+    op.drop_index('access_history_user_id_access_time_id_idx', table_name='access_history', schema='users')
+    op.execute("""DROP TABLE IF EXISTS users.access_history_default""")
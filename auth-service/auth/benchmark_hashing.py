@@ -0,0 +1,90 @@
+"""Бенчмарк пропускной способности входа при одновременных запросах.
+
+Каждый вход - проверка пароля пользователя. Сравнивается прежняя проверка
+в цикле событий и проверка в пуле хеширования. Параллельно работает задача,
+которая каждые 10 мс "обрабатывает запрос" и замеряет, на сколько её
+пробуждение опоздало: так видно, насколько вход задерживает остальные
+запросы воркера.
+
+Запуск: python benchmark_hashing.py [кол-во входов] [одновременных входов]
+[итераций pbkdf2] [потоков пула]
+"""
+import asyncio
+import os
+import sys
+from time import perf_counter
+
+for name, value in (('PROJECT_NAME', 'auth'), ('DEFAULT_PAGE_SIZE', '10'),
+                    ('RPM_LIMIT', '1000'), ('YANDEX_CLIENT_ID', ''),
+                    ('YANDEX_CLIENT_SECRET', ''), ('YANDEX_AUTH_URL', ''),
+                    ('YANDEX_TOKEN_URL', ''), ('YANDEX_CLIENT_INFO_URL', ''),
+                    ('JWT_ALGORITHM', 'RS256'), ('JWT_PUBLIC_KEY', ''),
+                    ('JWT_PRIVATE_KEY', ''), ('JWT_AT_EXPIRE', '900'),
+                    ('JWT_RT_EXPIRE', '900'), ('POSTGRES_DB', ''),
+                    ('POSTGRES_HOST', ''), ('POSTGRES_PORT', '5432'),
+                    ('POSTGRES_USER', ''), ('POSTGRES_PASSWORD', ''),
+                    ('POSTGRES_SEARCH_PATH', ''), ('REDIS_HOST', ''),
+                    ('REDIS_PORT', '6379')):
+    os.environ.setdefault(name, value)
+
+from src.core.hashing import (PasswordHasher, check_password,  # noqa:E402
+                              hash_password)
+
+PASSWORD = 'password'
+
+
+async def measure_lag(stop: asyncio.Event, period_s: float = 0.01) -> float:
+    """Возвращает максимальное опоздание пробуждения задачи в мс."""
+    lag = 0.0
+    while not stop.is_set():
+        started = perf_counter()
+        await asyncio.sleep(period_s)
+        lag = max(lag, perf_counter() - started - period_s)
+    return lag * 1000
+
+
+async def run(name: str, check, hashed_password: str, count: int,
+              concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            assert await check(PASSWORD, hashed_password)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    started = perf_counter()
+    await asyncio.gather(*(login() for _ in range(count)))
+    elapsed = perf_counter() - started
+    stop.set()
+
+    print(f'{name}: {count / elapsed:8.1f} входов/с, '
+          f'макс. задержка цикла событий: {await lag_task:8.1f} мс')
+
+
+async def main(count: int, concurrency: int, iterations: int,
+               workers: int) -> None:
+    hashed_password = hash_password(PASSWORD, 'sha256', iterations)
+    hasher = PasswordHasher('sha256', iterations, workers,
+                            max_pending=concurrency, retry_after_s=1)
+
+    async def check_inline(password: str, hashed: str) -> bool:
+        return check_password(password, hashed)
+
+    print(f'Входов: {count}, одновременно: {concurrency}, '
+          f'итераций: {iterations}, потоков: {workers}')
+    await run('в цикле событий', check_inline, hashed_password, count,
+              concurrency)
+    await run('в пуле потоков ', hasher.check, hashed_password, count,
+              concurrency)
+    print(hasher.get_metrics())
+    hasher.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 32,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 260000,
+        int(sys.argv[4]) if len(sys.argv) > 4 else 4
+    ))
@@ -0,0 +1,163 @@
+"""Бенчмарк хранилища refresh токенов: вход, обновление токена и выход на
+всех устройствах для множества пользователей с несколькими устройствами.
+
+Сравнивается прежнее хранилище (строковый ключ на устройство и множество
+устройств пользователя) и хранилище с хэшем на пользователя. Нужен
+запущенный redis; бенчмарк использует ключи с префиксом пользователей
+benchmark-*, которые удаляет по завершении.
+
+Запуск: python benchmark_token_storage.py [пользователей] [устройств]
+[одновременных запросов] [хост redis] [порт redis]
+"""
+import asyncio
+import os
+import sys
+from hashlib import md5
+from time import perf_counter
+from uuid import uuid4
+
+for name, value in (('PROJECT_NAME', 'auth'), ('DEFAULT_PAGE_SIZE', '10'),
+                    ('RPM_LIMIT', '1000'), ('YANDEX_CLIENT_ID', ''),
+                    ('YANDEX_CLIENT_SECRET', ''), ('YANDEX_AUTH_URL', ''),
+                    ('YANDEX_TOKEN_URL', ''), ('YANDEX_CLIENT_INFO_URL', ''),
+                    ('JWT_ALGORITHM', 'RS256'), ('JWT_PUBLIC_KEY', ''),
+                    ('JWT_PRIVATE_KEY', ''), ('JWT_AT_EXPIRE', '900'),
+                    ('JWT_RT_EXPIRE', '1296000'), ('POSTGRES_DB', ''),
+                    ('POSTGRES_HOST', ''), ('POSTGRES_PORT', '5432'),
+                    ('POSTGRES_USER', ''), ('POSTGRES_PASSWORD', ''),
+                    ('POSTGRES_SEARCH_PATH', ''), ('REDIS_HOST', 'localhost'),
+                    ('REDIS_PORT', '6379')):
+    os.environ.setdefault(name, value)
+
+from redis.asyncio import Redis  # noqa:E402
+from src.db.base import AbstractTokenStorage  # noqa:E402
+from src.db.redis import RedisTokenStorage  # noqa:E402
+
+EXPIRE_IN_S = 1296000
+
+
+class LegacyRedisTokenStorage(AbstractTokenStorage):
+    """Прежнее хранилище: ключ на устройство и множество устройств."""
+    def __init__(self, host: str, port: int):
+        super().__init__(Redis(host=host, port=port))
+
+    async def set_token(self, user, user_agent, token,
+                        expire_in_s=EXPIRE_IN_S):
+        await self.storage.set(self._make_key(user, user_agent),
+                               token, ex=expire_in_s)
+        await self.storage.sadd(user, user_agent)
+
+    async def get_token(self, user, user_agent):
+        result = await self.storage.get(self._make_key(user, user_agent))
+        return None if result is None else result.decode()
+
+    async def delete_token(self, user, user_agent):
+        await self.storage.delete(self._make_key(user, user_agent))
+
+    async def delete_tokens(self, user, exclude_user_agent=None):
+        user_agents = await self.storage.smembers(user)
+        if exclude_user_agent:
+            user_agents.remove(exclude_user_agent.encode())
+        if user_agents:
+            await self.storage.srem(user, *user_agents)
+
+        for user_agent in user_agents:
+            await self.delete_token(user, user_agent.decode())
+
+    @staticmethod
+    def _make_key(user, user_agent):
+        return f'{user}:{md5(user_agent.encode("UTF-8")).hexdigest()}'
+
+
+class RoundTripCounter:
+    """Считает команды, отправленные клиентом redis (сетевые обмены)."""
+    def __init__(self, storage: Redis):
+        self.count = 0
+        execute_command = storage.execute_command
+
+        async def counted(*args, **kwargs):
+            self.count += 1
+            return await execute_command(*args, **kwargs)
+
+        storage.execute_command = counted
+
+    def reset(self) -> int:
+        try:
+            return self.count
+        finally:
+            self.count = 0
+
+
+async def run_concurrently(coroutines, concurrency: int,
+                           counter: RoundTripCounter) -> str:
+    """Выполняет корутины не более concurrency одновременно и возвращает
+    кол-во операций в секунду и обменов с redis на операцию."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(coroutine):
+        async with semaphore:
+            await coroutine
+
+    counter.reset()
+    started = perf_counter()
+    await asyncio.gather(*(limited(coroutine) for coroutine in coroutines))
+    rate = len(coroutines) / (perf_counter() - started)
+    round_trips = counter.reset() / len(coroutines)
+    return f'{rate:8.0f} оп/с ({round_trips:.1f} обм.)'
+
+
+async def refresh(storage: AbstractTokenStorage, user: str, agent: str):
+    """Обновление токена: проверка текущего jti и запись нового."""
+    await storage.get_token(user, agent)
+    await storage.set_token(user, agent, str(uuid4()), EXPIRE_IN_S)
+
+
+async def run(name: str, storage: AbstractTokenStorage, users: int,
+              devices: int, concurrency: int) -> None:
+    sessions = [(f'benchmark-{user}', f'agent-{device}')
+                for user in range(users) for device in range(devices)]
+    counter = RoundTripCounter(storage.storage)
+
+    login = await run_concurrently([
+        storage.set_token(user, agent, str(uuid4()), EXPIRE_IN_S)
+        for user, agent in sessions
+    ], concurrency, counter)
+    refreshes = await run_concurrently([
+        refresh(storage, user, agent) for user, agent in sessions
+    ], concurrency, counter)
+    logout_all = await run_concurrently([
+        storage.delete_tokens(f'benchmark-{user}', 'agent-0')
+        for user in range(users)
+    ], concurrency, counter)
+
+    remaining = await asyncio.gather(*(
+        storage.get_token(user, agent) for user, agent in sessions
+    ))
+    assert sum(token is not None for token in remaining) == users
+
+    print(f'{name}: вход {login}, обновление {refreshes}, '
+          f'выход на других устройствах {logout_all}')
+
+    await asyncio.gather(*(storage.delete_tokens(f'benchmark-{user}')
+                           for user in range(users)))
+
+
+async def main(users: int, devices: int, concurrency: int, host: str,
+               port: int) -> None:
+    print(f'Пользователей: {users}, устройств: {devices}, '
+          f'одновременно: {concurrency}')
+    for name, storage_class in (('прежнее', LegacyRedisTokenStorage),
+                                ('хэш    ', RedisTokenStorage)):
+        storage = storage_class(host, port)
+        await run(name, storage, users, devices, concurrency)
+        await storage.storage.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 50,
+        sys.argv[4] if len(sys.argv) > 4 else os.environ['REDIS_HOST'],
+        int(sys.argv[5] if len(sys.argv) > 5 else os.environ['REDIS_PORT'])
+    ))
@@ -9,5 +9,6 @@ done
 echo "Postgres started"
 
 alembic upgrade head
+python src/commands/partitions.py create
 
 gunicorn src.main:app --workers 4 --worker-class uvicorn.workers.UvicornH11Worker --bind 0.0.0.0:$AUTH_PORT
\ No newline at end of file
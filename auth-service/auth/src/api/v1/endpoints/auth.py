@@ -8,13 +8,14 @@ from src.api.v1.validators import (check_user_credentials,
                                    check_user_login_duplicate)
 from src.core.config import settings
 from src.core.exceptions import raise_already_exists
+from src.core.hashing import HashingMetrics, password_hasher
 from src.core.tokens import Token, get_user_tokens
 from src.core.utils import get_user_agent
 from src.crud import access_history_crud, user_crud, user_service_crud
 from src.db.postgres import get_async_session
 from src.db.redis import RedisTokenStorage, get_token_storage
 from src.jwt import AuthJWT, login_required
-from src.request_limiter import limiter
+from src.request_limiter import get_login, limiter
 from src.schemas.access_history import AccessHistoryCreate
 from src.schemas.oauth import UserServiceCreate
 from src.schemas.user import (Credentials, UserRead, UserSignup,
@@ -46,6 +47,8 @@ async def signup(
     **openapi.auth.login.dict()
 )
 @limiter.limit(f"{settings.project.rpm_limit}/minute")
+@limiter.limit(f"{settings.project.login_rpm_limit}/minute",
+               key_func=get_login)
 async def login(
         request: Request,  # noqa
         credentials: Credentials,
@@ -217,3 +220,16 @@ async def link_external_account(
         f'Привязка к аккаунту {client.service["name"]} ({client.login}) успешно выполнена',
         status_code=HTTPStatus.OK
     )
+
+
+@router.get(
+    '/hashing/metrics',
+    response_model=HashingMetrics,
+    **openapi.auth.hashing_metrics.dict()
+)
+@login_required(['auth-reader', 'auth-manager'])
+async def hashing_metrics(
+        authorize: AuthJWT = Depends()  # noqa
+):
+    """Возвращает счётчики и гистограмму времени хеширования паролей."""
+    return password_hasher.get_metrics()
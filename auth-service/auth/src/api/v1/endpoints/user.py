@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, Request
+import csv
+from datetime import datetime
+from io import StringIO
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.api.v1 import openapi
 from src.api.v1.validators import check_user_login_duplicate
 from src.core.config import settings
+from src.crud.access_history import access_history_crud
 from src.crud.users import user_crud
-from src.db.postgres import get_async_session
+from src.db.postgres import AsyncSessionLocal, get_async_session
 from src.jwt import AuthJWT, login_required
 from src.request_limiter import limiter
 from src.schemas.access_history import AccessHistoryRead
@@ -98,15 +104,70 @@ async def change_password(
 @login_required()
 async def access_history(
         request: Request,  # noqa
+        response: Response,
         pagination: PaginationView = Depends(get_view_service),
+        cursor: str | None = Query(
+            None, description='Курсор страницы из заголовка X-Next-Cursor'),
+        date_from: datetime | None = Query(
+            None, description='Начало интервала (включительно)'),
+        date_to: datetime | None = Query(
+            None, description='Конец интервала (не включительно)'),
         authorize: AuthJWT = Depends(),
         session: AsyncSession = Depends(get_async_session)
 ):
     """Возвращает историю входов пользователя (ввод логина и пароля)."""
-    user = await user_crud.get_with_related_fields(
+    page, next_cursor = await access_history_crud.get_page(
         await authorize.get_jwt_subject(),
-        'access_history',
-        session
+        session,
+        pagination.size,
+        cursor=cursor,
+        offset=pagination.offset,
+        date_from=date_from,
+        date_to=date_to
+    )
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return page
+
+
+@router.get(
+    '/access_history/export',
+    response_class=StreamingResponse,
+    **openapi.user.access_history_export.dict()
+)
+@limiter.limit(f"{settings.project.rpm_limit}/minute")
+@login_required()
+async def access_history_export(
+        request: Request,  # noqa
+        date_from: datetime | None = Query(
+            None, description='Начало интервала (включительно)'),
+        date_to: datetime | None = Query(
+            None, description='Конец интервала (не включительно)'),
+        authorize: AuthJWT = Depends(),
+):
+    """Выгружает историю входов пользователя в CSV."""
+    user_id = await authorize.get_jwt_subject()
+
+    async def generate_csv():
+        # Сессия из зависимости закрывается до окончания отправки ответа,
+        # поэтому выгрузка открывает свою.
+        async with AsyncSessionLocal() as session:
+            buffer = StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(('access_time', 'user_agent'))
+            async for chunk in access_history_crud.stream(
+                user_id, session, date_from, date_to
+            ):
+                writer.writerows((row.access_time.isoformat(), row.user_agent)
+                                 for row in chunk)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+    return StreamingResponse(
+        generate_csv(),
+        media_type='text/csv',
+        headers={'Content-Disposition':
+                 'attachment; filename="access_history.csv"'}
     )
-    start, end = pagination.offset, pagination.offset + pagination.size
-    return user.access_history[start:end]
@@ -56,3 +56,13 @@ link_external_account = BaseOpenapi(
                           'данным пользователя в другом сервисе ИЛИ сообщение '
                           'об успешной привязке аккаунта')
 )
+
+hashing_metrics = BaseOpenapi(
+    summary='Метрики хеширования паролей',
+    description=('Счётчики пула хеширования паролей текущего процесса: '
+                 'ожидающие, выполненные, завершившиеся ошибкой и '
+                 'отклонённые из-за переполнения очереди операции, а также '
+                 'кумулятивная гистограмма времени успешного хеширования в '
+                 'мс.'),
+    response_description='Метрики хеширования паролей'
+)
@@ -26,7 +26,18 @@ change_password = BaseOpenapi(
 
 access_history = BaseOpenapi(
     summary='История входов',
-    description=('Возвращает историю входов пользователя. Входом считает '
-                 'авторизация по логину и паролю (login).'),
+    description=('Возвращает историю входов пользователя, начиная с '
+                 'последнего. Входом считает авторизация по логину и паролю '
+                 '(login). '
+                 'Если есть следующая страница, её курсор возвращается в '
+                 'заголовке X-Next-Cursor; с курсором page_number не '
+                 'учитывается.'),
     response_description='Перечень входов пользователя'
 )
+
+access_history_export = BaseOpenapi(
+    summary='Выгрузка истории входов',
+    description=('Выгружает историю входов пользователя за интервал в CSV '
+                 '(access_time, user_agent), начиная с последнего входа.'),
+    response_description='CSV файл с историей входов'
+)
@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.exceptions import raise_already_exists, raise_not_found
-from src.core.utils import check_password
+from src.core.hashing import password_hasher
 from src.crud import permission_crud, role_crud, user_crud
 from src.db_models.user import User
 from src.schemas.user import Credentials
@@ -39,15 +39,22 @@ async def check_user_credentials(
         session: AsyncSession
 ) -> User:
     """Проверяет учётные данные пользователя и в случае успеха возвращает
-    объект пользователя."""
+    объект пользователя. Если хеш пароля записан в прежнем формате или с
+    прежними параметрами, он заменяется хешем с текущими параметрами."""
     user = await user_crud.get_by_attribute('login', credentials.login, session)
 
     if user is None:
         raise_not_found('Неверный логин и/или пароль')
 
-    if not check_password(credentials.password, user.hashed_password):
+    if not await password_hasher.check(credentials.password,
+                                       user.hashed_password):
         raise_not_found('Неверный логин и/или пароль')
 
+    if password_hasher.needs_rehash(user.hashed_password):
+        hashed_password = await password_hasher.hash(credentials.password)
+        user = await user_crud.update_hashed_password(user, hashed_password,
+                                                      session)
+
     return user
 
 
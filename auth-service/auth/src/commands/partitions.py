@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+
+from src.core.config import settings
+from src.db.partitions import AccessHistoryPartitions
+from src.db.postgres import engine
+
+
+async def main():
+    """Обслуживает секции истории входов. Без аргументов выполняет полный
+    цикл: создание секций вперёд, заморозку закрытых и архивацию старых.
+    Предназначена для ежедневного запуска по расписанию."""
+    parser = argparse.ArgumentParser(
+        description='Обслуживание секций истории входов'
+    )
+
+    parser.add_argument(
+        'action', nargs='?', default='maintain',
+        choices=['maintain', 'create', 'vacuum', 'archive'],
+        help='Действие (по умолчанию - все)'
+    )
+    parser.add_argument(
+        '--months-ahead', type=int,
+        default=settings.access_history.months_ahead,
+        help='На сколько месяцев вперёд создавать секции'
+    )
+    parser.add_argument(
+        '--retention-months', type=int,
+        default=settings.access_history.retention_months,
+        help='Сколько месяцев хранить историю в БД'
+    )
+    parser.add_argument(
+        '--archive-dir', default=settings.access_history.archive_dir,
+        help='Папка для архива выгруженных секций'
+    )
+
+    args = parser.parse_args()
+
+    partitions = AccessHistoryPartitions(
+        engine,
+        settings.postgres.search_path,
+        args.months_ahead,
+        args.retention_months,
+        args.archive_dir
+    )
+
+    try:
+        if args.action == 'maintain':
+            await partitions.maintain()
+        else:
+            print(*await getattr(partitions, args.action)(), sep='\n')
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import sys
+from uuid import UUID
+
+from redis.asyncio import Redis
+from src.core.config import settings
+from src.db.redis import REFRESH_TOKENS_KEY
+
+# Прежний формат: строка '{user}:{md5 названия приложения}' с jti refresh
+# токена и временем жизни токена, а также множество '{user}' с названиями
+# приложений пользователя, которое не истекало никогда
+LEGACY_TOKEN_KEY_PATTERN = '*:*'
+
+# Переносит токен из ключа прежнего формата в хэш пользователя с оставшимся
+# временем жизни и удаляет ключ. Токен, записанный в хэш после обновления
+# сервиса, не перезаписывается. Возвращает 1, если токен перенесён.
+MIGRATE_TOKEN_SCRIPT = """
+local token = redis.call('GET', KEYS[1])
+local ttl = redis.call('PTTL', KEYS[1])
+redis.call('DEL', KEYS[1])
+if not token or ttl <= 0 or redis.call('HEXISTS', KEYS[2], ARGV[1]) == 1 then
+    return 0
+end
+local time = redis.call('TIME')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+redis.call('HSET', KEYS[2], ARGV[1],
+           token .. '|' .. string.format('%d', now + ttl))
+if redis.call('PTTL', KEYS[2]) < ttl then
+    redis.call('PEXPIRE', KEYS[2], ttl)
+end
+return 1
+"""
+
+
+def is_user_id(value: str) -> bool:
+    """Проверяет, является ли строка id пользователя."""
+    try:
+        UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_legacy_token_key(key: bytes) -> tuple[str, str] | None:
+    """Разбирает ключ '{user}:{md5 названия приложения}'.
+    :return: id пользователя и поле хэша или None для ключей другого формата
+    """
+    user, _, field = key.decode().rpartition(':')
+    if len(field) != 32 or not is_user_id(user):
+        return None
+    try:
+        int(field, 16)
+    except ValueError:
+        return None
+    return user, field
+
+
+async def migrate_tokens(storage: Redis, migrate_token,
+                         batch_size: int) -> tuple[int, int]:
+    """Один проход SCAN: переносит действующие токены прежнего формата в
+    хэши пользователей.
+    :return: кол-во перенесённых и кол-во удалённых без переноса токенов
+    """
+    migrated = total = 0
+    batch = []
+    async for key in storage.scan_iter(match=LEGACY_TOKEN_KEY_PATTERN,
+                                       count=batch_size, _type='string'):
+        if parsed := parse_legacy_token_key(key):
+            batch.append((key, *parsed))
+        if len(batch) >= batch_size:
+            migrated += await migrate_batch(storage, migrate_token, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        migrated += await migrate_batch(storage, migrate_token, batch)
+        total += len(batch)
+    return migrated, total - migrated
+
+
+async def migrate_batch(storage: Redis, migrate_token,
+                        batch: list[tuple[bytes, str, str]]) -> int:
+    """Переносит пачку токенов за один сетевой обмен.
+    :return: кол-во перенесённых токенов
+    """
+    async with storage.pipeline(transaction=False) as pipeline:
+        for key, user, field in batch:
+            await migrate_token(
+                keys=[key, REFRESH_TOKENS_KEY.format(user=user)],
+                args=[field],
+                client=pipeline
+            )
+        return sum(await pipeline.execute())
+
+
+async def delete_user_sets(storage: Redis, batch_size: int) -> int:
+    """Один проход SCAN: удаляет множества названий приложений
+    пользователей.
+    :return: кол-во удалённых множеств
+    """
+    deleted = 0
+    batch = []
+    async for key in storage.scan_iter(count=batch_size, _type='set'):
+        if is_user_id(key.decode()):
+            batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += await storage.delete(*batch)
+            batch = []
+    if batch:
+        deleted += await storage.delete(*batch)
+    return deleted
+
+
+async def count_legacy_keys(storage: Redis,
+                            batch_size: int) -> tuple[int, int]:
+    """:return: кол-во токенов и множеств пользователей прежнего формата"""
+    tokens = sum([
+        parse_legacy_token_key(key) is not None
+        async for key in storage.scan_iter(match=LEGACY_TOKEN_KEY_PATTERN,
+                                           count=batch_size, _type='string')
+    ])
+    sets = sum([
+        is_user_id(key.decode())
+        async for key in storage.scan_iter(count=batch_size, _type='set')
+    ])
+    return tokens, sets
+
+
+async def main():
+    """Проверяет наличие или переносит refresh токены, записанные до
+    перехода на хэш токенов пользователя.
+
+    Без переноса пользователи после обновления сервиса не смогут обновить
+    токены и будут вынуждены войти заново, а множества приложений прежнего
+    формата останутся в redis навсегда. Команду нужно выполнить сразу после
+    обновления сервиса; повторный запуск безопасен.
+    """
+    parser = argparse.ArgumentParser(
+        description='Перенос refresh токенов из ключей прежнего формата'
+    )
+    parser.add_argument('action', choices=('verify', 'migrate'),
+                        help='Проверить наличие или перенести ключи')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Кол-во ключей, обрабатываемых за раз')
+    args = parser.parse_args()
+
+    storage = Redis(host=settings.redis.host, port=settings.redis.port)
+    try:
+        if args.action == 'verify':
+            tokens, sets = await count_legacy_keys(storage, args.batch_size)
+            print(f'Токенов прежнего формата: {tokens}, '
+                  f'множеств приложений пользователей: {sets}')
+            return int(bool(tokens or sets))
+
+        # Удаление ключей во время SCAN может сдвинуть курсор, поэтому
+        # проходы повторяются, пока находятся ключи прежнего формата
+        migrate_token = storage.register_script(MIGRATE_TOKEN_SCRIPT)
+        migrated = dropped = deleted = 0
+        while sum(counts := await migrate_tokens(storage, migrate_token,
+                                                 args.batch_size)):
+            migrated += counts[0]
+            dropped += counts[1]
+        while count := await delete_user_sets(storage, args.batch_size):
+            deleted += count
+        print(f'Перенесено токенов: {migrated}, удалено истёкших или '
+              f'заменённых токенов: {dropped}, удалено множеств приложений '
+              f'пользователей: {deleted}')
+        return 0
+    finally:
+        await storage.close()
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -27,6 +27,29 @@ class ProjectSettings(EnvBase):
     debug: bool = Field(False, env='DEBUG_MODE')
     default_page_size: int = Field(env='DEFAULT_PAGE_SIZE')
     rpm_limit: int = Field(env='RPM_LIMIT')
+    login_rpm_limit: int = Field(60, env='LOGIN_RPM_LIMIT')
+
+
+class RateLimitSettings(EnvBase):
+    client_ip_header: str = Field('X-Real-IP',
+                                  env='RATE_LIMIT_CLIENT_IP_HEADER')
+    lease: int = Field(10, env='RATE_LIMIT_LEASE')
+    lease_threshold: int = Field(100, env='RATE_LIMIT_LEASE_THRESHOLD')
+    lease_ttl_s: float = Field(1, env='RATE_LIMIT_LEASE_TTL')
+
+
+class PasswordHashSettings(EnvBase):
+    algorithm: str = Field('sha256', env='PASSWORD_HASH_ALGORITHM')
+    iterations: int = Field(260000, env='PASSWORD_HASH_ITERATIONS')
+    workers: int = Field(4, env='PASSWORD_HASH_WORKERS')
+    max_pending: int = Field(64, env='PASSWORD_HASH_MAX_PENDING')
+    retry_after_s: int = Field(1, env='PASSWORD_HASH_RETRY_AFTER')
+
+
+class AccessHistorySettings(EnvBase):
+    months_ahead: int = Field(3, env='ACCESS_HISTORY_MONTHS_AHEAD')
+    retention_months: int = Field(12, env='ACCESS_HISTORY_RETENTION_MONTHS')
+    archive_dir: str = Field('/app/archive', env='ACCESS_HISTORY_ARCHIVE_DIR')
 
 
 class OAuth(EnvBase):
@@ -61,6 +84,9 @@ class Settings:
     jwt: JWTSettings = JWTSettings()
     postgres: PostgresSettings = PostgresSettings()
     redis: RedisSettings = RedisSettings()
+    password_hash: PasswordHashSettings = PasswordHashSettings()
+    rate_limit: RateLimitSettings = RateLimitSettings()
+    access_history: AccessHistorySettings = AccessHistorySettings()
 
 
 settings = Settings()
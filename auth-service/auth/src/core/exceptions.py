@@ -3,14 +3,21 @@ from http import HTTPStatus
 from fastapi import HTTPException
 
 
-def raise_error(status: HTTPStatus, message: str) -> None:
+def raise_error(status: HTTPStatus, message: str,
+                headers: dict | None = None) -> None:
     """Базовый класс вызова исключения."""
     raise HTTPException(
         status_code=status,
-        detail=message
+        detail=message,
+        headers=headers
     )
 
 
+def raise_bad_request(message: str) -> None:
+    """Функция-обёртка для вызова исключения с ошибкой 400."""
+    raise_error(HTTPStatus.BAD_REQUEST, message)
+
+
 def raise_not_found(message: str) -> None:
     """Функция-обёртка для вызова исключения с ошибкой 404."""
     raise_error(HTTPStatus.NOT_FOUND, message)
@@ -24,3 +31,9 @@ def raise_already_exists(message: str) -> None:
 def raise_forbidden(message: str) -> None:
     """Функция-обёртка для вызова исключения с ошибкой 403."""
     raise_error(HTTPStatus.FORBIDDEN, message)
+
+
+def raise_service_unavailable(message: str, retry_after_s: int) -> None:
+    """Функция-обёртка для вызова исключения с ошибкой 503."""
+    raise_error(HTTPStatus.SERVICE_UNAVAILABLE, message,
+                {'Retry-After': str(retry_after_s)})
@@ -0,0 +1,170 @@
+import asyncio
+import binascii
+import hashlib
+import hmac
+import secrets
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from pydantic import BaseModel
+from src.core.config import settings
+from src.core.exceptions import raise_service_unavailable
+
+# Префикс версионированного формата хеша. Хеши без префикса записаны прежней
+# версией сервиса: pbkdf2 с алгоритмом из первого поля.
+PBKDF2_PREFIX = 'pbkdf2_'
+SALT_SIZE = 16
+
+# Верхние границы корзин гистограммы времени хеширования (мс)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def hash_password(password: str, algorithm: str, iterations: int) -> str:
+    """Хэширует пароль и возвращает строковое представление, готовое для записи
+    в БД в следующем формате:
+        pbkdf2_algorithm$hashing_iterations$salt$hashed_password, где
+        algorithm - применённый алгоритм хеширования,
+        hashing_iterations - количество итераций хеширования,
+        salt - использованная в хешировании 'соль' (hexadecimal repr),
+        hashed_password - хеш пароля с указанными выше параметрами
+        (hexadecimal repr).
+    """
+    salt = secrets.token_bytes(SALT_SIZE)
+    digest = hashlib.pbkdf2_hmac(algorithm, password.encode(), salt,
+                                 iterations)
+
+    return (f'{PBKDF2_PREFIX}{algorithm}${iterations}${salt.hex()}'
+            f'${digest.hex()}')
+
+
+def check_password(provided_password: str, user_hashed_password: str) -> bool:
+    """Проверяет соответствие полученного пароля хешу, находящемуся в БД.
+    Поддерживаются хеши как в текущем, так и в прежнем формате."""
+    if not user_hashed_password:
+        return False
+
+    scheme, iterations, salt, digest = user_hashed_password.split('$')
+    provided_hash = hashlib.pbkdf2_hmac(
+        scheme.removeprefix(PBKDF2_PREFIX),
+        provided_password.encode(),
+        binascii.unhexlify(salt),
+        int(iterations)
+    )
+
+    return hmac.compare_digest(digest, provided_hash.hex())
+
+
+def needs_rehash(user_hashed_password: str, algorithm: str,
+                 iterations: int) -> bool:
+    """Проверяет, записан ли хеш в прежнем формате или с параметрами,
+    отличающимися от текущих."""
+    scheme, hash_iterations, *_ = user_hashed_password.split('$')
+    return (scheme != f'{PBKDF2_PREFIX}{algorithm}'
+            or int(hash_iterations) != iterations)
+
+
+class HashingMetrics(BaseModel):
+    """Счётчики хеширования паролей текущего процесса. Время учитывается
+    только для успешно выполненных операций; операции, завершившиеся ошибкой
+    или отменённые, считаются в failed. Гистограмма кумулятивная: кол-во
+    операций, выполненных (с учётом ожидания в очереди) не дольше границы
+    корзины в мс."""
+    pending: int
+    completed: int
+    failed: int
+    rejected: int
+    latency_sum_ms: float
+    latency_histogram: dict[str, int]
+
+
+class PasswordHasher:
+    """Выполняет хеширование паролей в ограниченном пуле потоков, не
+    блокируя цикл событий. hashlib.pbkdf2_hmac освобождает GIL, поэтому
+    потоки хешируют параллельно.
+
+    Кол-во ожидающих и выполняемых операций ограничено max_pending: при
+    переполнении запрос сразу получает 503, а не копит очередь, время
+    ожидания в которой превысит таймауты клиентов."""
+
+    def __init__(self, algorithm: str, iterations: int, workers: int,
+                 max_pending: int, retry_after_s: int):
+        self.algorithm = algorithm
+        self.iterations = iterations
+        self.max_pending = max_pending
+        self.retry_after_s = retry_after_s
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='hasher')
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latency_sum_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.algorithm,
+                               self.iterations)
+
+    async def check(self, provided_password: str,
+                    user_hashed_password: str) -> bool:
+        if not user_hashed_password:
+            return False
+        return await self._run(check_password, provided_password,
+                               user_hashed_password)
+
+    def needs_rehash(self, user_hashed_password: str) -> bool:
+        return needs_rehash(user_hashed_password, self.algorithm,
+                            self.iterations)
+
+    def get_metrics(self) -> HashingMetrics:
+        histogram, total = {}, 0
+        for bound, count in zip((*LATENCY_BUCKETS_MS, '+Inf'), self.buckets):
+            total += count
+            histogram[str(bound)] = total
+        return HashingMetrics(
+            pending=self.pending,
+            completed=self.completed,
+            failed=self.failed,
+            rejected=self.rejected,
+            latency_sum_ms=self.latency_sum_ms,
+            latency_histogram=histogram
+        )
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise_service_unavailable('Сервис перегружен, повторите запрос',
+                                      self.retry_after_s)
+
+        self.pending += 1
+        started = perf_counter()
+        succeeded = False
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, func, *args
+            )
+            succeeded = True
+        finally:
+            self.pending -= 1
+            if not succeeded:
+                self.failed += 1
+        self._observe((perf_counter() - started) * 1000)
+        return result
+
+    def _observe(self, latency_ms: float) -> None:
+        self.completed += 1
+        self.latency_sum_ms += latency_ms
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+
+password_hasher = PasswordHasher(
+    settings.password_hash.algorithm,
+    settings.password_hash.iterations,
+    settings.password_hash.workers,
+    settings.password_hash.max_pending,
+    settings.password_hash.retry_after_s
+)
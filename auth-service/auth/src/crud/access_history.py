@@ -1,10 +1,119 @@
+import base64
+import binascii
+from datetime import datetime
+from logging import info
+from typing import AsyncIterator
+from uuid import UUID
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.exceptions import raise_bad_request
 from src.crud.base import CRUDBase
 from src.db_models.access_history import AccessHistory
 
+# Кол-во строк, получаемых из серверного курсора за раз при выгрузке
+STREAM_CHUNK_SIZE = 1000
+
+
+def encode_cursor(access_time: datetime, access_id: UUID) -> str:
+    """Курсор страницы - время и id последнего входа на предыдущей странице."""
+    return base64.urlsafe_b64encode(
+        f'{access_time.isoformat()}|{access_id}'.encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        access_time, access_id = base64.urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split('|')
+        return datetime.fromisoformat(access_time), UUID(access_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise_bad_request('Некорректный курсор страницы')
+
 
 class CRUDAccessHistory(CRUDBase):
-    """Класс для выполнение CRUD операция над моделью AccessHistory."""
-    pass
+    """Класс для выполнение CRUD операция над моделью AccessHistory.
+
+    Запросы истории пользователя упорядочены по (access_time, id) по убыванию
+    и выполняются по индексу (user_id, access_time, id) INCLUDE (user_agent),
+    который есть в каждой секции: index-only scan без сортировки. Фильтр по
+    времени отсекает секции, не пересекающиеся с интервалом."""
+
+    async def get_page(
+            self,
+            user_id: UUID,
+            session: AsyncSession,
+            size: int,
+            cursor: str | None = None,
+            offset: int = 0,
+            date_from: datetime | None = None,
+            date_to: datetime | None = None,
+    ) -> tuple[list[AccessHistory], str | None]:
+        """Возвращает страницу истории входов пользователя и курсор следующей
+        страницы (None, если страница последняя).
+        :param cursor - курсор из предыдущей страницы. Если передан, offset
+        не применяется: чтение начинается сразу с нужного места индекса.
+        :param offset - смещение от начала истории. Оставлено для
+        совместимости, стоимость запроса растёт с номером страницы.
+        :param date_from - начало интервала (включительно).
+        :param date_to - конец интервала (не включительно)."""
+        info(f'Вызов метода get_page для {self.model}.\n'
+             f'Параметры вызова:\n'
+             f' user_id: {user_id}\n'
+             f' size: {size}, cursor: {cursor}, offset: {offset}\n'
+             f' date_from: {date_from}, date_to: {date_to}\n')
+        query = self._make_user_query(user_id, date_from, date_to)
+        if cursor is not None:
+            query = query.where(
+                tuple_(self.model.access_time, self.model.id)
+                < tuple_(*decode_cursor(cursor))
+            )
+        elif offset:
+            query = query.offset(offset)
+
+        result = await session.execute(query.limit(size + 1))
+        db_objs = result.scalars().all()
+        if len(db_objs) <= size:
+            return db_objs, None
+
+        last = db_objs[size - 1]
+        return db_objs[:size], encode_cursor(last.access_time, last.id)
+
+    async def stream(
+            self,
+            user_id: UUID,
+            session: AsyncSession,
+            date_from: datetime | None = None,
+            date_to: datetime | None = None,
+    ) -> AsyncIterator[list[AccessHistory]]:
+        """Возвращает историю входов пользователя частями по
+        STREAM_CHUNK_SIZE строк через серверный курсор: в памяти не
+        находится больше одной части независимо от длины истории."""
+        info(f'Вызов метода stream для {self.model}.\n'
+             f'Параметры вызова:\n'
+             f' user_id: {user_id}\n'
+             f' date_from: {date_from}, date_to: {date_to}\n')
+        result = await session.stream_scalars(
+            self._make_user_query(user_id, date_from, date_to)
+            .execution_options(yield_per=STREAM_CHUNK_SIZE)
+        )
+        async for db_objs in result.partitions():
+            yield db_objs
+
+    def _make_user_query(
+            self,
+            user_id: UUID,
+            date_from: datetime | None,
+            date_to: datetime | None
+    ) -> Select:
+        query = select(self.model).where(self.model.user_id == user_id)
+        if date_from is not None:
+            query = query.where(self.model.access_time >= date_from)
+        if date_to is not None:
+            query = query.where(self.model.access_time < date_to)
+        return query.order_by(self.model.access_time.desc(),
+                              self.model.id.desc())
 
 
 access_history_crud = CRUDAccessHistory(AccessHistory)
@@ -2,7 +2,7 @@ from logging import info
 from random import randrange
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.core.utils import hash_password
+from src.core.hashing import password_hasher
 from src.crud.base import CRUDBase
 from src.db_models.user import User
 from src.schemas.user import UserSignupExternalService
@@ -21,11 +21,9 @@ class CRUDUsers(CRUDBase):
         """Создаёт пользователя, предварительно подменяя введённый им пароль на
         его специально сформированный хеш."""
         if hasattr(obj_in, 'password'):
-            setattr(
-                obj_in,
-                'hashed_password',
-                hash_password(obj_in.password) if obj_in.password else obj_in.password
-            )
+            hashed_password = (await password_hasher.hash(obj_in.password)
+                               if obj_in.password else obj_in.password)
+            setattr(obj_in, 'hashed_password', hashed_password)
             delattr(obj_in, 'password')
         return await super().create(obj_in, session)
 
@@ -53,9 +51,25 @@ class CRUDUsers(CRUDBase):
              f'Параметры вызова: '
              f' user_id: {user_id}'
              f' obj_in: {obj_in.dict()}')
-        setattr(obj_in, 'hashed_password', hash_password(obj_in.password))
+        setattr(obj_in, 'hashed_password',
+                await password_hasher.hash(obj_in.password))
         delattr(obj_in, 'password')
         return await super().update_by_attribute('id', user_id, obj_in, session)
 
+    async def update_hashed_password(
+            self,
+            user: User,
+            hashed_password: str,
+            session: AsyncSession
+    ):
+        """Заменяет хеш пароля пользователя, например, на хеш с текущими
+        параметрами хеширования."""
+        info(f'Вызов метода update_hashed_password для {self.model}.'
+             f'Параметры вызова: '
+             f' user_id: {user.id}')
+        return await super().update(
+            user, {'hashed_password': hashed_password}, session
+        )
+
 
 user_crud = CRUDUsers(User)
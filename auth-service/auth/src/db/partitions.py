@@ -0,0 +1,249 @@
+import gzip
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'access_history'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+# Доля новых строк, после которой autovacuum обрабатывает секцию. Таблица
+# только пополняется, и по умолчанию (20%) карта видимости текущей секции
+# отстаёт, а index-only scan вынужден читать страницы таблицы.
+HOT_VACUUM_INSERT_SCALE_FACTOR = 0.02
+
+# Границы секций: pg_get_expr возвращает их текстом, поэтому разбор
+# выполняет сама postgres. У секции по умолчанию границы NULL.
+PARTITIONS_SQL = """
+SELECT c.relname AS name,
+       (regexp_match(pg_get_expr(c.relpartbound, c.oid),
+                     'FROM \\(''([^'']+)''\\)'))[1]::timestamptz AS lower,
+       (regexp_match(pg_get_expr(c.relpartbound, c.oid),
+                     'TO \\(''([^'']+)''\\)'))[1]::timestamptz AS upper
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = to_regclass(:parent)
+ORDER BY lower NULLS FIRST
+"""
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    lower: datetime | None
+    upper: datetime | None
+
+    @property
+    def is_default(self) -> bool:
+        return self.lower is None
+
+
+def add_months(month: date, count: int) -> date:
+    """Первое число месяца, отстоящего от month на count месяцев."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def get_month_bounds(month: date) -> tuple[datetime, datetime]:
+    """Границы месячной секции в UTC."""
+    lower = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    upper = datetime.combine(add_months(month, 1), lower.timetz())
+    return lower, upper
+
+
+def get_partition_name(month: date) -> str:
+    return f'{TABLE}_{month.year}_{month.month:02d}'
+
+
+def get_current_month(today: date | None = None) -> date:
+    today = today or datetime.now(timezone.utc).date()
+    return today.replace(day=1)
+
+
+class AccessHistoryPartitions:
+    """Обслуживание секций истории входов (секционирование по месяцам
+    access_time):
+        - создание секций на months_ahead месяцев вперёд;
+        - выгрузка секций старше retention_months месяцев в сжатые CSV файлы
+          в archive_dir и удаление их из БД;
+        - заморозка закрытых секций, чтобы запросы к истории выполнялись
+          index-only scan без чтения страниц таблицы.
+
+    Строки, для которых секции ещё нет, попадают в секцию по умолчанию и
+    переносятся в месячную секцию при её создании."""
+
+    def __init__(self, engine: AsyncEngine, schema: str, months_ahead: int,
+                 retention_months: int, archive_dir: str):
+        self.engine = engine
+        self.schema = schema
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.archive_dir = archive_dir
+
+    async def maintain(self, today: date | None = None) -> None:
+        """Полный цикл обслуживания. Предназначен для запуска по расписанию;
+        повторный запуск безопасен."""
+        await self.create(today)
+        await self.vacuum(today)
+        await self.archive(today)
+
+    async def get_partitions(
+            self,
+            connection: AsyncConnection
+    ) -> list[Partition]:
+        result = await connection.execute(
+            text(PARTITIONS_SQL), {'parent': self._quote(TABLE)}
+        )
+        return [Partition(*row) for row in result]
+
+    async def create(self, today: date | None = None) -> list[str]:
+        """Создаёт недостающие секции с текущего месяца на months_ahead
+        месяцев вперёд и возвращает их названия."""
+        current_month = get_current_month(today)
+        created = []
+        async with self.engine.begin() as connection:
+            partitions = await self.get_partitions(connection)
+            if not any(partition.is_default for partition in partitions):
+                await connection.execute(text(
+                    'CREATE TABLE IF NOT EXISTS '
+                    f'{self._quote(DEFAULT_PARTITION)} '
+                    f'PARTITION OF {self._quote(TABLE)} DEFAULT'
+                ))
+
+        for count in range(self.months_ahead + 1):
+            month = add_months(current_month, count)
+            lower, upper = get_month_bounds(month)
+            if any(partition.lower < upper and lower < partition.upper
+                   for partition in partitions if not partition.is_default):
+                continue
+
+            async with self.engine.begin() as connection:
+                await self._create_partition(connection, month)
+            created.append(get_partition_name(month))
+            logger.info(f'Создана секция {get_partition_name(month)}')
+        return created
+
+    async def vacuum(self, today: date | None = None) -> list[str]:
+        """Замораживает секции, закрытые в прошлом месяце: после этого все
+        их страницы отмечены в карте видимости. Для уже замороженной
+        секции VACUUM пропускает все страницы и почти ничего не стоит."""
+        current_month = get_current_month(today)
+        closed = datetime.combine(current_month, datetime.min.time(),
+                                  timezone.utc)
+        previous = datetime.combine(add_months(current_month, -1),
+                                    datetime.min.time(), timezone.utc)
+        async with self.engine.connect() as connection:
+            connection = await connection.execution_options(
+                isolation_level='AUTOCOMMIT'
+            )
+            names = [
+                partition.name
+                for partition in await self.get_partitions(connection)
+                if not partition.is_default
+                and previous < partition.upper <= closed
+            ]
+            for name in names:
+                await connection.execute(
+                    text(f'VACUUM (FREEZE, ANALYZE) {self._quote(name)}')
+                )
+        return names
+
+    async def archive(self, today: date | None = None) -> list[str]:
+        """Выгружает секции, целиком старше retention_months месяцев, в
+        archive_dir и удаляет их. Возвращает пути к файлам архива."""
+        cutoff = datetime.combine(
+            add_months(get_current_month(today), -self.retention_months),
+            datetime.min.time(), timezone.utc
+        )
+        async with self.engine.connect() as connection:
+            partitions = [
+                partition
+                for partition in await self.get_partitions(connection)
+                if not partition.is_default and partition.upper <= cutoff
+            ]
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        paths = []
+        for partition in partitions:
+            path, rows = await self._export(partition.name)
+            await self._drop(partition.name, rows)
+            paths.append(path)
+            logger.info(
+                f'Секция {partition.name} ({rows} строк) выгружена в {path}'
+            )
+        return paths
+
+    async def _create_partition(self, connection: AsyncConnection,
+                                month: date) -> None:
+        """Создаёт секцию отдельной таблицей, переносит в неё строки месяца
+        из секции по умолчанию и подключает к таблице. CREATE TABLE ...
+        PARTITION OF завершился бы ошибкой, если такие строки есть."""
+        lower, upper = get_month_bounds(month)
+        name = self._quote(get_partition_name(month))
+        bounds = f"FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+
+        await connection.execute(text(
+            f'CREATE TABLE {name} (LIKE {self._quote(TABLE)} '
+            f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'WITH (autovacuum_vacuum_insert_scale_factor = '
+            f'{HOT_VACUUM_INSERT_SCALE_FACTOR})'
+        ))
+        await connection.execute(
+            text('WITH moved AS ('
+                 f'DELETE FROM {self._quote(DEFAULT_PARTITION)} '
+                 f'WHERE access_time >= :lower AND access_time < :upper '
+                 f'RETURNING *) INSERT INTO {name} SELECT * FROM moved'),
+            {'lower': lower, 'upper': upper}
+        )
+        await connection.execute(text(
+            f'ALTER TABLE {self._quote(TABLE)} ATTACH PARTITION {name} '
+            f'FOR VALUES {bounds}'
+        ))
+
+    async def _export(self, name: str) -> tuple[str, int]:
+        """Выгружает секцию в CSV, сжатый gzip. Файл появляется под итоговым
+        именем только после успешной записи."""
+        path = os.path.join(self.archive_dir, f'{name}.csv.gz')
+        partial_path = f'{path}.partial'
+        async with self.engine.connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+            with gzip.open(partial_path, 'wb') as file:
+                async def write(chunk: bytes) -> None:
+                    file.write(chunk)
+
+                driver_connection = raw_connection.driver_connection
+                status = await driver_connection.copy_from_table(
+                    name, schema_name=self.schema, output=write,
+                    format='csv', header=True
+                )
+                file.flush()
+                os.fsync(file.fileno())
+
+        os.replace(partial_path, path)
+        return path, int(status.split()[-1])
+
+    async def _drop(self, name: str, exported_rows: int) -> None:
+        """Отключает и удаляет выгруженную секцию. Если после выгрузки в
+        секцию добавились строки, транзакция откатывается."""
+        async with self.engine.begin() as connection:
+            await connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+            await connection.execute(text(
+                f'ALTER TABLE {self._quote(TABLE)} '
+                f'DETACH PARTITION {self._quote(name)}'
+            ))
+            rows = await connection.scalar(
+                text(f'SELECT count(*) FROM {self._quote(name)}')
+            )
+            if rows != exported_rows:
+                raise RuntimeError(
+                    f'В секции {name} {rows} строк, выгружено {exported_rows}'
+                )
+            await connection.execute(text(f'DROP TABLE {self._quote(name)}'))
+
+    def _quote(self, name: str) -> str:
+        return f'"{self.schema}"."{name}"'
@@ -1,16 +1,60 @@
 from functools import cache
 from hashlib import md5
+from time import time
 
 from redis.asyncio import Redis
 from src.core.config import settings
 from src.db.base import AbstractTokenStorage
 
+# Хэш refresh токенов пользователя
+REFRESH_TOKENS_KEY = 'refresh_tokens:{user}'
+
+# Значение поля хэша: jti|время истечения токена (unix-время в мс). Redis 7.0
+# не поддерживает время жизни отдельных полей хэша, поэтому истёкшие поля
+# удаляются при записи нового токена, а хэш живёт до истечения самого
+# позднего токена.
+SET_TOKEN_SCRIPT = """
+local time = redis.call('TIME')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+local expire_in_ms = tonumber(ARGV[3])
+local fields = redis.call('HGETALL', KEYS[1])
+for i = 1, #fields, 2 do
+    local expires_at = tonumber(string.match(fields[i + 1], '|(%d+)$'))
+    if expires_at == nil or expires_at <= now then
+        redis.call('HDEL', KEYS[1], fields[i])
+    end
+end
+redis.call('HSET', KEYS[1], ARGV[1],
+           ARGV[2] .. '|' .. string.format('%d', now + expire_in_ms))
+if redis.call('PTTL', KEYS[1]) < expire_in_ms then
+    redis.call('PEXPIRE', KEYS[1], expire_in_ms)
+end
+"""
+
+# Удаляет все токены пользователя, кроме токена устройства ARGV[1]
+DELETE_TOKENS_SCRIPT = """
+local kept = redis.call('HGET', KEYS[1], ARGV[1])
+local ttl = redis.call('PTTL', KEYS[1])
+redis.call('DEL', KEYS[1])
+if kept and ttl > 0 then
+    redis.call('HSET', KEYS[1], ARGV[1], kept)
+    redis.call('PEXPIRE', KEYS[1], ttl)
+end
+"""
+
 
 class RedisTokenStorage(AbstractTokenStorage):
     """Класс хранилища токенов, использующий в качестве места хранения No-SQL
-    базу Redis."""
+    базу Redis. Токены пользователя хранятся в одном хэше: хэш названия
+    пользовательского приложения -> jti refresh токена. Каждая операция
+    выполняется за один сетевой обмен, изменение нескольких полей -
+    атомарно скриптом Lua."""
     def __init__(self, host: str, port: int):
         super().__init__(Redis(host=host, port=port))
+        self.set_token_script = self.storage.register_script(SET_TOKEN_SCRIPT)
+        self.delete_tokens_script = self.storage.register_script(
+            DELETE_TOKENS_SCRIPT
+        )
 
     async def set_token(
             self,
@@ -20,42 +64,55 @@ class RedisTokenStorage(AbstractTokenStorage):
             expire_in_s: int = settings.jwt.authjwt_refresh_token_expires
     ) -> None:
         """См. описание метода в базовом классе."""
-        await self.storage.set(self._make_key(user, user_agent),
-                               token, ex=expire_in_s)
-        await self.storage.sadd(user, user_agent)
+        await self.set_token_script(
+            keys=[self._make_key(user)],
+            args=[self._make_field(user_agent), token, expire_in_s * 1000]
+        )
 
     async def get_token(self, user: str, user_agent: str) -> str | None:
         """См. описание метода в базовом классе."""
-        result = await self.storage.get(self._make_key(user, user_agent))
-        return None if result is None else result.decode()
+        result = await self.storage.hget(self._make_key(user),
+                                         self._make_field(user_agent))
+        if result is None:
+            return None
+
+        token, expires_at = result.decode().rsplit('|', 1)
+        return token if int(expires_at) > time() * 1000 else None
 
     async def delete_token(self, user: str, user_agent: str) -> None:
         """См. описание метода в базовом классе."""
-        await self.storage.delete(self._make_key(user, user_agent))
+        await self.storage.hdel(self._make_key(user),
+                                self._make_field(user_agent))
 
     async def delete_tokens(
             self,
             user: str,
             exclude_user_agent: str | None = None
     ) -> None:
-        """См. описание метода в базовом классе."""
-        user_agents = await self.storage.smembers(user)
-        if exclude_user_agent:
-            user_agents.remove(exclude_user_agent.encode())
-        if user_agents:
-            await self.storage.srem(user, *user_agents)
+        """См. описание метода в базовом классе. Выполняется одной атомарной
+        операцией независимо от кол-ва устройств пользователя."""
+        if exclude_user_agent is None:
+            await self.storage.delete(self._make_key(user))
+            return
 
-        for user_agent in user_agents:
-            await self.delete_token(user, user_agent.decode())
+        await self.delete_tokens_script(
+            keys=[self._make_key(user)],
+            args=[self._make_field(exclude_user_agent)]
+        )
 
     async def close(self) -> None:
         """Метод разрывает соединение с Redis."""
         await self.storage.close()
 
     @staticmethod
-    def _make_key(user: str, user_agent: str):
-        """Метод хеширует составной ключ для использования в Redis."""
-        return f'{user}:{md5(user_agent.encode("UTF-8")).hexdigest()}'
+    def _make_key(user: str) -> str:
+        return REFRESH_TOKENS_KEY.format(user=user)
+
+    @staticmethod
+    def _make_field(user_agent: str) -> str:
+        """Метод хеширует название пользовательского приложения для
+        использования в качестве поля хэша."""
+        return md5(user_agent.encode('UTF-8')).hexdigest()
 
 
 @cache
@@ -1,21 +1,19 @@
 from datetime import datetime
 
-from sqlalchemy import (UUID, Column, DateTime, ForeignKey, String,
-                        UniqueConstraint)
+from sqlalchemy import (UUID, Column, DateTime, ForeignKey, Index, String,
+                        UniqueConstraint, text)
+from src.db.partitions import DEFAULT_PARTITION
 from src.db.postgres import Base
 from src.db_models.base_models import IDMixin
 
 
 def create_partition(target, connection, **kw) -> None:
-    connection.execute(
-        """CREATE TABLE IF NOT EXISTS "access_history_2023" PARTITION OF "access_history" FOR VALUES FROM ('01.01.2023') TO ('01.01.2024')"""
-    )
-    connection.execute(
-        """CREATE TABLE IF NOT EXISTS "access_history_2024" PARTITION OF "access_history" FOR VALUES FROM ('01.01.2024') TO ('01.01.2025')"""
-    )
-    connection.execute(
-        """CREATE TABLE IF NOT EXISTS "access_history_2025" PARTITION OF "access_history" FOR VALUES FROM ('01.01.2025') TO ('01.01.2026')"""
-    )
+    """Создаёт секцию по умолчанию. Месячные секции создаёт и архивирует
+    команда src/commands/partitions.py."""
+    connection.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{target.schema}"."{DEFAULT_PARTITION}" '
+        f'PARTITION OF "{target.schema}"."{target.name}" DEFAULT'
+    ))
 
 
 class AccessHistory(Base, IDMixin):
@@ -23,6 +21,9 @@ class AccessHistory(Base, IDMixin):
     __tablename__ = 'access_history'
     __table_args__ = (
         UniqueConstraint('id', 'access_time'),
+        Index('access_history_user_id_access_time_id_idx',
+              'user_id', 'access_time', 'id',
+              postgresql_include=['user_agent']),
         {
             'postgresql_partition_by': 'RANGE (access_time)',
             'listeners': [('after_create', create_partition)],
@@ -2,13 +2,13 @@ from http import HTTPStatus
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import ORJSONResponse
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
 from src.api.v1.routers import v1_router
 from src.core.config import settings
+from src.core.hashing import password_hasher
 from src.db.redis import token_storage
 from src.jwt import AuthJWT, AuthJWTException, authjwt_exception_handler
-from src.request_limiter import limiter
+from src.request_limiter import (RateLimitExceeded, limiter,
+                                 rate_limit_exceeded_handler)
 
 app = FastAPI(
     title=settings.project.name,
@@ -18,8 +18,7 @@ app = FastAPI(
 )
 app.include_router(v1_router)
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
 
 @app.middleware('http')
@@ -35,6 +34,8 @@ async def check_X_headers(request: Request, call_next):
 @app.on_event('shutdown')
 async def shutdown():
     await token_storage.close()
+    await limiter.storage.close()
+    password_hasher.shutdown()
 
 
 @AuthJWT.load_config
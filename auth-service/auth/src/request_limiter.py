@@ -1,4 +1,218 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import logging
+import re
+from dataclasses import dataclass
+from functools import wraps
+from http import HTTPStatus
+from math import ceil
+from time import monotonic
+from typing import Any, Awaitable, Callable
 
-limiter = Limiter(key_func=get_remote_address)
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from src.core.config import settings
+from src.jwt import AuthJWTException
+
+logger = logging.getLogger(__name__)
+
+KeyFunc = Callable[[Request, dict[str, Any]], Awaitable[str]]
+
+PERIODS_S = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# GCRA: в ключе хранится теоретическое время прихода следующего запроса (tat,
+# мс по часам redis). Запрос допускается, если tat не дальше периода от
+# текущего момента, т.е. лимит можно выбрать и разом, и равномерно.
+# Скрипт выдаёт до ARGV[3] разрешений за раз, если их доступно не меньше
+# ARGV[4], иначе одно. Возвращает кол-во выданных разрешений и, при отказе,
+# через сколько мс появится следующее.
+GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local lease_threshold = tonumber(ARGV[4])
+local time = redis.call('TIME')
+local now = time[1] * 1000 + time[2] / 1000
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local available = math.floor((now + period - tat) / emission)
+if available < 1 then
+    return {0, math.ceil(tat + emission - period - now)}
+end
+local granted = 1
+if available >= lease_threshold then
+    granted = math.min(lease, available)
+end
+tat = tat + granted * emission
+redis.call('SET', KEYS[1], string.format('%.3f', tat),
+           'PX', math.ceil(tat - now))
+return {granted, 0}
+"""
+
+
+@dataclass(frozen=True)
+class Rate:
+    amount: int
+    period_s: int
+    description: str
+
+    @classmethod
+    def parse(cls, value: str) -> 'Rate':
+        """Разбирает лимит вида '1000/minute' или '10 per 1 second'."""
+        match = re.fullmatch(
+            r'\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*',
+            value
+        )
+        if match is None:
+            raise ValueError(f'Некорректный лимит: {value}')
+        amount, multiplier, period = match.groups()
+        multiplier = int(multiplier or 1)
+        return cls(int(amount), multiplier * PERIODS_S[period],
+                   f'{amount} per {multiplier} {period}')
+
+    def __str__(self):
+        return self.description
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, rate: Rate, retry_after_s: int):
+        self.rate = rate
+        self.retry_after_s = retry_after_s
+
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    return ORJSONResponse(
+        {'error': f'Rate limit exceeded: {exc.rate}'},
+        status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        headers={'Retry-After': str(exc.retry_after_s)}
+    )
+
+
+async def get_client_ip(request: Request, arguments: dict[str, Any]) -> str:
+    """Адрес клиента. За nginx адрес соединения - адрес прокси, поэтому
+    адрес клиента берётся из заголовка, который выставляет прокси."""
+    header = settings.rate_limit.client_ip_header
+    if header and (client_ip := request.headers.get(header)):
+        return f'ip:{client_ip}'
+    return f'ip:{request.client.host if request.client else "unknown"}'
+
+
+async def get_user_or_client_ip(request: Request,
+                                arguments: dict[str, Any]) -> str:
+    """id пользователя из проверенного access-токена, для запросов без
+    токена - адрес клиента. Пользователи за одним адресом (NAT, прокси)
+    не делят между собой лимит."""
+    authorize = arguments.get('authorize')
+    if authorize is not None:
+        try:
+            await authorize.jwt_required()
+            return f'user:{await authorize.get_jwt_subject()}'
+        except AuthJWTException:
+            pass
+    return await get_client_ip(request, arguments)
+
+
+async def get_login(request: Request, arguments: dict[str, Any]) -> str:
+    """Логин из учётных данных запроса: ограничивает подбор пароля к одной
+    учётной записи с разных адресов."""
+    credentials = arguments.get('credentials')
+    if credentials is None:
+        return await get_client_ip(request, arguments)
+    return f'login:{credentials.login}'
+
+
+class RateLimiter:
+    """Распределённый ограничитель частоты запросов: счётчики GCRA хранятся
+    в redis и общие для всех воркеров и реплик сервиса.
+
+    Чтобы не обращаться в redis на каждый запрос клиента, далёкого от лимита,
+    redis выдаёт ему сразу lease разрешений, которые расходуются локально в
+    течение lease_ttl_s. Выданные разрешения уже учтены в redis, поэтому
+    лимит не превышается при любом кол-ве реплик. Клиенту, которому доступно
+    меньше lease_threshold разрешений, redis выдаёт по одному.
+
+    При недоступности redis запросы пропускаются: ограничитель не должен
+    останавливать вход пользователей."""
+
+    def __init__(self, storage: Redis, key_func: KeyFunc, lease: int,
+                 lease_threshold: int, lease_ttl_s: float,
+                 max_leases: int = 10000):
+        self.storage = storage
+        self.key_func = key_func
+        self.lease = lease
+        self.lease_threshold = lease_threshold
+        self.lease_ttl_s = lease_ttl_s
+        self.max_leases = max_leases
+        self.leases: dict[str, list] = {}
+        self.script = storage.register_script(GCRA_SCRIPT)
+
+    def limit(self, limit_value: str, key_func: KeyFunc | None = None):
+        """Декоратор эндпоинта. Ключ строится по аргументам эндпоинта, поэтому
+        декоратор должен стоять над login_required."""
+        rate = Rate.parse(limit_value)
+        key_func = key_func or self.key_func
+
+        def wrapper(func):
+            scope = f'{func.__module__}.{func.__name__}'
+
+            @wraps(func)
+            async def inner(*args, **kwargs):
+                key = await key_func(kwargs['request'], kwargs)
+                await self.hit(f'rate_limit:{scope}:{rate.period_s}:{key}',
+                               rate)
+                return await func(*args, **kwargs)
+            return inner
+        return wrapper
+
+    async def hit(self, key: str, rate: Rate) -> None:
+        """Расходует разрешение на запрос или выбрасывает RateLimitExceeded."""
+        if self._take_leased(key):
+            return
+
+        emission_ms = rate.period_s * 1000 / rate.amount
+        try:
+            granted, retry_after_ms = await self.script(
+                keys=[key],
+                args=[emission_ms, rate.period_s * 1000,
+                      min(self.lease, rate.amount), self.lease_threshold]
+            )
+        except RedisError as err:
+            logger.warning(f'Ограничитель частоты запросов недоступен: {err}')
+            return
+
+        if not granted:
+            raise RateLimitExceeded(rate, max(1, ceil(retry_after_ms / 1000)))
+        if granted > 1:
+            self._store_lease(key, granted - 1)
+
+    def _take_leased(self, key: str) -> bool:
+        lease = self.leases.get(key)
+        if lease is None:
+            return False
+        if lease[1] <= monotonic():
+            del self.leases[key]
+            return False
+
+        lease[0] -= 1
+        if not lease[0]:
+            del self.leases[key]
+        return True
+
+    def _store_lease(self, key: str, amount: int) -> None:
+        now = monotonic()
+        if len(self.leases) >= self.max_leases:
+            self.leases = {
+                leased_key: lease for leased_key, lease in self.leases.items()
+                if lease[1] > now
+            }
+            if len(self.leases) >= self.max_leases:
+                return
+        self.leases[key] = [amount, now + self.lease_ttl_s]
+
+
+limiter = RateLimiter(
+    Redis(host=settings.redis.host, port=settings.redis.port),
+    get_user_or_client_ip,
+    settings.rate_limit.lease,
+    settings.rate_limit.lease_threshold,
+    settings.rate_limit.lease_ttl_s
+)
@@ -475,3 +475,28 @@ async def test_user_permission_denied(
     headers = {'Authorization': f'Bearer {user_access_token}'}
     response = await make_http_request('GET', url, headers, None)
     assert response.status == HTTPStatus.FORBIDDEN
+
+
+async def test_login_rehashes_legacy_password(
+        login,
+        create_user,
+        make_db_request
+):
+    hashed_password = 'sha256$4096$24326224313224503370696755543356434374504f75334b365853642e$bba234d9c9ac11841efdfd7b20df393ef35e8c9bf253733f257bcc4fc3259d12'
+    user_18 = 5001
+    await create_user(id=user_18, login='auth_user_18',
+                      hashed_password=hashed_password)
+
+    response = await login({'login': 'auth_user_18', "password": '123'})
+    assert response.status == HTTPStatus.OK
+
+    sql = f'SELECT hashed_password FROM "user" WHERE id = {user_18};'
+    user = await make_db_request('FETCHONE', sql)
+    assert user['hashed_password'].startswith('pbkdf2_sha256$')
+
+    # повторный вход с обновлённым хешем
+    response = await login({'login': 'auth_user_18', "password": '123'})
+    assert response.status == HTTPStatus.OK
+
+    response = await login({'login': 'auth_user_18', "password": '1234'})
+    assert response.status == HTTPStatus.NOT_FOUND
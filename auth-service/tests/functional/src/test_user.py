@@ -173,3 +173,71 @@ async def test_access_history_pagination(
     query_params = {'page_size': 4, 'page_number': login_amount // 4 + 1}
     response = await make_http_request('GET', url, headers, None, query_params)
     assert len(response.body) == login_amount % 4
+
+
+async def test_access_history_cursor_pagination(
+        reg_user,
+        login,
+        get_user_api_url,
+        make_http_request
+):
+    login_amount = 7
+    await reg_user({"login": 'users_user_4', "password": '123',
+                    "full_name": 'Ivan Ivanov', 'email': 'achcursor@mail.ru'})
+    for user_agent in range(login_amount):
+        response = await login({"login": 'users_user_4', "password": '123'},
+                               user_agent=str(user_agent))
+    user_access_token = response.body['access']
+
+    url = f'{get_user_api_url}/access_history'
+    headers = {'Authorization': f'Bearer {user_access_token}'}
+    query_params = {'page_size': 3}
+    user_agents = []
+    while True:
+        response = await make_http_request('GET', url, headers, None,
+                                           query_params)
+        assert response.status == HTTPStatus.OK
+        user_agents += [access['user_agent'] for access in response.body]
+        headers_lower = {k.lower(): v for k, v in response.headers.items()}
+        next_cursor = headers_lower.get('x-next-cursor')
+        if next_cursor is None:
+            break
+        query_params = {'page_size': 3, 'cursor': next_cursor}
+
+    assert user_agents == [str(user_agent)
+                           for user_agent in reversed(range(login_amount))]
+
+    response = await make_http_request('GET', url, headers, None,
+                                       {'cursor': 'invalid'})
+    assert response.status == HTTPStatus.BAD_REQUEST
+
+
+async def test_access_history_export(
+        reg_user,
+        login_several_times,
+        get_user_api_url,
+        make_http_request
+):
+    login_amount = randrange(5, 20)
+    await reg_user({"login": 'users_user_5', "password": '123',
+                    "full_name": 'Ivan Ivanov', 'email': 'achexport@mail.ru'})
+    response = await login_several_times(
+        login_amount, {"login": 'users_user_5', "password": '123'},
+        user_agent='export'
+    )
+    user_access_token = response.body['access']
+
+    url = f'{get_user_api_url}/access_history/export'
+    headers = {'Authorization': f'Bearer {user_access_token}'}
+    response = await make_http_request('GET', url, headers, None)
+    assert response.status == HTTPStatus.OK
+
+    lines = response.body.splitlines()
+    assert lines[0] == 'access_time,user_agent'
+    assert len(lines) == login_amount + 1
+    assert all(line.endswith(',export') for line in lines[1:])
+
+    response = await make_http_request('GET', url, headers, None,
+                                       {'date_from': '2000-01-01T00:00:00Z',
+                                        'date_to': '2000-02-01T00:00:00Z'})
+    assert response.body.splitlines() == ['access_time,user_agent']
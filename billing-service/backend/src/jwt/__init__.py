@@ -1,6 +1,6 @@
 # flake8: noqa:F401
-from async_fastapi_jwt_auth import AuthJWT
 from async_fastapi_jwt_auth.exceptions import AuthJWTException
 
 from .exceptions import authjwt_exception_handler
 from .jwt import login_required
+from .token_cache import AuthJWT
@@ -30,6 +30,11 @@ class Genre(UUIDMixin, TimeStampedMixin):
         verbose_name = _('genre')
         verbose_name_plural = _('genres')
 
+        indexes = [
+            models.Index(name='genre_updated_at_id_idx',
+                         fields=['updated_at', 'id']),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -42,6 +47,11 @@ class Person(UUIDMixin, TimeStampedMixin):
         verbose_name = _('person')
         verbose_name_plural = _('people')
 
+        indexes = [
+            models.Index(name='person_updated_at_id_idx',
+                         fields=['updated_at', 'id']),
+        ]
+
     def __str__(self):
         return self.full_name
 
@@ -71,6 +81,8 @@ class Filmwork(UUIDMixin, TimeStampedMixin):
         indexes = [
             models.Index(name='film_work_creation_date_idx',
                          fields=['creation_date']),
+            models.Index(name='film_work_updated_at_id_idx',
+                         fields=['updated_at', 'id']),
         ]
 
     def __str__(self):
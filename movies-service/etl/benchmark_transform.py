@@ -0,0 +1,67 @@
+"""Бенчмарк стадии преобразования ETL: стоимость CPU на один документ
+film_work (преобразование + сериализация в тело bulk-запроса).
+
+Запуск: python benchmark_transform.py [кол-во документов]
+"""
+import sys
+from datetime import datetime, timezone
+from random import choice, random
+from time import perf_counter
+from uuid import uuid4
+
+import orjson
+from managers.transform_pg_to_es import transform_film_work_to_es
+
+ROLES = ('actor', 'writer', 'director')
+
+
+def generate_rows(count: int, persons_per_film: int = 15,
+                  genres_per_film: int = 3) -> list[dict]:
+    """Генерируем записи film_work в формате ответа postgres"""
+    return [
+        {
+            'id': str(uuid4()),
+            'title': f'Film {i}',
+            'description': 'Description ' * 20,
+            'rating': round(random() * 10, 1),
+            'creation_date': datetime.now(timezone.utc),
+            'persons': [
+                {'person_role': choice(ROLES), 'person_id': str(uuid4()),
+                 'person_name': f'Person {j}'}
+                for j in range(persons_per_film)
+            ],
+            'genres': [
+                {'id': str(uuid4()), 'name': f'Genre {j}'}
+                for j in range(genres_per_film)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def main(count: int) -> None:
+    rows = generate_rows(count)
+
+    started = perf_counter()
+    actions = list(transform_film_work_to_es('movies', rows))
+    transformed = perf_counter()
+    payload = bytearray()
+    for action, document in actions:
+        payload += orjson.dumps(action)
+        payload += b'\n'
+        payload += orjson.dumps(document)
+        payload += b'\n'
+    serialized = perf_counter()
+
+    print(f'Документов: {count}, размер тела bulk: {len(payload)} байт')
+    per_document = 1e6 / count
+    print(f'Преобразование: {(transformed - started) * per_document:.2f}'
+          ' мкс/док')
+    print(f'Сериализация:   {(serialized - transformed) * per_document:.2f}'
+          ' мкс/док')
+    print(f'Итого:          {(serialized - started) * per_document:.2f}'
+          ' мкс/док')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -1,61 +1,121 @@
-from time import sleep
+from argparse import ArgumentParser
+from time import sleep, time_ns
+from typing import Iterable
 
 from managers.data.elastic_schemas import *
 from managers.elastic_manager import ElasticManager
+from managers.pipeline import Pipeline
 from managers.postgres_manager import PostgresManager
-from managers.redis_storage_manager import RedisStorage, State
+from managers.redis_storage_manager import MemoryStorage, RedisStorage, State
 from managers.tools.backoff import backoff
-from managers.tools.config import es_data, pg_data, redis_data
+from managers.tools.config import es_data, etl_data, pg_data, redis_data
 from managers.tools.logger import error, log
 from managers.transform_pg_to_es import (transform_film_work_to_es,
                                          transform_genre_to_es,
                                          transform_person_to_es)
 
+TRANSFORMERS = {
+    'film_work': transform_film_work_to_es,
+    'person': transform_person_to_es,
+    'genre': transform_genre_to_es
+}
+
 connections = {
     'pg_client': None,
     'es_client': None,
     'redis': None
 }
 
+options = {
+    'full_rebuild': False
+}
+
 
 def check_connection(pg_client, es_client, redis_client):
     """Проверяем соединения с бд"""
     return all((pg_client.alive(), es_client.alive(), redis_client.alive()))
 
 
-def run(table_name: str, pg_client, es_client, redis_client) -> None:
-    """Общая логика работы переноса данных."""
-
-    try:
-        for entity_ids in pg_client.get_ids(redis_client, table_name):
-            for film_work_ids in pg_client.get_film_work_ids(table_name, entity_ids):
-                if not film_work_ids:
-                    return
-                for film_works in pg_client.get_film_works(film_work_ids):
-                    es_data = transform_film_work_to_es(
-                        es_client.get_index_name_by_table_name('film_work'),
-                        film_works
-                    )
-                    es_client.save_data('film_work', es_data)
-            if table_name == 'person':
-                for persons in pg_client.get_persons(entity_ids):
-                    es_data = transform_person_to_es(
-                        es_client.get_index_name_by_table_name('person'),
-                        persons
-                    )
-                    es_client.save_data('person', es_data)
+def extract(pg_client, state_client) -> Iterable[tuple]:
+    """Извлекаем изменённые за цикл записи пачками для конвейера.
+    Фильмы, затронутые изменениями любых таблиц, собираются во временной
+    таблице и пересобираются ровно один раз за цикл. Так же собираются
+    персоны: изменённые и участники изменённых фильмов, фильмография которых
+    хранится в документе персоны.
+    Состояния таблиц сохраняются после загрузки фильмов и персон"""
+    batch_size = etl_data['batch_size']
+    checkpoints = {}
+    pg_client.prepare_changed_tables()
+
+    for table_name in ('film_work', 'genre', 'person'):
+        log(f'Экспортируем {table_name}')
+        for entity_ids, keyset in pg_client.get_ids(state_client, table_name,
+                                                    batch_size):
+            pg_client.collect_film_work_ids(table_name, entity_ids)
+            if table_name in ('film_work', 'person'):
+                pg_client.collect_person_ids(table_name, entity_ids)
             if table_name == 'genre':
                 for genres in pg_client.get_genres(entity_ids):
-                    es_data = transform_genre_to_es(
-                        es_client.get_index_name_by_table_name('genre'),
-                        genres
-                    )
-                    es_client.save_data('genre', es_data)
+                    yield 'genre', genres, None
+            checkpoints[table_name] = keyset
+
+    for film_work_ids in pg_client.get_changed_ids('film_work', batch_size):
+        for film_works in pg_client.get_film_works(film_work_ids, batch_size):
+            yield 'film_work', film_works, None
+
+    for person_ids in pg_client.get_changed_ids('person', batch_size):
+        for persons in pg_client.get_persons(person_ids, batch_size):
+            yield 'person', persons, None
+
+    for checkpoint in checkpoints.items():
+        yield None, [], checkpoint
 
+
+def publish_catalogue_version(es_client, state_client) -> None:
+    """Делаем загруженные данные видимыми и публикуем новую версию каталога.
+    По версии API инвалидирует кэш и формирует ETag ответов"""
+    es_client.refresh()
+    state_client.set_state(etl_data['catalogue_version_key'], str(time_ns()))
+
+
+def run(pg_client, es_client, redis_client) -> None:
+    """Общая логика работы переноса данных."""
+
+    try:
+        pipeline = Pipeline(es_client, TRANSFORMERS, **etl_data)
+        loaded = pipeline.run(
+            extract(pg_client, redis_client),
+            lambda checkpoint: redis_client.set_keyset_state(*checkpoint)
+        )
+        if loaded:
+            publish_catalogue_version(es_client, redis_client)
     except Exception as pipeline_err:
         error(f'Failed while running the pipeline.\n{pipeline_err}\n\n')
 
 
+def rebuild(pg_client, es_client, state_client) -> None:
+    """Полная переиндексация: данные загружаются с начала в новые версии
+    индексов, после чего алиасы атомарно переключаются на них. Читатели API
+    не замечают переиндексации"""
+    es_client.start_rebuild(schemas)
+    rebuild_state = State(MemoryStorage())
+    try:
+        pipeline = Pipeline(es_client, TRANSFORMERS, **etl_data)
+        pipeline.run(
+            extract(pg_client, rebuild_state),
+            lambda checkpoint: rebuild_state.set_keyset_state(*checkpoint)
+        )
+        es_client.finish_rebuild(schemas)
+    finally:
+        # После переключения алиасов недостроенных индексов не остаётся
+        es_client.abort_rebuild()
+
+    for table_name in es_client.indexes:
+        state_client.set_state(table_name,
+                               rebuild_state.get_last_state(table_name))
+    publish_catalogue_version(es_client, state_client)
+
+
 @backoff()
 def main() -> None:
     """Функция перебора таблиц и вызова обработки для каждой"""
@@ -63,20 +123,29 @@ def main() -> None:
          ElasticManager(**es_data) as es_client, \
          State(RedisStorage(**redis_data).connect()) as state_client:
 
-        for index in es_client.indexes.items():
-            es_client.create_index(index[1], schemas[index[0]])
+        outdated = es_client.ensure_indexes(schemas)
+        if options['full_rebuild'] or outdated:
+            log(f'Полная переиндексация. Устаревшие индексы: {outdated}')
+            rebuild(pg_client, es_client, state_client)
+            options['full_rebuild'] = False
 
         while True:
             if not check_connection(pg_client, es_client, state_client):
                 #  Рейзим чтобы выбросило в бэкофф и произошло переподключение в with
                 raise RuntimeError('Одно из подключений оставило нас :( ')
 
-            for table_name in ('film_work', 'genre', 'person'):
-                log(f'Экспортируем {table_name}')
-                run(table_name, pg_client, es_client, state_client)
+            run(pg_client, es_client, state_client)
 
             sleep(10)
 
 
 if __name__ == '__main__':
+    parser = ArgumentParser(
+        description='Перенос данных из Postgres в Elasticsearch'
+    )
+    parser.add_argument(
+        '--rebuild', action='store_true',
+        help='полностью пересобрать индексы с переключением алиасов'
+    )
+    options['full_rebuild'] = parser.parse_args().rebuild
     main()
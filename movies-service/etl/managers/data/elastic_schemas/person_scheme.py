@@ -23,6 +23,14 @@ person_scheme = {
                     "film": {
                         "type": "keyword"
                     },
+                    "title": {
+                        "type": "text",
+                        "index": False
+                    },
+                    "imdb_rating": {
+                        "type": "float",
+                        "index": False
+                    },
                 }
             }
         },
@@ -1,12 +1,29 @@
-from elasticsearch import BadRequestError, Elasticsearch
+from copy import deepcopy
+from datetime import datetime, timezone
+from hashlib import sha1
+from typing import Iterable
+
+import orjson
+from elasticsearch import BadRequestError, Elasticsearch, NotFoundError
 from elasticsearch.client import IndicesClient
+from elasticsearch.helpers import parallel_bulk
 
 from .tools.backoff import backoff
 from .tools.logger import error, log
+from .tools.serializer import OrjsonSerializer
+
+
+def get_schema_hash(index_scheme: dict) -> str:
+    """Получаем отпечаток схемы индекса для определения изменения схемы"""
+    dump = orjson.dumps(index_scheme, option=orjson.OPT_SORT_KEYS)
+    return sha1(dump).hexdigest()
 
 
 class ElasticManager:
-    """Класс для работы с ElasticSearch"""
+    """Класс для работы с ElasticSearch.
+    Названия индексов из настроек являются алиасами, за которыми стоят
+    версионированные индексы. Это позволяет пересобирать индексы полностью и
+    переключать на них чтение атомарно"""
 
     def __init__(self, host, port, **indexes):
         self.host = host
@@ -16,6 +33,7 @@ class ElasticManager:
             'person': indexes['persons_index'],
             'genre': indexes['genres_index']
         }
+        self.write_indexes = {}
 
     def __enter__(self):
         self.connect_elastic()
@@ -29,8 +47,9 @@ class ElasticManager:
         return hasattr(self, 'client') and self.client.ping()
 
     def get_index_name_by_table_name(self, table_name):
-        """Получаем название индекса"""
-        return self.indexes[table_name]
+        """Получаем название индекса для записи. Во время полной
+        переиндексации это новая версия индекса, иначе - алиас"""
+        return self.write_indexes.get(table_name, self.indexes[table_name])
 
     @backoff()
     def connect_elastic(self):
@@ -41,7 +60,11 @@ class ElasticManager:
             if not isinstance(self.port, int):
                 self.port = int(self.port)
 
-            self.client = Elasticsearch([{'host': self.host, 'port': self.port, 'scheme': self.scheme}])
+            self.client = Elasticsearch(
+                [{'host': self.host, 'port': self.port,
+                  'scheme': self.scheme}],
+                serializers={'application/json': OrjsonSerializer()}
+            )
             log('Выполнили подключение к Elasticsearch')
 
             return self
@@ -57,9 +80,124 @@ class ElasticManager:
         """
         try:
             IndicesClient(self.client).create(index=index_name, **index_scheme)
-            log('Создали индекс')
+            log(f'Создали индекс {index_name}')
         except BadRequestError:
-            log('Индекс уже существует')
+            log(f'Индекс {index_name} уже существует')
+
+    def create_versioned_index(self, table_name, index_scheme,
+                               **settings) -> str:
+        """Создаем новую версию индекса таблицы. В _meta маппинга сохраняется
+        отпечаток схемы
+        :param table_name: таблица
+        :param index_scheme: схема индекса
+        :param settings: настройки, переопределяющие настройки схемы
+        """
+        version = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+        index_name = f'{self.indexes[table_name]}_v{version}'
+        versioned_scheme = deepcopy(index_scheme)
+        versioned_scheme['settings'].update(settings)
+        versioned_scheme['mappings']['_meta'] = {
+            'schema_hash': get_schema_hash(index_scheme)
+        }
+        self.create_index(index_name, versioned_scheme)
+        return index_name
+
+    def get_alias_indexes(self, alias) -> list[str]:
+        """Получаем индексы, на которые указывает алиас"""
+        try:
+            return list(self.client.indices.get_alias(name=alias))
+        except NotFoundError:
+            return []
+
+    @backoff()
+    def ensure_indexes(self, schemas: dict) -> list[str]:
+        """Создаем недостающие индексы за алиасами.
+        :param schemas: схемы индексов по названию таблицы
+        :return: таблицы, индексы которых нужно пересобрать: схема изменилась
+        или индекс создан без алиаса
+        """
+        outdated = []
+        for table_name, alias in self.indexes.items():
+            indexes = self.get_alias_indexes(alias)
+            if not indexes:
+                if self.client.indices.exists(index=alias):
+                    outdated.append(table_name)
+                    continue
+                index_name = self.create_versioned_index(table_name,
+                                                         schemas[table_name])
+                self.client.indices.update_aliases(
+                    actions=[{'add': {'index': index_name, 'alias': alias}}]
+                )
+                continue
+
+            mapping = self.client.indices.get_mapping(index=indexes[0])
+            meta = mapping[indexes[0]]['mappings'].get('_meta', {})
+            if meta.get('schema_hash') != get_schema_hash(schemas[table_name]):
+                outdated.append(table_name)
+        return outdated
+
+    def start_rebuild(self, schemas: dict) -> None:
+        """Создаем новые версии всех индексов с настройками для быстрой
+        загрузки (без реплик и refresh) и направляем в них запись
+        :param schemas: схемы индексов по названию таблицы
+        """
+        self.write_indexes = {
+            table_name: self.create_versioned_index(
+                table_name, schemas[table_name],
+                number_of_replicas=0, refresh_interval='-1'
+            )
+            for table_name in self.indexes
+        }
+        log('Начали полную переиндексацию в '
+            f'{list(self.write_indexes.values())}')
+
+    def finish_rebuild(self, schemas: dict) -> None:
+        """Возвращаем новым индексам рабочие настройки, объединяем сегменты и
+        атомарно переключаем на них алиасы. Старые версии индексов удаляются
+        :param schemas: схемы индексов по названию таблицы
+        """
+        actions = []
+        old_indexes = []
+        for table_name, index_name in self.write_indexes.items():
+            settings = schemas[table_name]['settings']
+            self.client.indices.put_settings(index=index_name, settings={
+                'number_of_replicas': settings.get('number_of_replicas', 1),
+                'refresh_interval': settings.get('refresh_interval', '1s'),
+            })
+            self.client.options(request_timeout=3600).indices.forcemerge(
+                index=index_name, max_num_segments=1
+            )
+            self.client.indices.refresh(index=index_name)
+
+            alias = self.indexes[table_name]
+            alias_indexes = self.get_alias_indexes(alias)
+            if alias_indexes:
+                actions.extend({'remove': {'index': index, 'alias': alias}}
+                               for index in alias_indexes)
+                old_indexes.extend(alias_indexes)
+            elif self.client.indices.exists(index=alias):
+                actions.append({'remove_index': {'index': alias}})
+            actions.append({'add': {'index': index_name, 'alias': alias}})
+
+        self.client.indices.update_aliases(actions=actions)
+        log(f'Переключили алиасы на {list(self.write_indexes.values())}')
+        self.write_indexes = {}
+
+        for index_name in old_indexes:
+            self.client.indices.delete(index=index_name)
+
+    def abort_rebuild(self) -> None:
+        """Удаляем недостроенные версии индексов"""
+        for index_name in self.write_indexes.values():
+            try:
+                self.client.indices.delete(index=index_name)
+            except NotFoundError:
+                pass
+        self.write_indexes = {}
+
+    def refresh(self) -> None:
+        """Делаем загруженные документы видимыми для поиска"""
+        self.client.indices.refresh(index=list(self.indexes.values()))
 
     def close(self):
         try:
@@ -67,16 +205,27 @@ class ElasticManager:
         except:
             pass
 
-    @backoff()
-    def save_data(self, table_name, data: list[dict]) -> None:
-        """Сохраняем данные
-        :param table_name: название таблица
-        :param data: данные
+    def save_stream(self, actions: Iterable[tuple[dict, dict]],
+                    thread_count: int = 4, chunk_size: int = 500,
+                    max_chunk_bytes: int = 10 * 1024 * 1024,
+                    queue_size: int = 4) -> Iterable[tuple[bool, dict]]:
+        """Сохраняем поток документов параллельными bulk-запросами без
+        принудительного refresh индекса. Результаты возвращаются в порядке
+        следования документов.
+        :param actions: пары (метаданные действия bulk API, документ)
+        :param thread_count: кол-во потоков, отправляющих bulk-запросы
+        :param chunk_size: максимальное кол-во документов в одном запросе
+        :param max_chunk_bytes: максимальный размер одного запроса в байтах
+        :param queue_size: кол-во подготовленных пачек, ожидающих отправки
         """
-        try:
-            if not hasattr(self, 'client') or not self.client.ping():
-                self.connect_elastic()
-            self.client.bulk(index=self.get_index_name_by_table_name(table_name), body=data, refresh=True)
-        except Exception as err:
-            error(f'Ошибка во время сохранения данных в Elastic.\n{err}\n\n')
-            raise err
+        if not hasattr(self, 'client') or not self.client.ping():
+            self.connect_elastic()
+        return parallel_bulk(
+            self.client,
+            actions,
+            thread_count=thread_count,
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            queue_size=queue_size,
+            expand_action_callback=lambda action: action
+        )
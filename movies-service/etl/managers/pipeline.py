@@ -0,0 +1,144 @@
+"""Конвейер переноса данных из postgres в elasticsearch."""
+from collections import deque
+from queue import Full, Queue
+from threading import Event, Thread
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from psycopg2 import Error as PostgresError
+
+from .elastic_manager import ElasticManager
+from .tools.logger import error, log
+
+_STOP = object()
+
+Transformer = Callable[[str, list], Iterator[tuple[dict, dict]]]
+
+
+class Pipeline:
+    """Конвейер extract -> transform -> load. Стадии работают одновременно:
+    извлечение данных из postgres выполняется в отдельном потоке и передаётся
+    через ограниченную очередь, преобразование выполняется по мере
+    необходимости загрузчику, а загрузка выполняется несколькими потоками
+    bulk-запросов. Состояние (checkpoint) пачки сохраняется только после
+    успешной загрузки всех её документов."""
+
+    def __init__(self, es_client: ElasticManager,
+                 transformers: dict[str, Transformer],
+                 queue_size: int = 8, bulk_thread_count: int = 4,
+                 bulk_chunk_size: int = 500,
+                 bulk_max_chunk_bytes: int = 10 * 1024 * 1024, **kwargs):
+        """
+        :param es_client: менеджер elasticsearch
+        :param transformers: функции преобразования данных по названию таблицы
+        :param queue_size: размер очереди между стадиями
+        :param bulk_thread_count: кол-во потоков загрузки
+        :param bulk_chunk_size: максимальное кол-во документов в bulk-запросе
+        :param bulk_max_chunk_bytes: максимальный размер bulk-запроса в байтах
+        """
+        self.es_client = es_client
+        self.transformers = transformers
+        self.queue_size = queue_size
+        self.bulk_thread_count = bulk_thread_count
+        self.bulk_chunk_size = bulk_chunk_size
+        self.bulk_max_chunk_bytes = bulk_max_chunk_bytes
+
+    def run(self, batches: Iterable[tuple[Optional[str], list, Any]],
+            on_checkpoint: Callable[[Any], None]) -> int:
+        """Запускаем конвейер.
+        :param batches: пачки записей в виде (таблица, записи, checkpoint).
+            Пачка с checkpoint=None не меняет состояние.
+        :param on_checkpoint: функция сохранения состояния
+        :return: кол-во загруженных документов
+        """
+        queue = Queue(maxsize=self.queue_size)
+        checkpoints = deque()
+        extract_errors = []
+        stop = Event()
+        extracted = Event()
+
+        extractor = Thread(
+            target=self._extract,
+            args=(batches, queue, stop, extracted, extract_errors),
+            daemon=True
+        )
+        extractor.start()
+
+        loaded = 0
+        try:
+            for _ in self.es_client.save_stream(
+                    self._transform(queue, checkpoints),
+                    thread_count=self.bulk_thread_count,
+                    chunk_size=self.bulk_chunk_size,
+                    max_chunk_bytes=self.bulk_max_chunk_bytes,
+                    queue_size=self.queue_size):
+                loaded += 1
+                self._apply_checkpoints(checkpoints, loaded, on_checkpoint)
+        finally:
+            stop.set()
+            extractor.join()
+
+        if extract_errors:
+            raise extract_errors[0]
+        if not extracted.is_set():
+            raise RuntimeError('Извлечение данных прервано')
+
+        self._apply_checkpoints(checkpoints, loaded, on_checkpoint)
+        log(f'Загружено документов: {loaded}')
+        return loaded
+
+    @staticmethod
+    def _put(queue: Queue, item: Any, stop: Event) -> bool:
+        """Кладём элемент в очередь, пока загрузка не прервана.
+        :return: False, если загрузка прервана
+        """
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=1)
+                return True
+            except Full:
+                continue
+        return False
+
+    @staticmethod
+    def _extract(batches: Iterable, queue: Queue, stop: Event,
+                 extracted: Event, errors: list) -> None:
+        """Стадия извлечения: складываем пачки записей в очередь. Если
+        загрузка прервалась, извлечение останавливается. Признак окончания
+        передаётся и при ошибке, чтобы стадия преобразования не ждала его
+        бесконечно; успешное извлечение всех пачек отмечается в extracted."""
+        try:
+            for batch in batches:
+                if not Pipeline._put(queue, batch, stop):
+                    return
+            extracted.set()
+        except PostgresError as err:
+            error(f'Ошибка при извлечении данных.\n{err}\n\n')
+            errors.append(err)
+        finally:
+            Pipeline._put(queue, _STOP, stop)
+
+    def _transform(self, queue: Queue,
+                   checkpoints: deque) -> Iterator[tuple[dict, dict]]:
+        """Стадия преобразования: лениво превращаем записи в пары (действие
+        bulk API, документ) и запоминаем, после какого документа можно
+        сохранить checkpoint."""
+        produced = 0
+        while (batch := queue.get()) is not _STOP:
+            table_name, records, checkpoint = batch
+            if records:
+                index_name = self.es_client.get_index_name_by_table_name(
+                    table_name
+                )
+                for action in self.transformers[table_name](index_name,
+                                                            records):
+                    produced += 1
+                    yield action
+            if checkpoint is not None:
+                checkpoints.append((produced, checkpoint))
+
+    @staticmethod
+    def _apply_checkpoints(checkpoints: deque, loaded: int,
+                           on_checkpoint: Callable[[Any], None]) -> None:
+        """Сохраняем состояния пачек, все документы которых загружены."""
+        while checkpoints and checkpoints[0][0] <= loaded:
+            on_checkpoint(checkpoints.popleft()[1])
@@ -1,6 +1,9 @@
 """Модуль для работы с postgres."""
 from typing import Iterable
 
+import psycopg2
+from psycopg2 import sql
+
 from .tools.backoff import backoff
 from .tools.base_postgres import BasePostgres
 from .tools.logger import error, log
@@ -10,41 +13,78 @@ class PostgresManager(BasePostgres):
     """Класс для работы с postgres."""
 
     @staticmethod
-    def generate_placeholders(placeholders_count: int):
-        """Генерируем символы "?" для подстановки в запрос.
-        :param placeholders_count: кол-во подставляемых данных
+    def query_create_changed_tables() -> str:
+        """Генерим запрос на создание временных таблиц film_work и person,
+        затронутых за цикл"""
+        return """
+        CREATE TEMP TABLE IF NOT EXISTS changed_film_work
+        (id uuid PRIMARY KEY);
+        CREATE TEMP TABLE IF NOT EXISTS changed_person
+        (id uuid PRIMARY KEY);
+        TRUNCATE changed_film_work, changed_person;
         """
-        return ', '.join('%s' for _ in range(placeholders_count))
 
     @staticmethod
-    def get_table_ids_query(table_name: str, updated_at: str):
-        """Генерим запрос получения айдишников из таблицы
+    def get_table_ids_query(table_name: str) -> sql.Composed:
+        """Генерим запрос получения айдишников из таблицы. Записи упорядочены
+        по (updated_at, id) и читаются окнами после заданной позиции
         :param table_name: таблица
-        :param updated_at: начиная с какого времени updated_at собираем записи
         """
-        return f"""
+        return sql.SQL("""
         SELECT id, updated_at
-        FROM content.{table_name}
-        WHERE updated_at > '{updated_at}'
-        ORDER BY updated_at;
-        """
+        FROM content.{table}
+        WHERE (updated_at, id) > (%s, %s::uuid)
+        ORDER BY updated_at, id
+        LIMIT %s;
+        """).format(table=sql.Identifier(table_name))
 
-    def query_film_work_ids(self, table_name: str, len_ids: int) -> str:
-        """Генерим запрос получение из таблиц М2М
+    @staticmethod
+    def query_film_work_ids(table_name: str) -> sql.Composed:
+        """Генерим запрос, добавляющий во временную таблицу film_work,
+        связанные с изменёнными записями. Повторно затронутые film_work не
+        дублируются
         :param table_name: название таблицы
-        :param ids: список айди таблицы film_work
         """
-        return f"""
-        SELECT fw.id, fw.updated_at
-        FROM content.film_work fw
-        JOIN content.{table_name}_film_work tfw ON tfw.film_work_id = fw.id
-        WHERE tfw.{table_name}_id IN ({self.generate_placeholders(len_ids)})
-        ORDER BY fw.updated_at;
+        if table_name == 'film_work':
+            return sql.SQL("""
+            INSERT INTO changed_film_work (id)
+            SELECT unnest(%s::uuid[])
+            ON CONFLICT DO NOTHING;
+            """)
+        return sql.SQL("""
+        INSERT INTO changed_film_work (id)
+        SELECT tfw.film_work_id
+        FROM content.{m2m_table} tfw
+        WHERE tfw.{entity_id} = ANY(%s::uuid[])
+        ON CONFLICT DO NOTHING;
+        """).format(m2m_table=sql.Identifier(f'{table_name}_film_work'),
+                    entity_id=sql.Identifier(f'{table_name}_id'))
+
+    @staticmethod
+    def query_person_ids(table_name: str) -> sql.SQL:
+        """Генерим запрос, добавляющий во временную таблицу person,
+        фильмографию которых нужно пересобрать из-за изменения записей.
+        Изменение film_work затрагивает всех его участников
+        :param table_name: название таблицы (film_work или person)
         """
+        if table_name == 'person':
+            return sql.SQL("""
+            INSERT INTO changed_person (id)
+            SELECT unnest(%s::uuid[])
+            ON CONFLICT DO NOTHING;
+            """)
+        return sql.SQL("""
+        INSERT INTO changed_person (id)
+        SELECT pfw.person_id
+        FROM content.person_film_work pfw
+        WHERE pfw.film_work_id = ANY(%s::uuid[])
+        ON CONFLICT DO NOTHING;
+        """)
 
-    def query_film_works(self, film_work_len: int) -> str:
+    @staticmethod
+    def query_film_works() -> str:
         """Генерим запрос на получение всех данных"""
-        return f"""
+        return """
         SELECT
         fw.id,
         fw.title,
@@ -78,97 +118,160 @@ class PostgresManager(BasePostgres):
         LEFT JOIN content.person p ON p.id = pfw.person_id
         LEFT JOIN content.genre_film_work gfw ON gfw.film_work_id = fw.id
         LEFT JOIN content.genre g ON g.id = gfw.genre_id
-        WHERE fw.id IN ({self.generate_placeholders(film_work_len)})
+        WHERE fw.id = ANY(%s::uuid[])
         GROUP BY fw.id
         ORDER BY fw.updated_at;
         """
 
-    def query_persons(self, persons_len):
-        return f"""
+    @staticmethod
+    def query_persons() -> str:
+        """Генерим запрос на получение персон с готовой фильмографией: по
+        каждому фильму его роли, название и рейтинг, фильмы упорядочены по
+        рейтингу"""
+        return """
         SELECT
         p.id,
         p.full_name,
         COALESCE (
-        json_agg(
-            DISTINCT jsonb_build_object(
-               'film', pfw.film_work_id,
-               'roles', ARRAY[pfw.role] || '{{}}'
-            )
-        ) FILTER (WHERE pfw.film_work_id is not null),
-        '[]'
-    ) as films
-        FROM person p
-        JOIN person_film_work pfw ON pfw.person_id = p.id 
-        WHERE p.id IN ({self.generate_placeholders(persons_len)})
-        GROUP BY p.id, pfw.film_work_id
+            json_agg(
+                json_build_object(
+                   'film', pf.film_work_id,
+                   'roles', pf.roles,
+                   'title', fw.title,
+                   'imdb_rating', fw.rating
+                ) ORDER BY fw.rating DESC NULLS LAST, fw.id
+            ) FILTER (WHERE pf.film_work_id is not null),
+            '[]'
+        ) as films
+        FROM content.person p
+        LEFT JOIN (
+            SELECT
+            pfw.person_id,
+            pfw.film_work_id,
+            array_agg(DISTINCT pfw.role) as roles
+            FROM content.person_film_work pfw
+            WHERE pfw.person_id = ANY(%(ids)s::uuid[])
+            GROUP BY pfw.person_id, pfw.film_work_id
+        ) pf ON pf.person_id = p.id
+        LEFT JOIN content.film_work fw ON fw.id = pf.film_work_id
+        WHERE p.id = ANY(%(ids)s::uuid[])
+        GROUP BY p.id
         ORDER BY p.updated_at
         """
 
-    def query_genres(self, genres_len):
-        return f"""
+    @staticmethod
+    def query_genres() -> str:
+        return """
         SELECT
         g.id,
         g.name,
         gfw.film_work_id
         FROM genre g
         JOIN genre_film_work gfw ON gfw.genre_id = g.id
-        WHERE g.id IN ({self.generate_placeholders(genres_len)})
+        WHERE g.id = ANY(%s::uuid[])
         ORDER BY g.updated_at
         """
 
-    @staticmethod
-    def get_entity_state(state: str, table_name: str) -> str:
-        """Получаем время последних загруженных данных.
-        :param state: время загруженных данных
-        """
-        current_state = state.get_last_state(table_name)
-        if not current_state:
-            return '0001-01-01 00:00:00.000000+00:00'
-        else:
-            return current_state
-
     @backoff()
-    def get_ids(self, state: object, table_name: str, batch_size: int = 100) -> Iterable[list[str]]:
-        """Получаем айди записей, время обновления которых выше последнего времени прохождения"""
+    def get_ids(
+            self, state: object, table_name: str, batch_size: int = 100,
+            window_size: int = 10000
+    ) -> Iterable[tuple[list[str], tuple[str, str]]]:
+        """Получаем айди записей, изменённых после последней загруженной
+        записи. Записи читаются окнами по window_size строк через серверный
+        курсор с keyset-пагинацией по (updated_at, id), поэтому каждая запись
+        читается один раз, а записи с одинаковым updated_at на границе пачек
+        не теряются.
+        Вместе с айди возвращается новое состояние, которое сохраняется после
+        загрузки пачки"""
         try:
+            keyset = state.get_keyset_state(table_name)
+            total = 0
             while True:
-                last_modified = self.get_entity_state(state, table_name)
-                self.execute(
-                    self.get_table_ids_query(table_name, last_modified)
-                )
-                entity_records = self.cursor.fetchmany(batch_size)
-                if not entity_records:
-                    log(f'Не найдено изменений для таблицы {table_name}.')
+                fetched = 0
+                with self.get_server_cursor(f'{table_name}_ids') as cursor:
+                    cursor.execute(self.get_table_ids_query(table_name),
+                                   (*keyset, window_size))
+                    while entity_records := cursor.fetchmany(batch_size):
+                        fetched += len(entity_records)
+                        last_record = entity_records[-1]
+                        keyset = (str(last_record['updated_at']),
+                                  str(last_record['id']))
+                        yield [t['id'] for t in entity_records], keyset
+                self.connection.commit()
+                total += fetched
+                if fetched < window_size:
                     break
-                yield [t['id'] for t in entity_records]
-                next_last_modified = entity_records[-1].get('updated_at')
-                state.set_state(table_name, str(next_last_modified))
-        except Exception as err:
+            if not total:
+                log(f'Не найдено изменений для таблицы {table_name}.')
+        except psycopg2.Error as err:
             error(f'Ошибка при извлечении данных из {table_name}.\n{err}\n\n')
             raise err
 
     @backoff()
-    def get_film_work_ids(self, entity_table_name: str, entity_ids: list[str], batch_size: int = 100) -> Iterable[list[str]]:
+    def prepare_changed_tables(self) -> None:
+        """Создаём (или очищаем) временные таблицы film_work и person,
+        затронутых за цикл"""
+        self.execute(self.query_create_changed_tables())
+
+    @backoff()
+    def collect_film_work_ids(self, entity_table_name: str,
+                              entity_ids: list[str]) -> None:
+        """Добавляем во временную таблицу film_work, которые нужно
+        переиндексировать из-за изменения записей entity_table_name. Каждый
+        film_work попадает в таблицу один раз за цикл
+        :param entity_table_name: таблица изменённых записей
+        :param entity_ids: айди изменённых записей
+        """
         try:
-            if entity_table_name == 'film_work':
-                yield entity_ids
-            else:
-                self.execute(
-                    self.query_film_work_ids(entity_table_name, len(entity_ids)), vars=entity_ids
+            self.execute(self.query_film_work_ids(entity_table_name),
+                         vars=(entity_ids,))
+        except psycopg2.Error as err:
+            error('Ошибка при извлечении данных из таблицы '
+                  f'{entity_table_name}_film_work.\n{err}\n\n')
+            raise
+
+    @backoff()
+    def collect_person_ids(self, entity_table_name: str,
+                           entity_ids: list[str]) -> None:
+        """Добавляем во временную таблицу person, документы которых нужно
+        переиндексировать из-за изменения записей entity_table_name
+        :param entity_table_name: таблица изменённых записей (film_work или
+            person)
+        :param entity_ids: айди изменённых записей
+        """
+        try:
+            self.execute(self.query_person_ids(entity_table_name),
+                         vars=(entity_ids,))
+        except psycopg2.Error as err:
+            error('Ошибка при извлечении участников изменённых '
+                  f'{entity_table_name}.\n{err}\n\n')
+            raise
+
+    @backoff()
+    def get_changed_ids(self, table_name: str,
+                        batch_size: int = 100) -> Iterable[list[str]]:
+        """Получаем айди, накопленные во временной таблице за цикл
+        :param table_name: название таблицы (film_work или person)
+        """
+        try:
+            with self.get_server_cursor(f'changed_{table_name}_ids') as cursor:
+                cursor.execute(
+                    sql.SQL('SELECT id FROM {table} ORDER BY id;').format(
+                        table=sql.Identifier(f'changed_{table_name}')
+                    )
                 )
-                while True:
-                    film_work_records = self.cursor.fetchmany(batch_size)
-                    if not film_work_records:
-                        break
-                    yield [t['id'] for t in film_work_records]
-        except Exception as err:
-            error(f'Ошибка при извлечении данных из таблицы {entity_table_name}_film_work.\n{err}\n\n')
+                while records := cursor.fetchmany(batch_size):
+                    yield [t['id'] for t in records]
+            self.connection.commit()
+        except psycopg2.Error as err:
+            error(f'Ошибка при извлечении изменённых {table_name}.\n{err}\n\n')
             raise
 
     @backoff()
     def get_film_works(self, film_work_ids: list[str], batch_size=100) -> Iterable[list]:
         try:
-            self.execute(self.query_film_works(len(film_work_ids)), vars=film_work_ids)
+            self.execute(self.query_film_works(), vars=(film_work_ids,))
 
             while True:
                 records = self.cursor.fetchmany(batch_size)
@@ -184,7 +287,7 @@ class PostgresManager(BasePostgres):
     @backoff()
     def get_persons(self, persons_ids: list[str], batch_size=100) -> Iterable[list]:
         try:
-            self.execute(self.query_persons(len(persons_ids)), vars=persons_ids)
+            self.execute(self.query_persons(), vars={'ids': persons_ids})
 
             while True:
                 records = self.cursor.fetchmany(batch_size)
@@ -200,7 +303,7 @@ class PostgresManager(BasePostgres):
     @backoff()
     def get_genres(self, genres_ids: list[str], batch_size=100) -> Iterable[list]:
         try:
-            self.execute(self.query_genres(len(genres_ids)), vars=genres_ids)
+            self.execute(self.query_genres(), vars=(genres_ids,))
 
             while True:
                 records = self.cursor.fetchmany(batch_size)
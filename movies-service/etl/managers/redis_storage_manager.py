@@ -1,9 +1,12 @@
+import json
 from typing import Any, Callable
 
 from redis import Redis
 
 from .tools.backoff import backoff
 
+MIN_UUID = '00000000-0000-0000-0000-000000000000'
+
 
 class RedisStorage:
     """Класс для работы с Redis."""
@@ -42,6 +45,32 @@ class RedisStorage:
         return result.decode() if result else result
 
 
+class MemoryStorage:
+    """Хранилище состояний в памяти процесса. Используется при полной
+    переиндексации, когда загрузка начинается с начала, а итоговое состояние
+    переносится в основное хранилище."""
+
+    def __init__(self) -> None:
+        self.states = {}
+
+    def connect(self):
+        return self
+
+    def close(self):
+        pass
+
+    def alive(self) -> bool:
+        return True
+
+    def save_state(self, state, value) -> None:
+        """Сохранить состояние в хранилище."""
+        self.states[state] = value
+
+    def retrieve_state(self, param) -> Any:
+        """Получить состояние из хранилища."""
+        return self.states.get(param)
+
+
 class State:
     """Класс для работы с состояниями."""
 
@@ -71,3 +100,25 @@ class State:
         if not current_state:
             current_state = '0001-01-01 00:00:00.000000+00:00'
         return current_state
+
+    def get_keyset_state(self, table_name: str) -> tuple[str, str]:
+        """Получаем позицию последней загруженной записи: время обновления и
+        id. Состояние в старом формате (только время) тоже поддерживается.
+        :param table_name: таблица
+        """
+        current_state = self.get_last_state(table_name)
+        try:
+            keyset = json.loads(current_state)
+            return keyset['updated_at'], keyset['id']
+        except (ValueError, TypeError, KeyError):
+            return current_state, MIN_UUID
+
+    def set_keyset_state(self, table_name: str,
+                         keyset: tuple[str, str]) -> None:
+        """Сохраняем позицию последней загруженной записи.
+        :param table_name: таблица
+        :param keyset: время обновления и id записи
+        """
+        updated_at, id_ = keyset
+        self.set_state(table_name,
+                       json.dumps({'updated_at': updated_at, 'id': id_}))
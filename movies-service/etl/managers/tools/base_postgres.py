@@ -53,6 +53,17 @@ class BasePostgres:
             self.cursor = self.connection.cursor(cursor_factory=extras.DictCursor)
         return self.cursor
 
+    def get_server_cursor(self, name: str) -> object:
+        """Получаем именованный (серверный) курсор. Курсор создаётся с
+        WITH HOLD, поэтому переживает коммиты других запросов соединения.
+        :param name: название курсора
+        """
+        if not hasattr(self, 'connection') or self.connection.closed:
+            self.connect()
+        return self.connection.cursor(
+            name=name, cursor_factory=extras.DictCursor, withhold=True
+        )
+
     def close_connection(self) -> None:
         """Закрываем соединение с бд."""
         if hasattr(self, 'cursor') and not self.cursor.closed:
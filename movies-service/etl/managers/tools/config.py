@@ -28,6 +28,18 @@ class _RedisData(BaseSettings):
     port: int = Field(env='REDIS_PORT')
 
 
+class _ETLData(BaseSettings):
+    batch_size: int = Field(100, env='PAGE_SIZE')
+    queue_size: int = Field(8, env='ETL_QUEUE_SIZE')
+    bulk_thread_count: int = Field(4, env='ETL_BULK_THREAD_COUNT')
+    bulk_chunk_size: int = Field(500, env='ETL_BULK_CHUNK_SIZE')
+    bulk_max_chunk_bytes: int = Field(10 * 1024 * 1024,
+                                      env='ETL_BULK_MAX_CHUNK_BYTES')
+    catalogue_version_key: str = Field('catalogue_version',
+                                       env='CATALOGUE_VERSION_KEY')
+
+
 pg_data = _PGData().dict()
 es_data = _ESData().dict()
 redis_data = _RedisData().dict()
+etl_data = _ETLData().dict()
@@ -0,0 +1,18 @@
+from typing import Any
+
+import orjson
+from elastic_transport import JsonSerializer
+
+
+class OrjsonSerializer(JsonSerializer):
+    """Сериализатор elasticsearch на базе orjson. Используется для тела
+    bulk-запросов, поэтому документы кодируются сразу в байты без
+    промежуточных строк."""
+
+    def dumps(self, data: Any) -> bytes:
+        if isinstance(data, (str, bytes)):
+            return super().dumps(data)
+        return orjson.dumps(data, default=self.default)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
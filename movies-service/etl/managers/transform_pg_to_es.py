@@ -1,119 +1,85 @@
-from typing import Callable, Optional
+from typing import Iterator
 
 from .tools.logger import error
 
+ROLE_FIELDS = {
+    'actor': 'actors',
+    'writer': 'writers',
+    'director': 'directors'
+}
 
-def transform_film_work_to_es(es_index_name, pg_data: list) -> list[dict]:
-    """Преобразуем данные из постгрес film_work в формат для es"""
-    prepared_data = []
 
-    def is_actor(person: dict) -> bool:
-        return person.get('person_role') == 'actor'
+def get_bulk_action(es_index_name: str, row: dict) -> dict:
+    """Формируем метаданные действия bulk API для записи"""
+    return {'index': {'_index': es_index_name, '_id': row['id']}}
 
-    def is_writer(person: dict) -> bool:
-        return person.get('person_role') == 'writer'
-
-    def is_director(person: dict) -> bool:
-        return person.get('person_role') == 'director'
-
-    def get_names(persons: list[dict]) -> list[Optional[str]]:
-        def get_name(person: dict) -> Optional[str]:
-            return person.get('full_name')
-
-        return list(map(get_name, persons))
-
-    def get_persons(persons: list[dict], pred: Callable) -> list[dict]:
-        def strip_fields(p: dict) -> dict:
-            return {'id': p.get('person_id'),
-                    'full_name': p.get('person_name')}
-
-        return list(map(strip_fields, filter(pred, persons)))
 
+def transform_film_work_to_es(es_index_name,
+                              pg_data: list) -> Iterator[tuple[dict, dict]]:
+    """Преобразуем данные из постгрес film_work в формат для es.
+    Персоны распределяются по ролям за один проход, документы отдаются по
+    одному"""
     try:
         for row in pg_data:
-            persons = row.get('persons')
-            actors = get_persons(persons, is_actor)
-            writers = get_persons(persons, is_writer)
-            directors = get_persons(persons, is_director)
-            prepared_row = {
-                'id': row.get('id'),
-                'imdb_rating': row.get('rating'),
-                'genres': row.get('genres'),
-                'title': row.get('title'),
-                'description': row.get('description'),
-                'actors_names': get_names(actors),
-                'writers_names': get_names(writers),
-                'directors_names': get_names(directors),
+            persons_by_role = {field: [] for field in ROLE_FIELDS.values()}
+            for person in row['persons']:
+                field = ROLE_FIELDS.get(person['person_role'])
+                if field is not None:
+                    persons_by_role[field].append({
+                        'id': person['person_id'],
+                        'full_name': person['person_name']
+                    })
+
+            actors = persons_by_role['actors']
+            writers = persons_by_role['writers']
+            directors = persons_by_role['directors']
+            yield get_bulk_action(es_index_name, row), {
+                'id': row['id'],
+                'imdb_rating': row['rating'],
+                'genres': row['genres'],
+                'title': row['title'],
+                'description': row['description'],
+                'actors_names': [p['full_name'] for p in actors],
+                'writers_names': [p['full_name'] for p in writers],
+                'directors_names': [p['full_name'] for p in directors],
                 'actors': actors,
                 'writers': writers,
                 'directors': directors,
-                'creation_date': row.get('creation_date')
-            }
-            row_index = {
-                'index': {
-                    '_index': es_index_name,
-                    '_id': row.get('id')
-                }
+                'creation_date': row['creation_date']
             }
-            prepared_data.append(row_index)
-            prepared_data.append(prepared_row)
     except Exception as err:
         error(
             f'Ошибка во время преобразования данных.\n{err}\n\n')
         raise err
 
-    return prepared_data
-
 
-def transform_person_to_es(es_index_name, pg_data: list) -> list[dict]:
+def transform_person_to_es(es_index_name,
+                           pg_data: list) -> Iterator[tuple[dict, dict]]:
     """Преобразуем данные из постгрес person в формат для es"""
-    prepared_data = []
-
     try:
         for row in pg_data:
-            prepared_row = {
-                'id': row.get('id'),
-                'full_name': row.get('full_name'),
-                'films': row.get('films')
-            }
-            row_index = {
-                'index': {
-                    '_index': es_index_name,
-                    '_id': row.get('id')
-                }
+            yield get_bulk_action(es_index_name, row), {
+                'id': row['id'],
+                'full_name': row['full_name'],
+                'films': row['films']
             }
-            prepared_data.append(row_index)
-            prepared_data.append(prepared_row)
     except Exception as err:
         error(
             f'Ошибка во время преобразования данных.\n{err}\n\n')
         raise err
 
-    return prepared_data
-
-
-def transform_genre_to_es(es_index_name, pg_data: list) -> list[dict]:
-    """Преобразуем данные из постгрес person в формат для es"""
-    prepared_data = []
 
+def transform_genre_to_es(es_index_name,
+                          pg_data: list) -> Iterator[tuple[dict, dict]]:
+    """Преобразуем данные из постгрес genre в формат для es"""
     try:
         for row in pg_data:
-            prepared_row = {
-                'id': row.get('id'),
-                'name': row.get('name'),
+            yield get_bulk_action(es_index_name, row), {
+                'id': row['id'],
+                'name': row['name'],
                 'description': row.get('description')
             }
-            row_index = {
-                'index': {
-                    '_index': es_index_name,
-                    '_id': row.get('id')
-                }
-            }
-            prepared_data.append(row_index)
-            prepared_data.append(prepared_row)
     except Exception as err:
         error(
             f'Ошибка во время преобразования данных.\n{err}\n\n')
         raise err
-
-    return prepared_data
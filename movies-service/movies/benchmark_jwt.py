@@ -0,0 +1,75 @@
+"""Микро-бенчмарк авторизации в login_required: стоимость проверки jwt
+токена на один запрос без кэша проверенных токенов и с ним.
+
+Эндпоинт требует разрешение и получает id пользователя, как эндпоинты
+сервисов. Клиент повторно присылает один и тот же access-токен.
+
+Запуск: python benchmark_jwt.py [кол-во запросов]
+"""
+import asyncio
+import sys
+from time import perf_counter
+
+from async_fastapi_jwt_auth import AuthJWT as BaseAuthJWT
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from pydantic import BaseModel
+from src.jwt import AuthJWT, login_required
+from starlette.requests import Request
+
+
+def get_settings() -> BaseModel:
+    """Генерируем ключи RS256, как у сервиса авторизации"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    class Settings(BaseModel):
+        authjwt_algorithm: str = 'RS256'
+        authjwt_private_key: str = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ).decode()
+        authjwt_public_key: str = key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+
+    return Settings()
+
+
+@login_required(['subscriber'])
+async def endpoint(authorize: BaseAuthJWT):
+    return await authorize.get_jwt_subject()
+
+
+async def measure(auth_class: type[BaseAuthJWT], request: Request,
+                  count: int) -> float:
+    """Возвращаем среднее время обработки запроса в мкс"""
+    started = perf_counter()
+    for _ in range(count):
+        await endpoint(authorize=auth_class(req=request))
+    return (perf_counter() - started) / count * 1e6
+
+
+async def main(count: int) -> None:
+    settings = get_settings()
+    BaseAuthJWT.load_config(lambda: settings)
+
+    token = await BaseAuthJWT().create_access_token(
+        subject='user', user_claims={'permissions': ['subscriber']}
+    )
+    request = Request({
+        'type': 'http',
+        'headers': [(b'authorization', f'Bearer {token}'.encode())]
+    })
+
+    without_cache = await measure(BaseAuthJWT, request, count)
+    with_cache = await measure(AuthJWT, request, count)
+
+    print(f'Запросов: {count}')
+    print(f'Без кэша: {without_cache:8.2f} мкс/запрос')
+    print(f'С кэшем:  {with_cache:8.2f} мкс/запрос')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,137 @@
+"""Бенчмарк запросов фильтрации фильмов: прежние запросы (match в контексте
+подсчёта релевантности) против фильтров terms с shard request cache.
+
+На сгенерированном каталоге создаётся временный индекс, по каждому варианту
+запроса выполняется серия поисков и выводится медиана и 95-й перцентиль
+времени ответа. Перед каждой серией кэши индекса очищаются.
+
+Запуск (из каталога сервиса, с переменными окружения сервиса):
+python benchmark_query.py [кол-во фильмов] [кол-во запросов]
+"""
+import sys
+from random import choice, random, sample
+from statistics import median, quantiles
+from time import perf_counter
+from uuid import uuid4
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import bulk
+from src.core.config import settings
+from src.core.query import get_films_by_genre_query
+from src.core.query_builder import is_request_cacheable
+
+INDEX_NAME = 'benchmark_movies'
+ROLE_FIELDS = ('actors', 'writers', 'directors')
+
+PERSON_MAPPING = {
+    'type': 'nested',
+    'properties': {
+        'id': {'type': 'keyword'},
+        'full_name': {'type': 'text'}
+    }
+}
+
+MAPPING = {
+    'properties': {
+        'id': {'type': 'keyword'},
+        'imdb_rating': {'type': 'float'},
+        'title': {'type': 'text'},
+        'genres': {
+            'type': 'nested',
+            'properties': {
+                'id': {'type': 'keyword'},
+                'name': {'type': 'text'}
+            }
+        },
+        **{field: PERSON_MAPPING for field in ROLE_FIELDS}
+    }
+}
+
+
+def get_legacy_genre_query(genre_ids: list[str]) -> dict:
+    """Прежний запрос фильтрации по жанрам: match по каждому id."""
+    return {'query': {'nested': {
+        'path': 'genres',
+        'query': {'bool': {'should': [
+            {'match': {'genres.id': _id}} for _id in genre_ids
+        ]}}
+    }}}
+
+
+def generate_catalogue(count: int, genres: list[str],
+                       persons: list[str]) -> list[dict]:
+    """Генерируем документы фильмов"""
+    return [
+        {
+            '_index': INDEX_NAME,
+            '_id': str(uuid4()),
+            'imdb_rating': round(random() * 10, 1),
+            'title': f'Film {i}',
+            'genres': [{'id': _id, 'name': 'Genre'}
+                       for _id in sample(genres, 3)],
+            **{field: [{'id': _id, 'full_name': 'Person'}
+                       for _id in sample(persons, 5)]
+               for field in ROLE_FIELDS}
+        }
+        for i in range(count)
+    ]
+
+
+def measure(es: Elasticsearch, bodies: list[dict],
+            request_cache: bool) -> list[float]:
+    """Выполняем поиски и возвращаем время ответа каждого в мс"""
+    es.indices.clear_cache(index=INDEX_NAME, query=True, request=True)
+    timings = []
+    for body in bodies:
+        started = perf_counter()
+        es.search(index=INDEX_NAME, body=body, size=50,
+                  sort='imdb_rating:desc',
+                  request_cache=request_cache or None)
+        timings.append((perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    p95 = quantiles(timings, n=20)[-1]
+    print(f'{name:<40} медиана {median(timings):7.2f} мс, '
+          f'p95 {p95:7.2f} мс')
+
+
+def main(count: int, requests: int) -> None:
+    es = Elasticsearch(f'http://{settings.elastic.host}:'
+                       f'{settings.elastic.port}')
+    genres = [str(uuid4()) for _ in range(30)]
+    persons = [str(uuid4()) for _ in range(count // 2 or 1)]
+
+    es.indices.delete(index=INDEX_NAME, ignore=[404])
+    es.indices.create(index=INDEX_NAME, body={'mappings': MAPPING})
+    try:
+        bulk(es, generate_catalogue(count, genres, persons), refresh=True)
+
+        # Повторяющиеся запросы, как на популярных страницах каталога
+        # Фильмы персоны берутся из документа персоны и не ищутся запросом
+        genre_ids = [sample(genres, 2) for _ in range(10)]
+        cases = {
+            'жанры': (
+                [get_legacy_genre_query(choice(genre_ids))
+                 for _ in range(requests)],
+                [get_films_by_genre_query(choice(genre_ids))
+                 for _ in range(requests)]
+            ),
+        }
+
+        print(f'Фильмов: {count}, запросов в серии: {requests}')
+        for name, (legacy, current) in cases.items():
+            report(f'{name}: match (прежний)', measure(es, legacy, False))
+            report(f'{name}: terms filter', measure(es, current, False))
+            report(f'{name}: terms filter + request_cache',
+                   measure(es, current, is_request_cacheable(current[0])))
+    finally:
+        es.indices.delete(index=INDEX_NAME, ignore=[404])
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    )
@@ -2,10 +2,11 @@
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Body, Depends, Path, Query, Response
 from src.api.v1 import openapi
-from src.core.utils import raise_404_if_none
+from src.core.utils import raise_404_if_none, set_next_cursor
 from src.jwt import AuthJWT, login_required
+from src.models import BatchItem, BatchRequest
 from src.models.film import Film, FilmShortView
 from src.services.collection import (CollectionService,
                                      get_film_collection_service)
@@ -22,22 +23,27 @@ router = APIRouter(prefix='/films')
             **openapi.films.films.dict())
 @login_required()
 async def films(
+        response: Response,
         genre_id: Optional[UUID] = Query(None, description='ID жанра'),
         view_service: ResponseView = Depends(get_view_service),
         collection_service: CollectionService = Depends(get_film_collection_service),
         authorize: AuthJWT = Depends()
 ):
     """Возвращает фильмы с заданным параметром фильтрации и сортировки
+    :param response: ответ, в заголовок которого передаётся курсор
     :param genre_id: id жанра, по которому фильтруется выдача
     :param view_service: сервис, отвечающий за представление коллекции (сортировка, пагинация)
     :param collection_service: сервис, отвечающий за получение коллекции элементов
     :param authorize: сервис, отвечающий за валидацию JWT токена
     """
-    return await collection_service.get_collection(
-        filter={'field': 'genre_id', 'value': genre_id},
+    items, cursor = await collection_service.get_page(
+        filter_query={'field': 'genre_id', 'value': genre_id},
         search=None,
         view=view_service
     )
+    set_next_cursor(response, cursor)
+
+    return items
 
 
 @router.get('/search',
@@ -47,22 +53,47 @@ async def films(
             **openapi.films.search_films.dict())
 @login_required()
 async def search_films(
+        response: Response,
         search_query: str = Query(..., description='Частичное или полное название фильма'),
         view_service: ResponseView = Depends(get_view_service),
         collection_service: CollectionService = Depends(get_film_collection_service),
         authorize: AuthJWT = Depends()
 ):
     """Возвращает фильмы, отфильтрованные поиском по полю title
+    :param response: ответ, в заголовок которого передаётся курсор
     :param search_query: частичное или полное название фильма
     :param view_service: сервис, отвечающий за представление коллекции (сортировка, пагинация)
     :param collection_service: сервис, отвечающий за получение коллекции элементов
     :param authorize: сервис, отвечающий за валидацию JWT токена
     """
-    return await collection_service.get_collection(
-        filter=None,
+    items, cursor = await collection_service.get_page(
+        filter_query=None,
         search={'field': 'title', 'query': search_query},
         view=view_service
     )
+    set_next_cursor(response, cursor)
+
+    return items
+
+
+@router.post('/_batch',
+             response_model=list[BatchItem[Film]],
+             response_model_exclude_none=True,
+             response_model_by_alias=False,
+             **openapi.films.films_batch.dict())
+@login_required()
+async def films_batch(
+        batch: BatchRequest = Body(..., description='Список ID фильмов'),
+        detail_service: DetailService = Depends(get_film_detail_service),
+        authorize: AuthJWT = Depends(), # noqa
+):
+    """Возвращает фильмы по списку id в порядке запроса
+    :param batch: список id искомых фильмов
+    :param detail_service: сервис, отвечающий за получение фильмов
+    :param authorize: сервис, отвечающий за валидацию JWT токена
+    """
+    films = await detail_service.get_many(batch.ids)
+    return BatchItem[Film].from_items(batch.ids, films)
 
 
 @router.get('/{film_id}',
@@ -109,9 +140,11 @@ async def similar_films(
     """
     film = await detail_service.get_by_id(film_id)
     raise_404_if_none(film)
+    if not film.genres:
+        return []
 
     return await collection_service.get_collection(
-        filter={'field': 'genre_id', 'value': [genre.uuid for genre in film.genres]},
+        filter_query={'field': 'genre_id', 'value': [genre.id for genre in film.genres]},
         search=None,
         view=view_service
     )
@@ -1,10 +1,11 @@
 # flake8: noqa:E501
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Path
+from fastapi import APIRouter, Body, Depends, Path, Response
 from src.api.v1 import openapi
-from src.core.utils import raise_404_if_none
+from src.core.utils import raise_404_if_none, set_next_cursor
 from src.jwt import AuthJWT, login_required
+from src.models import BatchItem, BatchRequest
 from src.models.genre import Genre
 from src.services.collection import (CollectionService,
                                      get_genre_collection_service)
@@ -21,19 +22,43 @@ router = APIRouter(prefix='/genres')
             **openapi.genres.genres.dict())
 @login_required()
 async def genres(
+        response: Response,
         view_service: ResponseView = Depends(get_view_service),
         collection_service: CollectionService = Depends(get_genre_collection_service),
         authorize: AuthJWT = Depends(), # noqa
 ):
     """Возвращает все жанры.
+    :param response: ответ, в заголовок которого передаётся курсор
     :param view_service: сервис, отвечающий за представление коллекции (сортировка, пагинация)
     :param collection_service: сервис, отвечающий за получение коллекции элементов
     """
-    return await collection_service.get_collection(
-        filter=None,
+    items, cursor = await collection_service.get_page(
+        filter_query=None,
         search=None,
         view=view_service
     )
+    set_next_cursor(response, cursor)
+
+    return items
+
+
+@router.post('/_batch',
+             response_model=list[BatchItem[Genre]],
+             response_model_exclude_none=True,
+             response_model_by_alias=False,
+             **openapi.genres.genres_batch.dict())
+@login_required()
+async def genres_batch(
+        batch: BatchRequest = Body(..., description='Список ID жанров'),
+        detail_service: DetailService = Depends(get_genre_detail_service),
+        authorize: AuthJWT = Depends(), # noqa
+):
+    """Возвращает жанры по списку id в порядке запроса
+    :param batch: список id искомых жанров
+    :param detail_service: сервис, отвечающий за получение элементов
+    """
+    genres = await detail_service.get_many(batch.ids)
+    return BatchItem[Genre].from_items(batch.ids, genres)
 
 
 @router.get('/{genre_id}',
@@ -1,13 +1,13 @@
 # flake8: noqa:E501
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Body, Depends, Path, Query, Response
 from src.api.v1 import openapi
-from src.core.utils import raise_404_if_none
+from src.core.query import get_sort_query
+from src.core.utils import raise_404_if_none, set_next_cursor
 from src.jwt import AuthJWT, login_required
-from src.models import FilmShortView, Person
+from src.models import BatchItem, BatchRequest, Film, Person, PersonFilmView
 from src.services.collection import (CollectionService,
-                                     get_film_collection_service,
                                      get_person_collection_service)
 from src.services.detail import DetailService, get_person_detail_service
 from src.services.view import ResponseView, get_view_service
@@ -22,21 +22,45 @@ router = APIRouter(prefix='/persons')
             **openapi.persons.search_persons.dict())
 @login_required()
 async def search_persons(
+        response: Response,
         search_query: str = Query(..., description='Частичное или полное имя человека'),
         view_service: ResponseView = Depends(get_view_service),
         collection_service: CollectionService = Depends(get_person_collection_service),
         authorize: AuthJWT = Depends(), # noqa
 ):
     """Возвращает людей, отфильтрованных поиском по полю full_name
+    :param response: ответ, в заголовок которого передаётся курсор
     :param search_query: частичное или полное имя человека
     :param view_service: сервис, отвечающий за представление коллекции (сортировка, пагинация)
     :param collection_service: сервис, отвечающий за получение коллекции элементов
     """
-    return await collection_service.get_collection(
-        filter=None,
+    items, cursor = await collection_service.get_page(
+        filter_query=None,
         search={'field': 'full_name', 'query': search_query},
         view=view_service
     )
+    set_next_cursor(response, cursor)
+
+    return items
+
+
+@router.post('/_batch',
+             response_model=list[BatchItem[Person]],
+             response_model_exclude_none=True,
+             response_model_by_alias=False,
+             **openapi.persons.persons_batch.dict())
+@login_required()
+async def persons_batch(
+        batch: BatchRequest = Body(..., description='Список ID людей'),
+        detail_service: DetailService = Depends(get_person_detail_service),
+        authorize: AuthJWT = Depends(), # noqa
+):
+    """Возвращает людей по списку id в порядке запроса
+    :param batch: список id искомых людей
+    :param detail_service: сервис, отвечающий за получение элементов
+    """
+    persons = await detail_service.get_many(batch.ids)
+    return BatchItem[Person].from_items(batch.ids, persons)
 
 
 @router.get('/{person_id}',
@@ -61,7 +85,7 @@ async def person_details(
 
 
 @router.get('/{person_id}/film',
-            response_model=list[FilmShortView],
+            response_model=list[PersonFilmView],
             response_model_exclude_none=True,
             response_model_by_alias=False,
             **openapi.persons.person_films.dict())
@@ -70,21 +94,29 @@ async def person_films(
         person_id: UUID = Path(..., description='ID человека'),
         view_service: ResponseView = Depends(get_view_service),
         detail_service: DetailService = Depends(get_person_detail_service),
-        collection_service: CollectionService = Depends(get_film_collection_service),
         authorize: AuthJWT = Depends(), # noqa
 ):
     """Возвращает фильмы, в работе над которым принимал участие заданный
-    человек.
+    человек. Фильмография хранится в документе человека (упорядочена по
+    убыванию рейтинга, фильмы без рейтинга - в конце), поэтому отдельный
+    поиск по фильмам не выполняется. Сортировка возможна только по
+    imdb_rating (get_sort_query отклоняет остальные поля с 422), фильмы без
+    рейтинга остаются в конце при любом направлении.
     :param person_id: id персоны для поиска фильмов
     :param view_service: сервис, отвечающий за представление коллекции (сортировка, пагинация)
     :param detail_service: сервис, отвечающий за получение одного элемента
-    :param collection_service: сервис, отвечающий за получение коллекции элементов
     """
     person = await detail_service.get_by_id(person_id)
     raise_404_if_none(person)
 
-    return await collection_service.get_collection(
-        filter={'field': 'person_id', 'value': person_id},
-        search=None,
-        view=view_service
-    )
+    films = person.films or []
+    if get_sort_query(Film, view_service.sort) == 'imdb_rating:asc':
+        rated = [film for film in films if film.imdb_rating is not None]
+        films = rated[::-1] + films[len(rated):]
+    films = films[view_service.offset:view_service.offset + view_service.size]
+
+    return [
+        PersonFilmView(id=film.film, title=film.title,
+                       imdb_rating=film.imdb_rating)
+        for film in films
+    ]
@@ -28,3 +28,11 @@ similar_films = BaseOpenapi(
                  'также пагинация результата запроса.'),
     response_description='Список с краткой информацией о фильмах'
 )
+
+films_batch = BaseOpenapi(
+    summary='Список фильмов по ID',
+    description=('Отображает подробную информацию о фильмах по списку ID. '
+                 'Фильмы возвращаются в порядке запроса, ненайденные '
+                 'отмечаются признаком found=false.'),
+    response_description='Список с подробной информацией о фильмах'
+)
@@ -12,3 +12,11 @@ genre_details = BaseOpenapi(
     description='Отображает подробную информацию о жанре по заданному ID.',
     response_description='Подробная информация о жанре'
 )
+
+genres_batch = BaseOpenapi(
+    summary='Список жанров по ID',
+    description=('Отображает подробную информацию о жанрах по списку ID. '
+                 'Жанры возвращаются в порядке запроса, ненайденные '
+                 'отмечаются признаком found=false.'),
+    response_description='Список с подробной информацией о жанрах'
+)
@@ -16,7 +16,18 @@ person_details = BaseOpenapi(
 person_films = BaseOpenapi(
     summary='Список фильмов с участием конкретного человека',
     description=('Отображает фильмы, в работе над которым принимал участие '
-                 'заданный человек. Возможна сортировка по некоторым полям, а '
-                 'также пагинация результата запроса.'),
+                 'заданный человек. По умолчанию фильмы упорядочены по '
+                 'убыванию рейтинга, фильмы без рейтинга - в конце. Возможна '
+                 'сортировка только по imdb_rating (для других полей - 422), '
+                 'а также пагинация по номеру страницы; курсор не '
+                 'поддерживается.'),
     response_description='Список с краткой информацией о фильмах'
 )
+
+persons_batch = BaseOpenapi(
+    summary='Список людей по ID',
+    description=('Отображает подробную информацию о людях по списку ID. '
+                 'Люди возвращаются в порядке запроса, ненайденные '
+                 'отмечаются признаком found=false.'),
+    response_description='Список с подробной информацией о людях'
+)
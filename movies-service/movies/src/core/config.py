@@ -10,9 +10,22 @@ class ProjectSettings(BaseSettings):
     name: str = Field(env='PROJECT_NAME')
     default_page_size: int = Field(env='DEFAULT_PAGE_SIZE')
     max_page_size: int = Field(env='MAX_PAGE_SIZE')
+    max_batch_size: int = Field(100, env='MAX_BATCH_SIZE')
     cache_expire_time_s: int = Field(env='CACHE_EXPIRE_TIME')
 
 
+class CacheSettings(BaseSettings):
+    stale_time_s: int = Field(60, env='CACHE_STALE_TIME')
+    local_max_size: int = Field(1024, env='LOCAL_CACHE_MAX_SIZE')
+    local_expire_time_s: int = Field(10, env='LOCAL_CACHE_EXPIRE_TIME')
+    catalogue_version_key: str = Field('catalogue_version',
+                                       env='CATALOGUE_VERSION_KEY')
+    catalogue_version_ttl_s: float = Field(1, env='CATALOGUE_VERSION_TTL')
+    http_max_age_s: int = Field(60, env='HTTP_CACHE_MAX_AGE')
+    http_detail_max_age_s: int = Field(300, env='HTTP_CACHE_DETAIL_MAX_AGE')
+    http_public: bool = Field(False, env='HTTP_CACHE_PUBLIC')
+
+
 class JWTSettings(BaseSettings):
     authjwt_algorithm: str = Field(env='JWT_ALGORITHM')
     authjwt_public_key: str = Field(env='JWT_PUBLIC_KEY')
@@ -24,6 +37,7 @@ class ElasticSettings(BaseSettings):
     movies_index: str = Field(env='ELASTIC_MOVIES_INDEX')
     genres_index: str = Field(env='ELASTIC_GENRES_INDEX')
     persons_index: str = Field(env='ELASTIC_PERSONS_INDEX')
+    pit_keep_alive: str = Field('1m', env='ELASTIC_PIT_KEEP_ALIVE')
 
 
 class RedisSettings(BaseSettings):
@@ -33,6 +47,7 @@ class RedisSettings(BaseSettings):
 
 class Settings(BaseSettings):
     project: ProjectSettings = ProjectSettings()
+    cache: CacheSettings = CacheSettings()
     jwt: JWTSettings = JWTSettings()
     elastic: ElasticSettings = ElasticSettings()
     redis: RedisSettings = RedisSettings()
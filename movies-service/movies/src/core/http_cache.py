@@ -0,0 +1,123 @@
+import re
+from hashlib import sha1
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import Request, Response
+from src.core.config import settings
+from src.db.catalogue import get_catalogue_version
+from src.jwt import AuthJWT, AuthJWTException
+from starlette.middleware.base import (BaseHTTPMiddleware,
+                                       RequestResponseEndpoint)
+
+UUID_PATTERN = '[0-9a-fA-F-]{36}'
+
+# Время хранения ответов по маршрутам: первый подходящий шаблон определяет
+# max-age. Подробная информация меняется реже списков и поиска.
+CACHE_MAX_AGE = (
+    (re.compile(f'^/api/v1/(films|genres|persons)/{UUID_PATTERN}/?$'),
+     settings.cache.http_detail_max_age_s),
+    (re.compile('^/api/v1/(films|genres|persons)(/.*)?$'),
+     settings.cache.http_max_age_s),
+)
+
+
+def get_max_age(request: Request) -> Optional[int]:
+    """Возвращает max-age для запроса или None, если ответ не кэшируется.
+    Кэшируются только GET/HEAD запросы к каталогу без курсора: курсор
+    привязан к point-in-time elasticsearch и живёт недолго."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if 'cursor' in request.query_params:
+        return None
+    for pattern, max_age in CACHE_MAX_AGE:
+        if pattern.match(request.url.path):
+            return max_age
+    return None
+
+
+def get_cache_control(max_age: int) -> str:
+    visibility = 'public' if settings.cache.http_public else 'private'
+    return f'{visibility}, max-age={max_age}'
+
+
+def get_version_etag(version: str, request: Request) -> str:
+    """Сильный ETag по версии каталога и адресу ресурса: содержимое ответа
+    однозначно определяется ими."""
+    resource = f'{version}:{request.url.path}?{request.url.query}'
+    return f'"{sha1(resource.encode()).hexdigest()}"'
+
+
+def get_content_etag(body: bytes) -> str:
+    """Сильный ETag по содержимому ответа."""
+    return f'"{sha1(body).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверяет, есть ли ETag среди переданных в If-None-Match."""
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+async def is_authorized(request: Request) -> bool:
+    """Проверяет jwt токен запроса так же, как эндпоинты каталога."""
+    try:
+        await AuthJWT(req=request).jwt_required()
+    except AuthJWTException:
+        return False
+    return True
+
+
+def not_modified(etag: str, max_age: int) -> Response:
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={
+        'ETag': etag,
+        'Cache-Control': get_cache_control(max_age)
+    })
+
+
+class HTTPCacheMiddleware(BaseHTTPMiddleware):
+    """Поддержка условных запросов для каталога.
+
+    Если ETL опубликовал версию каталога, ETag вычисляется по ней до обработки
+    запроса, и при совпадении с If-None-Match клиент получает 304 без
+    обращения к кэшу и elasticsearch (после проверки токена). Иначе ETag
+    вычисляется по содержимому ответа. Для каждого маршрута выставляется
+    Cache-Control."""
+
+    async def dispatch(
+            self,
+            request: Request,
+            call_next: RequestResponseEndpoint
+    ) -> Response:
+        max_age = get_max_age(request)
+        if max_age is None:
+            return await call_next(request)
+
+        version = await get_catalogue_version().get()
+        etag = get_version_etag(version, request) if version else None
+        if (etag and etag_matches(request, etag)
+                and await is_authorized(request)):
+            return not_modified(etag, max_age)
+
+        response = await call_next(request)
+        if response.status_code != HTTPStatus.OK:
+            return response
+
+        if etag is None:
+            body = b''.join([chunk async for chunk in response.body_iterator])
+            etag = get_content_etag(body)
+            if etag_matches(request, etag):
+                return not_modified(etag, max_age)
+            response = Response(
+                content=body,
+                status_code=response.status_code,
+                headers=dict(response.headers),
+                media_type=response.media_type
+            )
+
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = get_cache_control(max_age)
+        return response
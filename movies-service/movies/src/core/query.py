@@ -1,6 +1,9 @@
-from typing import Optional, Type
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any, Optional, Type
 from uuid import UUID
 
+from orjson import dumps, loads
+from src.core.query_builder import filter_query, nested, terms
 from src.core.utils import raise_402
 from src.models import Film, Genre, Person
 
@@ -30,6 +33,42 @@ def get_sort_query(model: Type[Film | Genre | Person],
     return f'{field}:{direction}'
 
 
+def get_cursor_sort_query(model: Type[Film | Genre | Person],
+                          sort: Optional[str] = None) -> list:
+    """Формирует параметры сортировки для постраничного обхода курсором.
+    Последним ключом всегда идёт _shard_doc, что делает порядок документов
+    однозначным при равенстве значений сортируемого поля.
+    :param model: модель, в которую конвертируется результат поиска
+    :param sort: запрос на сортировку, полученный от пользователя
+    """
+    sort_query = get_sort_query(model, sort)
+    if sort_query is None:
+        return [{'_score': 'desc'}, {'_shard_doc': 'asc'}]
+
+    field, direction = sort_query.split(':')
+    return [{field: direction}, {'_shard_doc': 'asc'}]
+
+
+def encode_cursor(pit_id: str, search_after: list[Any]) -> str:
+    """Упаковывает состояние обхода коллекции в непрозрачный курсор.
+    :param pit_id: id point-in-time в elasticsearch
+    :param search_after: значения сортировки последнего документа страницы
+    """
+    state = dumps({'pit': pit_id, 'search_after': search_after})
+    return urlsafe_b64encode(state).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, list[Any]]:
+    """Распаковывает курсор, полученный от пользователя.
+    :param cursor: курсор следующей страницы
+    """
+    try:
+        state = loads(urlsafe_b64decode(cursor.encode()))
+        return state['pit'], state['search_after']
+    except (ValueError, KeyError, TypeError):
+        raise_402('Некорректный курсор')
+
+
 def get_items_query(field: str, query: str) -> dict:
     """Формирует поисковый запрос на фильтрацию документов elasticsearch.
     :param field: поле, по которому ведётся поиск
@@ -46,54 +85,11 @@ def get_items_query(field: str, query: str) -> dict:
 
 def get_films_by_genre_query(
         genre_id: Optional[UUID | list[UUID]] = None) -> Optional[dict]:
-    """Формирует поисковый запрос на фильтрацию фильмов заданного жанра."""
+    """Формирует запрос на фильтрацию фильмов заданного жанра (или любого из
+    заданных жанров)."""
     if genre_id is None:
         return None
 
     genre_id = genre_id if isinstance(genre_id, list) else [genre_id]
 
-    match_query = [{'match': {'genres.id': _id}} for _id in genre_id]
-
-    return {
-        'query': {
-            'nested': {
-                'path': 'genres',
-                'query': {
-                    'bool': {
-                        'should': [
-                            *match_query
-                        ]
-                    }
-                }
-            }
-        },
-    }
-
-
-def get_films_by_person_query(person_id: UUID) -> Optional[dict]:
-    """Формирует поисковый запрос на фильтрацию фильмов по имени лица,
-    участвующего в производстве."""
-    fields = ['actors', 'writers', 'directors']
-
-    match_query = [
-        {
-            'nested': {
-                'path': field,
-                'query': {
-                    'match': {
-                        f'{field}.id': person_id
-                    }
-                }
-            }
-        } for field in fields
-    ]
-
-    return {
-        'query': {
-            'bool': {
-                'should': [
-                    *match_query
-                ]
-            }
-        }
-    }
+    return filter_query(nested('genres', terms('genres.id', genre_id)))
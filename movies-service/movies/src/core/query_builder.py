@@ -0,0 +1,42 @@
+"""Построитель запросов elasticsearch.
+
+Точные фильтры по id выполняются в контексте фильтра (terms по keyword-полям):
+такие условия не участвуют в подсчёте релевантности и кэшируются
+elasticsearch в node query cache, а ответы на запросы, состоящие только из
+фильтров, могут кэшироваться в shard request cache.
+"""
+from typing import Any, Iterable
+
+
+def terms(field: str, values: Iterable[Any]) -> dict:
+    """Условие совпадения keyword-поля с одним из значений.
+    :param field: keyword-поле
+    :param values: искомые значения
+    """
+    return {'terms': {field: [str(value) for value in values]}}
+
+
+def nested(path: str, query: dict) -> dict:
+    """Условие на вложенные документы.
+    :param path: путь вложенного поля
+    :param query: условие на вложенный документ
+    """
+    return {'nested': {'path': path, 'query': query}}
+
+
+def filter_query(*clauses: dict) -> dict:
+    """Тело поискового запроса, состоящее только из фильтров."""
+    return {'query': {'bool': {'filter': list(clauses)}}}
+
+
+def is_request_cacheable(body: dict | None) -> bool:
+    """Можно ли кэшировать ответ на запрос в shard request cache. Кэшируются
+    только детерминированные запросы из одних фильтров: результаты
+    полнотекстового поиска слишком разнообразны и вытесняли бы полезные
+    записи кэша.
+    :param body: тело поискового запроса
+    """
+    if not body or 'query' not in body:
+        return False
+    return set(body['query']) == {'bool'} and set(
+        body['query']['bool']) == {'filter'}
@@ -1,9 +1,10 @@
 from http import HTTPStatus
 from typing import Any
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
 
 NOT_FOUND_MSG = 'Not found'
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
 
 
 def raise_404_if_none(item: Any) -> None:
@@ -15,3 +16,9 @@ def raise_404_if_none(item: Any) -> None:
 def raise_402(detail: str) -> None:
     raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
                         detail=detail)
+
+
+def set_next_cursor(response: Response, cursor: str | None) -> None:
+    """Передаёт клиенту курсор следующей страницы в заголовке ответа."""
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
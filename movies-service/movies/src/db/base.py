@@ -13,30 +13,45 @@ class AbstractDataSource(ABC):
     async def get_by_id(self, item_id: UUID) -> Optional[dict]:
         pass
 
+    @abstractmethod
+    async def get_many(self, item_ids: list[UUID]) -> list[Optional[dict]]:
+        pass
+
     @abstractmethod
     async def get_collection(
             self,
-            filter: Optional[dict],
+            filter_query: Optional[dict],
             search: Optional[dict],
-            view: ResponseView
+            view: ResponseView,
+            fields: Optional[list[str]] = None
     ) -> list[dict]:
         pass
 
+    @abstractmethod
+    async def get_page(
+            self,
+            filter_query: Optional[dict],
+            search: Optional[dict],
+            view: ResponseView,
+            fields: Optional[list[str]] = None
+    ) -> tuple[list[dict], Optional[str]]:
+        pass
+
 
 class AbstractCacheStorage(ABC):
     def __init__(self):
         self.storage = 'storage'
 
     @abstractmethod
-    async def get_cache_key(self, *args, **kwargs) -> str:
+    async def set_state(self, state_name: str, state: Any, cache_expire_time: int) -> None:  # noqa:E501
         pass
 
     @abstractmethod
-    async def set_state(self, state_name: str, state: str, cache_expire_time: int) -> None:  # noqa:E501
+    async def get_state(self, state_name: str) -> Any | None:
         pass
 
     @abstractmethod
-    async def get_state(self, state_name: str) -> str | None:
+    async def get_states(self, state_names: list[str]) -> list[Any | None]:
         pass
 
 
@@ -47,6 +62,11 @@ class AbstractFromCache(ABC):
     def set_storage_instance(cls, storage_instance) -> None:
         pass
 
+    @classmethod
+    @abstractmethod
+    def set_local_storage_instance(cls, storage_instance) -> None:
+        pass
+
     @classmethod
     @abstractmethod
     def _from_cache(cls):
@@ -0,0 +1,48 @@
+import logging
+from time import monotonic
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from src.core.config import settings
+
+catalogue_version: Optional['CatalogueVersion'] = None
+
+
+class CatalogueVersion:
+    """Версия каталога, которую ETL публикует в redis после каждой загрузки
+    данных. Версия входит в ключи кэша и в ETag ответов, поэтому её смена
+    инвалидирует и кэш сервиса, и кэши клиентов. Значение запоминается в
+    памяти процесса на короткое время, чтобы не обращаться к redis на каждый
+    запрос."""
+
+    def __init__(
+            self,
+            storage: Redis,
+            key: str = settings.cache.catalogue_version_key,
+            ttl: float = settings.cache.catalogue_version_ttl_s
+    ):
+        self.storage = storage
+        self.key = key
+        self.ttl = ttl
+        self._version: Optional[str] = None
+        self._expire_at = 0.0
+
+    async def get(self) -> Optional[str]:
+        """Возвращает текущую версию каталога или None, если ETL её ещё не
+        опубликовал. Если redis недоступен, возвращается последняя известная
+        версия (None до первого успешного чтения - тогда ETag вычисляется по
+        телу ответа), повторное чтение выполняется через ttl."""
+        if self._expire_at <= monotonic():
+            try:
+                version = await self.storage.get(self.key)
+            except RedisError as err:
+                logging.warning('Версия каталога не прочитана: %s', err)
+            else:
+                self._version = version.decode() if version else None
+            self._expire_at = monotonic() + self.ttl
+        return self._version
+
+
+def get_catalogue_version() -> CatalogueVersion:
+    return catalogue_version
@@ -3,15 +3,19 @@ from uuid import UUID
 
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from src.core.config import settings
-from src.core.query import (get_films_by_genre_query,
-                            get_films_by_person_query, get_items_query,
-                            get_sort_query)
+from src.core.query import (decode_cursor, encode_cursor,
+                            get_cursor_sort_query, get_films_by_genre_query,
+                            get_items_query, get_sort_query)
+from src.core.query_builder import is_request_cacheable
+from src.core.utils import raise_402
 from src.db.base import AbstractDataSource
 from src.models import Film, Genre, Person
 from src.services.view import ResponseView
 
 es: Optional[AsyncElasticsearch] = None
 
+# Названия индексов являются алиасами: ETL пересобирает индексы в новые версии
+# и атомарно переключает на них алиасы.
 INDEX_NAME = {
     Film: settings.elastic.movies_index,
     Genre: settings.elastic.genres_index,
@@ -19,7 +23,6 @@ INDEX_NAME = {
 }
 
 QUERY_CREATOR = {
-    'person_id': get_films_by_person_query,
     'genre_id': get_films_by_genre_query
 }
 
@@ -36,30 +39,114 @@ class ElasticDataSource(AbstractDataSource):
             return None
         return doc['_source']
 
+    async def get_many(self, item_ids: list[UUID]) -> list[Optional[dict]]:
+        """Возвращает документы по списку id одним запросом mget. Порядок
+        документов совпадает с порядком id, для ненайденных id возвращается
+        None."""
+        result = await self.source.mget(
+            index=INDEX_NAME[self.model],
+            body={'ids': [str(item_id) for item_id in item_ids]}
+        )
+        return [doc['_source'] if doc.get('found') else None
+                for doc in result['docs']]
+
+    @staticmethod
+    def _get_query(
+            filter_query: Optional[dict],
+            search: Optional[dict]
+    ) -> Optional[dict]:
+        """Формирует тело поискового запроса по фильтру или поиску."""
+        if filter_query:
+            return QUERY_CREATOR[filter_query['field']](
+                filter_query['value']
+            )
+        if search:
+            return get_items_query(search['field'], search['query'])
+        return None
+
     async def get_collection(
             self,
-            filter: Optional[dict],
+            filter_query: Optional[dict],
             search: Optional[dict],
-            view: ResponseView
+            view: ResponseView,
+            fields: Optional[list[str]] = None
     ) -> list[dict]:
-        if not filter and not search:
-            body = {}
-        else:
-            if filter:
-                body = QUERY_CREATOR[filter['field']](filter['value'])
-            else:
-                body = get_items_query(search['field'], search['query'])
-
+        """Возвращает страницу коллекции. Если переданы поля, elasticsearch
+        возвращает только их (_source_includes). Запросы из одних фильтров
+        помечаются для кэширования в shard request cache."""
+        body = self._get_query(filter_query, search) or {}
         result = await self.source.search(
             index=INDEX_NAME[self.model],
             body=body,
             sort=get_sort_query(self.model, view.sort),
             size=view.size,
-            from_=view.offset
+            from_=view.offset,
+            _source_includes=fields,
+            request_cache=is_request_cacheable(body) or None
         )
         docs = result['hits']['hits']
         return [doc['_source'] for doc in docs] if docs else []
 
+    async def get_page(
+            self,
+            filter_query: Optional[dict],
+            search: Optional[dict],
+            view: ResponseView,
+            fields: Optional[list[str]] = None
+    ) -> tuple[list[dict], Optional[str]]:
+        """Возвращает страницу коллекции и курсор следующей страницы. Обход
+        выполняется через search_after в рамках point-in-time, поэтому время
+        ответа не зависит от глубины страницы и не ограничено
+        max_result_window."""
+        if view.cursor:
+            pit_id, search_after = decode_cursor(view.cursor)
+        else:
+            pit_id, search_after = await self._open_pit(), None
+
+        body = self._get_query(filter_query, search) or {}
+        body.update(
+            pit={'id': pit_id, 'keep_alive': settings.elastic.pit_keep_alive},
+            sort=get_cursor_sort_query(self.model, view.sort),
+            size=view.size,
+            track_total_hits=False
+        )
+        if search_after:
+            body['search_after'] = search_after
+        if fields:
+            body['_source'] = {'includes': fields}
+
+        try:
+            result = await self.source.search(body=body)
+        except NotFoundError:
+            raise_402('Курсор устарел, начните обход коллекции заново')
+
+        pit_id = result.get('pit_id', pit_id)
+        docs = result['hits']['hits']
+        if len(docs) < view.size:
+            await self._close_pit(pit_id)
+            return [doc['_source'] for doc in docs], None
+
+        return ([doc['_source'] for doc in docs],
+                encode_cursor(pit_id, docs[-1]['sort']))
+
+    async def _open_pit(self) -> str:
+        """Открывает point-in-time для индекса модели."""
+        result = await self.source.transport.perform_request(
+            'POST',
+            f'/{INDEX_NAME[self.model]}/_pit',
+            params={'keep_alive': settings.elastic.pit_keep_alive}
+        )
+        return result['id']
+
+    async def _close_pit(self, pit_id: str) -> None:
+        """Закрывает point-in-time после получения последней страницы."""
+        try:
+            await self.source.transport.perform_request(
+                'DELETE', '/_pit', body={'id': pit_id}
+            )
+        except NotFoundError:
+            pass
+
 
 def get_data_source(
         model: Type[Film | Genre | Person]
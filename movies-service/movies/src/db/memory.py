@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any
+
+from src.core.config import settings
+from src.db.base import AbstractCacheStorage
+
+
+class LocalCacheStorage(AbstractCacheStorage):
+    """Ограниченный по размеру LRU-кэш в памяти процесса. Используется как
+    первый уровень кэша перед redis."""
+
+    def __init__(
+            self,
+            max_size: int = settings.cache.local_max_size
+    ):
+        self.storage: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.max_size = max_size
+
+    async def set_state(
+            self,
+            state_name: str,
+            state: Any,
+            cache_expire_time: int = settings.cache.local_expire_time_s
+    ) -> None:
+        """Записываем значение в кэш, вытесняя самые старые записи при
+        превышении размера кэша.
+        :param state_name: ключ кэша
+        :param state: значение
+        :param cache_expire_time: "срок годности" кэша
+        """
+        self.storage[state_name] = (monotonic() + cache_expire_time, state)
+        self.storage.move_to_end(state_name)
+        while len(self.storage) > self.max_size:
+            self.storage.popitem(last=False)
+
+    async def get_state(self, state_name: str) -> Any | None:
+        """Получаем значение из кэша.
+        :param state_name: ключ кэша
+        """
+        item = self.storage.get(state_name)
+        if item is None:
+            return None
+
+        expire_at, state = item
+        if expire_at <= monotonic():
+            del self.storage[state_name]
+            return None
+
+        self.storage.move_to_end(state_name)
+        return state
+
+    async def get_states(self, state_names: list[str]) -> list[Any | None]:
+        """Получаем значения из кэша по списку ключей.
+        :param state_names: ключи кэша
+        """
+        return [await self.get_state(name) for name in state_names]
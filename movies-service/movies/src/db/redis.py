@@ -1,34 +1,69 @@
 # flake8: noqa
+import asyncio
+import inspect
+import logging
 from functools import wraps
-from typing import Optional
+from hashlib import sha1
+from time import time
+from typing import Any, Awaitable, Callable, Optional
 
-from orjson import dumps, loads
+from orjson import OPT_SORT_KEYS, dumps, loads
+from pydantic import BaseModel
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from src.core.config import settings
 from src.db.base import AbstractCacheStorage, AbstractFromCache
+from src.db.catalogue import get_catalogue_version
+from src.db.memory import LocalCacheStorage
 from src.models import models_by_str
 
 redis: Optional[Redis] = None
 
+CACHE_KEY_PREFIX = 'movies'
+
 
 def get_redis() -> Redis:
     return redis
 
 
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    raise TypeError
+
+
+def get_cache_key(func: Callable, *args, **kwargs) -> str:
+    """Получаем стабильный ключ для кэша. Ключ строится из имени сервиса,
+    метода, модели представления и значений аргументов метода (id, фильтр,
+    поисковый запрос, параметры представления), но не из repr объекта
+    сервиса.
+    :param func: кэшируемый метод сервиса
+    """
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    service = bound.arguments.pop('self')
+    model = getattr(service, 'view_model', service.model)
+    params = dumps(bound.arguments, default=_default, option=OPT_SORT_KEYS)
+    return ':'.join((
+        CACHE_KEY_PREFIX,
+        func.__qualname__,
+        model.__name__,
+        sha1(params).hexdigest()
+    ))
+
+
 class RedisCacheStorage(AbstractCacheStorage):
+    """Кэш в redis. Ошибки redis не прерывают запрос: чтение считается
+    промахом (значение берётся из кэша в памяти или из источника данных),
+    запись пропускается."""
 
     def __init__(self):
         self.storage = get_redis()
 
-    @staticmethod
-    async def get_cache_key(*args, **kwargs) -> str:
-        """Получаем ключ для кэша"""
-        return f"{args}{kwargs}"
-
     async def set_state(
             self,
             state_name: str,
-            state: str,
+            state: bytes,
             cache_expire_time: int = settings.project.cache_expire_time_s
     ) -> None:
         """Записываем кэш в редис
@@ -36,64 +71,220 @@ class RedisCacheStorage(AbstractCacheStorage):
         :param state: хэш (значение)
         :param cache_expire_time: "срок годности" кэша
         """
-        await self.storage.set(state_name, state, ex=cache_expire_time)
+        try:
+            await self.storage.set(state_name, state, ex=cache_expire_time)
+        except RedisError as err:
+            logging.warning('Кэш %s не записан в redis: %s', state_name, err)
 
-    async def get_state(self, state_name: str) -> str | None:
+    async def get_state(self, state_name: str) -> bytes | None:
         """Получаем кэш
         :param state_name: ключ для хэша
         """
-        return await self.storage.get(state_name)
+        try:
+            return await self.storage.get(state_name)
+        except RedisError as err:
+            logging.warning('Кэш %s не прочитан из redis: %s', state_name, err)
+            return None
+
+    async def get_states(self, state_names: list[str]) -> list[bytes | None]:
+        """Получаем кэш по списку ключей одним запросом
+        :param state_names: ключи для хэша
+        """
+        if not state_names:
+            return []
+        try:
+            return await self.storage.mget(state_names)
+        except RedisError as err:
+            logging.warning('Кэш не прочитан из redis: %s', err)
+            return [None] * len(state_names)
 
 
 class cache(AbstractFromCache):
+    """Двухуровневый кэш результатов сервисов: LRU-кэш в памяти процесса перед
+    redis. Одновременные промахи по одному ключу объединяются в один запрос к
+    источнику данных, а устаревшие (но ещё хранящиеся) значения отдаются
+    сразу с фоновым обновлением. Ключи содержат версию каталога, поэтому
+    после загрузки новых данных ETL кэш начинает заполняться заново."""
+    storage: AbstractCacheStorage
+    local_storage: AbstractCacheStorage = LocalCacheStorage()
+    _in_flight: dict[str, asyncio.Task] = {}
 
     @classmethod
     def set_storage_instance(cls, storage_instance) -> None:
         cls.storage = storage_instance
 
+    @classmethod
+    def set_local_storage_instance(cls, storage_instance) -> None:
+        cls.local_storage = storage_instance
+
+    @staticmethod
+    async def _get_key_suffix() -> str:
+        """Суффикс ключей кэша с текущей версией каталога."""
+        version = await get_catalogue_version().get()
+        return f':{version}' if version else ''
+
+    @staticmethod
+    def _encode(result: Any) -> bytes:
+        """Сериализует результат сервиса одним проходом orjson."""
+        if isinstance(result, (list, tuple)):
+            cache_structure = {
+                'root_object_type': 'list',
+                'model': result[0].__class__.__name__ if result else None,
+                'data': [item.dict(by_alias=True) for item in result],
+            }
+        else:
+            cache_structure = {
+                'root_object_type': 'single',
+                'model': result.__class__.__name__,
+                'data': result.dict(by_alias=True),
+            }
+        cache_structure['fresh_until'] = (
+            time() + settings.project.cache_expire_time_s
+        )
+        return dumps(cache_structure)
+
+    @staticmethod
+    def _decode(raw: bytes) -> tuple[float, Any]:
+        """Восстанавливает результат сервиса из кэша без повторного разбора
+        JSON для каждой модели."""
+        cache_structure = loads(raw)
+        data = cache_structure['data']
+        if cache_structure['root_object_type'] == 'list':
+            model = models_by_str.get(cache_structure['model'])
+            result = [model.parse_obj(item) for item in data] if data else []
+        else:
+            model = models_by_str[cache_structure['model']]
+            result = model.parse_obj(data)
+        return cache_structure['fresh_until'], result
+
+    @classmethod
+    async def _store(cls, cache_key: str, result: Any) -> None:
+        """Сохраняет значение в оба уровня кэша."""
+        await cls.storage.set_state(
+            state_name=cache_key,
+            state=cls._encode(result),
+            cache_expire_time=(settings.project.cache_expire_time_s
+                               + settings.cache.stale_time_s)
+        )
+        await cls.local_storage.set_state(
+            cache_key, (time() + settings.project.cache_expire_time_s, result)
+        )
+
+    @classmethod
+    async def _load(
+            cls,
+            cache_key: str,
+            func: Callable[..., Awaitable[Any]],
+            *args,
+            **kwargs
+    ) -> Any:
+        """Получает значение из источника данных и сохраняет его в оба уровня
+        кэша."""
+        result = await func(*args, **kwargs)
+        if result is not None:
+            await cls._store(cache_key, result)
+        return result
+
+    @classmethod
+    def _single_flight(
+            cls,
+            cache_key: str,
+            func: Callable[..., Awaitable[Any]],
+            *args,
+            **kwargs
+    ) -> asyncio.Task:
+        """Возвращает задачу загрузки значения по ключу. Если загрузка по
+        этому ключу уже выполняется, новая задача не создаётся."""
+        task = cls._in_flight.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(
+                cls._load(cache_key, func, *args, **kwargs)
+            )
+            task.add_done_callback(cls._on_load_done(cache_key))
+            cls._in_flight[cache_key] = task
+        return task
+
+    @classmethod
+    def _on_load_done(cls, cache_key: str) -> Callable[[asyncio.Task], None]:
+        def callback(task: asyncio.Task) -> None:
+            cls._in_flight.pop(cache_key, None)
+            if not task.cancelled() and task.exception() is not None:
+                logging.warning('Ошибка обновления кэша %s: %s',
+                                cache_key, task.exception())
+        return callback
+
     @classmethod
     def _from_cache(cls, func):
         @wraps(func)
         async def inner(*args, **kwargs):
             nonlocal cls
 
-            cache_structure = {
-                'root_object_type': '',
-                'cache': {
-                    'model': '',
-                    'data': '',
-                }
-            }
+            cache_key = (get_cache_key(func, *args, **kwargs)
+                         + await cls._get_key_suffix())
+
+            cached = await cls.local_storage.get_state(cache_key)
+            if cached is None:
+                raw = await cls.storage.get_state(cache_key)
+                if raw is not None:
+                    cached = cls._decode(raw)
+                    await cls.local_storage.set_state(cache_key, cached)
 
-            cache_key = await cls.storage.get_cache_key(*args, **kwargs)
-            _cache = await cls.storage.get_state(cache_key)
-
-            if not _cache:
-                _cache = await func(*args, **kwargs)
-                if _cache is None:
-                    return None
-
-                if isinstance(_cache, (list, tuple)):
-                    cache_structure['root_object_type'] = 'list'
-                    cache_structure['cache'] = [
-                        {'model': c.__class__.__name__.split('.')[-1],
-                         'data': c.json(by_alias=True)}
-                        for c in _cache
-                    ]
-                else:
-                    cache_structure['root_object_type'] = 'single'
-                    cache_structure['cache'] = {'model': _cache.__class__.__name__.split('.')[-1],
-                                                'data': _cache.json(by_alias=True)}
-
-                _cache = dumps(cache_structure)
-                await cls.storage.set_state(state_name=cache_key, state=_cache)
-
-            result = loads(_cache)
-            if result['root_object_type'] == 'list':
-                result = [models_by_str[r['model']].parse_raw(r['data']) for r in result['cache']]
-            else:
-                result = models_by_str[result['cache']['model']].parse_raw(result['cache']['data'])
+            if cached is None:
+                return await asyncio.shield(
+                    cls._single_flight(cache_key, func, *args, **kwargs)
+                )
 
+            fresh_until, result = cached
+            if fresh_until <= time():
+                cls._single_flight(cache_key, func, *args, **kwargs)
             return result
 
         return inner
+
+    @classmethod
+    def _from_cache_many(cls, single_func):
+        """Кэширует пакетный метод сервиса поэлементно. Ключи элементов
+        совпадают с ключами одиночного метода single_func, поэтому пакетный и
+        одиночный запросы используют общий кэш. Источник данных запрашивается
+        только для отсутствующих в кэше или устаревших элементов."""
+        def decorator(func):
+            @wraps(func)
+            async def inner(self, item_ids: list):
+                suffix = await cls._get_key_suffix()
+                cache_keys = [get_cache_key(single_func, self, item_id) + suffix
+                              for item_id in item_ids]
+                results = dict.fromkeys(cache_keys)
+
+                missing_keys = []
+                for cache_key in results:
+                    cached = await cls.local_storage.get_state(cache_key)
+                    if cached is not None and cached[0] > time():
+                        results[cache_key] = cached[1]
+                    else:
+                        missing_keys.append(cache_key)
+
+                raw_states = await cls.storage.get_states(missing_keys)
+                for cache_key, raw in zip(missing_keys, raw_states):
+                    if raw is None:
+                        continue
+                    cached = cls._decode(raw)
+                    if cached[0] > time():
+                        results[cache_key] = cached[1]
+                        await cls.local_storage.set_state(cache_key, cached)
+
+                id_by_key = dict(zip(cache_keys, item_ids))
+                missing_keys = [key for key, result in results.items()
+                                if result is None]
+                if missing_keys:
+                    items = await func(
+                        self, [id_by_key[key] for key in missing_keys]
+                    )
+                    for cache_key, item in zip(missing_keys, items):
+                        if item is not None:
+                            results[cache_key] = item
+                            await cls._store(cache_key, item)
+
+                return [results[cache_key] for cache_key in cache_keys]
+
+            return inner
+        return decorator
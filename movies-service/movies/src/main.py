@@ -4,7 +4,8 @@ from fastapi.responses import ORJSONResponse
 from redis.asyncio import Redis
 from src.api.v1.routers import v1_router
 from src.core.config import settings
-from src.db import elastic, redis
+from src.core.http_cache import HTTPCacheMiddleware
+from src.db import catalogue, elastic, memory, redis
 from src.jwt import AuthJWT, AuthJWTException, authjwt_exception_handler
 
 app = FastAPI(
@@ -15,12 +16,15 @@ app = FastAPI(
 )
 
 app.include_router(v1_router)
+app.add_middleware(HTTPCacheMiddleware)
 
 
 @app.on_event('startup')
 async def startup():
     redis.redis = Redis(host=settings.redis.host, port=settings.redis.port)
+    catalogue.catalogue_version = catalogue.CatalogueVersion(redis.redis)
     redis.cache.set_storage_instance(redis.RedisCacheStorage())
+    redis.cache.set_local_storage_instance(memory.LocalCacheStorage())
     elastic.es = Elasticsearch(
         hosts=[f'{settings.elastic.host}:{settings.elastic.port}']
     )
@@ -1,4 +1,5 @@
-from .film import Film, FilmShortView
+from .batch import BatchItem, BatchRequest  # noqa:F401
+from .film import Film, FilmShortView, PersonFilmView  # noqa:F401
 from .genre import Genre
 from .person import Person
 
@@ -0,0 +1,37 @@
+from typing import Generic, Optional, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+from pydantic.generics import GenericModel
+from src.core.config import settings
+from src.models.mixins import JSONMixin
+
+ItemT = TypeVar('ItemT')
+
+
+class BatchRequest(BaseModel):
+    """Модель запроса на получение нескольких элементов по их id."""
+    ids: list[UUID] = Field(..., min_items=1,
+                            max_items=settings.project.max_batch_size,
+                            title='Список id элементов')
+
+    class Config(JSONMixin):
+        title = 'Список id элементов'
+
+
+class BatchItem(GenericModel, Generic[ItemT]):
+    """Модель элемента ответа на пакетный запрос."""
+    uuid: UUID = Field(..., title='ID элемента')
+    found: bool = Field(..., title='Элемент найден')
+    item: Optional[ItemT] = Field(None, title='Элемент')
+
+    class Config(JSONMixin):
+        title = 'Элемент пакетного ответа'
+
+    @classmethod
+    def from_items(cls,
+                   item_ids: list[UUID],
+                   items: list[Optional[ItemT]]) -> list['BatchItem[ItemT]']:
+        """Формирует ответ на пакетный запрос в порядке запрошенных id."""
+        return [cls(uuid=item_id, found=item is not None, item=item)
+                for item_id, item in zip(item_ids, items)]
@@ -29,3 +29,14 @@ class FilmShortView(FilmBase):
     """Модель сокращённой информации о фильме."""
     class Config(JSONMixin):
         title = 'Краткая информация о фильме'
+
+
+class PersonFilmView(FilmShortView):
+    """Модель сокращённой информации о фильме из фильмографии человека. У
+    фильмов без рейтинга нет imdb_rating, у документов, проиндексированных
+    до добавления фильмографии, - названия и рейтинга."""
+    title: Optional[str] = Field(None, title='Название фильма')
+    imdb_rating: Optional[float] = Field(None, title='Рейтинг фильма')
+
+    class Config(JSONMixin):
+        title = 'Краткая информация о фильме человека'
@@ -9,6 +9,8 @@ class FilmRole(BaseModel):
     """Модель информации о фильме со списком ролей в нём."""
     film: UUID = Field(..., title='ID фильма')
     roles: list[str] = Field(..., title='Список ролей')
+    title: Optional[str] = Field(None, title='Название фильма')
+    imdb_rating: Optional[float] = Field(None, title='Рейтинг фильма')
 
     class Config(JSONMixin):
         title = 'Фильм и список ролей в нём'
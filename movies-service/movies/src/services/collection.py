@@ -1,51 +1,84 @@
 from functools import lru_cache
 from typing import Optional, Type
 
+from pydantic import BaseModel
 from src.db.base import AbstractDataSource
 from src.db.elastic import get_data_source
-# from src.db.redis import cache
-from src.models import Film, Genre, Person
+from src.db.redis import cache
+from src.models import Film, FilmShortView, Genre, Person
 from src.services.view import ResponseView
 
 
 class CollectionService:
     """Класс, отвечающий за получение коллекции элементов из источника
-    данных."""
+    данных. Если задана модель представления, из источника данных
+    запрашиваются только её поля."""
     def __init__(self,
                  model: Type[Film | Genre | Person],
-                 data_source: AbstractDataSource):
+                 data_source: AbstractDataSource,
+                 view_model: Optional[Type[BaseModel]] = None):
         self.model = model
         self.data_source = data_source
+        self.view_model = view_model or model
+        self.fields = list(view_model.__fields__) if view_model else None
 
-    # @cache._from_cache
+    @cache._from_cache
     async def get_collection(
             self,
-            filter: Optional[dict],
+            filter_query: Optional[dict],
             search: Optional[dict],
             view: ResponseView
-    ) -> list[Film | Genre | Person]:
+    ) -> list[BaseModel]:
         """Возвращает коллекцию документов, найденных по запросу.
-        :param filter: id для фильтрации
+        :param filter_query: id для фильтрации
         :param search: поисковый запрос
         :param view: сервис, отвечающий за представления элементов коллекции
         (сортировка, пагинация)
         """
         items = await self.data_source.get_collection(
-            filter=filter, search=search, view=view
+            filter_query=filter_query, search=search, view=view,
+            fields=self.fields
         )
-        return [self.model(**item) for item in items] if items else []
+        return [self.view_model(**item) for item in items] if items else []
+
+    async def get_page(
+            self,
+            filter_query: Optional[dict],
+            search: Optional[dict],
+            view: ResponseView
+    ) -> tuple[list[BaseModel], Optional[str]]:
+        """Возвращает страницу коллекции и курсор следующей страницы. Если
+        курсор в запросе не передан, используется пагинация по номеру страницы
+        и курсор не возвращается.
+        :param filter_query: id для фильтрации
+        :param search: поисковый запрос
+        :param view: сервис, отвечающий за представления элементов коллекции
+        (сортировка, пагинация)
+        """
+        if view.cursor is None:
+            items = await self.get_collection(
+                filter_query=filter_query, search=search, view=view
+            )
+            return items, None
+
+        items, cursor = await self.data_source.get_page(
+            filter_query=filter_query, search=search, view=view,
+            fields=self.fields
+        )
+        return [self.view_model(**item) for item in items], cursor
 
 
 def get_collection_service(
         model: Type[Film | Genre | Person],
-        data_source: AbstractDataSource
+        data_source: AbstractDataSource,
+        view_model: Optional[Type[BaseModel]] = None
 ) -> CollectionService:
-    return CollectionService(model, data_source)
+    return CollectionService(model, data_source, view_model)
 
 
 @lru_cache()
 def get_film_collection_service() -> CollectionService:
-    return get_collection_service(Film, get_data_source(Film))
+    return get_collection_service(Film, get_data_source(Film), FilmShortView)
 
 
 @lru_cache()
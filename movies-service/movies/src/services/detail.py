@@ -4,7 +4,7 @@ from uuid import UUID
 
 from src.db.base import AbstractDataSource
 from src.db.elastic import get_data_source
-# from src.db.redis import cache
+from src.db.redis import cache
 from src.models import Film, Genre, Person
 
 
@@ -16,7 +16,7 @@ class DetailService:
         self.model = model
         self.data_source = data_source
 
-    # @cache._from_cache
+    @cache._from_cache
     async def get_by_id(
             self,
             item_id: UUID
@@ -27,6 +27,19 @@ class DetailService:
         item = await self.data_source.get_by_id(item_id)
         return None if item is None else self.model(**item)
 
+    @cache._from_cache_many(get_by_id)
+    async def get_many(
+            self,
+            item_ids: list[UUID]
+    ) -> list[Optional[Film | Genre | Person]]:
+        """Возвращает из хранилища элементы по списку id в порядке запроса.
+        Для ненайденных элементов возвращается None.
+        :param item_ids: id искомых элементов
+        """
+        items = await self.data_source.get_many(item_ids)
+        return [None if item is None else self.model(**item)
+                for item in items]
+
 
 def get_detail_service(
         model: Type[Film | Genre | Person],
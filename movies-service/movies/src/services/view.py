@@ -3,6 +3,7 @@ from typing import Optional
 from fastapi import Query
 from pydantic import BaseModel, Field
 from src.core.config import settings
+from src.core.utils import NEXT_CURSOR_HEADER
 
 
 class SortView(BaseModel):
@@ -12,6 +13,7 @@ class SortView(BaseModel):
 class PaginationView(BaseModel):
     size: int = Field(..., ge=1, le=100)
     offset: int = Field(..., ge=0)
+    cursor: Optional[str] = None
 
 
 class ResponseView(SortView, PaginationView):
@@ -29,12 +31,20 @@ def get_view_service(
             settings.project.default_page_size,
             ge=1, le=settings.project.max_page_size,
             description='Количество записей на странице'),
-        page_number: int = Query(1, ge=1, description='Номер страницы')
+        page_number: int = Query(1, ge=1, description='Номер страницы'),
+        cursor: Optional[str] = Query(
+            None,
+            description=('Курсор следующей страницы из заголовка '
+                         f'{NEXT_CURSOR_HEADER}. Пустое значение начинает '
+                         'обход коллекции курсором, page_number при этом '
+                         'игнорируется')
+        )
 ) -> ResponseView:
     """Сервис для получения параметров сортировки и пагинации данных.
     :param sort: поле и направление сортировки выдачи ([-]field)
     :param page_size: количество элементов для отображения
     :param page_number: номер страницы для отображения
+    :param cursor: курсор следующей страницы
     """
     return ResponseView(sort=sort, size=page_size,
-                        offset=(page_number - 1) * page_size)
+                        offset=(page_number - 1) * page_size, cursor=cursor)
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from src.db import catalogue
+from src.jwt import AuthJWT
+from src.main import app
+from src.models import Film, FilmShortView, Genre
+from src.services.collection import get_film_collection_service
+from src.services.detail import get_film_detail_service
+
+
+class FakeAuthJWT:
+    async def jwt_required(self):
+        pass
+
+
+class FakeCatalogueVersion:
+    async def get(self):
+        return None
+
+
+class FakeDetailService:
+    def __init__(self, film):
+        self.film = film
+
+    async def get_by_id(self, item_id):
+        return self.film
+
+    async def get_many(self, item_ids):
+        return [self.film if item_id == self.film.id else None
+                for item_id in item_ids]
+
+
+class FakeCollectionService:
+    def __init__(self, items):
+        self.items = items
+        self.filters = []
+
+    async def get_collection(self, filter_query, search, view):
+        self.filters.append(filter_query)
+        return self.items
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(catalogue, 'catalogue_version',
+                        FakeCatalogueVersion())
+    app.dependency_overrides[AuthJWT] = FakeAuthJWT
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def set_services(film, items=()):
+    collection_service = FakeCollectionService(list(items))
+    app.dependency_overrides[get_film_detail_service] = (
+        lambda: FakeDetailService(film)
+    )
+    app.dependency_overrides[get_film_collection_service] = (
+        lambda: collection_service
+    )
+    return collection_service
+
+
+def make_film(genres):
+    return Film(id=uuid4(), title='Фильм', imdb_rating=7.5, genres=genres)
+
+
+def test_similar_films(client):
+    genres = [Genre(id=uuid4(), name='Драма'),
+              Genre(id=uuid4(), name='Комедия')]
+    similar = FilmShortView(id=uuid4(), title='Похожий', imdb_rating=8.0)
+    collection_service = set_services(make_film(genres), [similar])
+
+    response = client.get(f'/api/v1/films/{uuid4()}/similar')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == [
+        {'id': str(similar.id), 'title': 'Похожий', 'imdb_rating': 8.0}
+    ]
+    assert collection_service.filters == [
+        {'field': 'genre_id', 'value': [genre.id for genre in genres]}
+    ]
+
+
+@pytest.mark.parametrize('genres', [None, []])
+def test_similar_films_without_genres(client, genres):
+    collection_service = set_services(make_film(genres))
+
+    response = client.get(f'/api/v1/films/{uuid4()}/similar')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == []
+    assert collection_service.filters == []
+
+
+def test_similar_films_not_found(client):
+    set_services(None)
+
+    response = client.get(f'/api/v1/films/{uuid4()}/similar')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_films_batch(client):
+    film = make_film(None)
+    missing_id = uuid4()
+    set_services(film)
+
+    response = client.post('/api/v1/films/_batch',
+                           json={'ids': [str(missing_id), str(film.id)]})
+
+    assert response.status_code == HTTPStatus.OK
+    missing, found = response.json()
+    assert missing == {'uuid': str(missing_id), 'found': False}
+    assert found['uuid'] == str(film.id)
+    assert found['found'] is True
+    assert found['item']['id'] == str(film.id)
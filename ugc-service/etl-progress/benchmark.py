@@ -0,0 +1,132 @@
+"""Бенчмарк пропускной способности ETL прогресса просмотра.
+
+Kafka заменена потребителем, отдающим сгенерированные сообщения из памяти,
+redis - хранилищем с задержкой на каждый сетевой обмен (RTT). Сравнивается
+прежняя запись (отдельный SET на каждый ключ) и запись одним конвейером
+хэшей пользователей.
+
+Запуск: python benchmark.py [кол-во сообщений] [RTT redis, мс]
+"""
+import asyncio
+import os
+import sys
+from collections import namedtuple
+from random import randrange
+from time import perf_counter
+
+for name, value in (('ETL_REFRESH_PERIOD', '10'), ('KAFKA_HOST', 'kafka'),
+                    ('KAFKA_PORT', '9092'), ('KAFKA_VIEWS_TOPIC', 'views'),
+                    ('REDIS_HOST', 'redis'), ('REDIS_PORT', '6379')):
+    os.environ.setdefault(name, value)
+
+from src.main import consume_window, flush  # noqa:E402
+
+Message = namedtuple('Message', ('key', 'value', 'timestamp'))
+
+
+class KafkaStandIn:
+    """Потребитель, отдающий сообщения о просмотре из памяти."""
+
+    def __init__(self, count: int, partitions: int = 4, keys: int = 20000,
+                 films: int = 20):
+        self.messages = [
+            Message(f'{randrange(keys)}+film{randrange(films)}'.encode(),
+                    str(randrange(7200)).encode(), index)
+            for index in range(count)
+        ]
+        self.partitions = partitions
+        self.position = 0
+        self.commits = 0
+
+    async def getmany(self, timeout_ms: int = 0, max_records: int = None):
+        batch = self.messages[self.position:self.position + max_records]
+        self.position += len(batch)
+        return {
+            partition: batch[partition::self.partitions]
+            for partition in range(self.partitions)
+        } if batch else {}
+
+    async def commit(self):
+        self.commits += 1
+
+
+class RedisStandIn:
+    """Хранилище с задержкой на каждый сетевой обмен."""
+
+    def __init__(self, rtt_s: float):
+        self.rtt_s = rtt_s
+        self.data = {}
+        self.round_trips = 0
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt_s)
+
+    async def set(self, key, value, ex=None):
+        await self._round_trip()
+        self.data[key] = value
+
+    def pipeline(self, transaction: bool = True):
+        return PipelineStandIn(self)
+
+
+class PipelineStandIn:
+    """Конвейер: все накопленные команды выполняются за один обмен."""
+
+    def __init__(self, storage: RedisStandIn):
+        self.storage = storage
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.commands.clear()
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append(
+            (name, args, kwargs)
+        )
+
+    async def execute(self):
+        await self.storage._round_trip()
+        for name, args, kwargs in self.commands:
+            if name == 'hset':
+                self.storage.data.setdefault(args[0], {}).update(
+                    kwargs['mapping']
+                )
+            elif name == 'zadd':
+                self.storage.data.setdefault(args[0], {}).update(args[1])
+
+
+async def run(count: int, rtt_s: float, batched: bool) -> None:
+    consumer = KafkaStandIn(count)
+    storage = RedisStandIn(rtt_s)
+
+    started = perf_counter()
+    while consumer.position < count:
+        progress, _ = await consume_window(consumer, 10, 50000)
+        if batched:
+            await flush(storage, progress, ttl=3600, recent_size=100)
+        else:
+            for user_film, (timestamp, _) in progress.items():
+                await storage.set(user_film, timestamp)
+        await consumer.commit()
+    elapsed = perf_counter() - started
+
+    mode = 'конвейер за окно' if batched else 'SET на ключ     '
+    print(f'{mode}: {count / elapsed:12.0f} сообщений/с, '
+          f'обменов с redis: {storage.round_trips}')
+
+
+async def main(count: int, rtt_ms: float) -> None:
+    print(f'Сообщений: {count}, RTT redis: {rtt_ms} мс')
+    await run(count, rtt_ms / 1000, batched=False)
+    await run(count, rtt_ms / 1000, batched=True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500_000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    ))
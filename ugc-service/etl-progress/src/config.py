@@ -3,7 +3,11 @@ from pydantic import BaseSettings, Field
 
 class ProjectSettings(BaseSettings):
     refresh_period_s: int = Field(env='ETL_REFRESH_PERIOD')
-    consumer_group: str = __name__
+    consumer_group: str = Field(__name__, env='ETL_CONSUMER_GROUP')
+    max_records: int = Field(50000, env='ETL_MAX_RECORDS')
+    progress_ttl_s: int = Field(30 * 24 * 60 * 60, env='ETL_PROGRESS_TTL')
+    recent_size: int = Field(100, env='ETL_RECENT_SIZE')
+    flush_max_tries: int = Field(5, env='ETL_FLUSH_MAX_TRIES')
 
 
 class KafkaSettings(BaseSettings):
@@ -17,6 +21,13 @@ class RedisSettings(BaseSettings):
     port: int = Field(env='REDIS_PORT')
 
 
+# Прогресс пользователя хранится в хэше (id фильма -> секунда просмотра),
+# недавно просмотренные фильмы - в сортированном множестве (id фильма ->
+# время просмотра). Форматы ключей совпадают с ugc.
+PROGRESS_KEY = 'progress:{user_id}'
+RECENT_KEY = 'recent:{user_id}'
+
+
 class Settings(BaseSettings):
     project: ProjectSettings = ProjectSettings()
     kafka: KafkaSettings = KafkaSettings()
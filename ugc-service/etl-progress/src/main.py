@@ -1,44 +1,132 @@
 import asyncio
-from time import sleep
+from collections import defaultdict
+from time import monotonic
 
-from kafka import KafkaConsumer, errors
+from aiokafka import AIOKafkaConsumer
+from aiokafka.errors import CommitFailedError, KafkaConnectionError
 from redis.asyncio import ConnectionError, Redis
-from src.config import settings
-from src.utils import backoff, get_configured_logger
+from src.config import PROGRESS_KEY, RECENT_KEY, settings
+from src.utils import async_backoff, get_configured_logger
 
 logger = get_configured_logger(__name__)
 
 
-async def main(broker, progress_storage):
+async def consume_window(
+        consumer: AIOKafkaConsumer, period_s: float, max_records: int
+) -> tuple[dict[bytes, tuple[bytes, int]], int]:
+    """Читает сообщения в течение окна агрегации, но не больше max_records.
+    Для каждого ключа (пользователь+фильм) остаётся последнее значение:
+    сообщения одного ключа попадают в одну партицию и читаются по порядку.
+    :return: прогресс и время сообщения (мс) по ключам и кол-во прочитанных
+    сообщений
+    """
+    progress = {}
+    consumed = 0
+    deadline = monotonic() + period_s
+    while consumed < max_records and (timeout := deadline - monotonic()) > 0:
+        batches = await consumer.getmany(
+            timeout_ms=int(timeout * 1000), max_records=max_records - consumed
+        )
+        for messages in batches.values():
+            consumed += len(messages)
+            for message in messages:
+                if message.key is not None:
+                    progress[message.key] = (message.value,
+                                             message.timestamp)
+    return progress, consumed
+
+
+def group_by_user(
+        progress: dict[bytes, tuple[bytes, int]]
+) -> dict[str, tuple[dict[str, bytes], dict[str, int]]]:
+    """Группирует прогресс по пользователям.
+    :return: для каждого пользователя прогресс и время просмотра (мс) по
+    id фильмов
+    """
+    users = defaultdict(lambda: ({}, {}))
+    for user_film, (timestamp, watched_at) in progress.items():
+        user_id, film_id = user_film.decode().split('+', 1)
+        films, recent = users[user_id]
+        films[film_id] = timestamp
+        recent[film_id] = watched_at
+    return users
+
+
+@async_backoff(ConnectionError, max_tries=settings.project.flush_max_tries)
+async def flush(progress_storage: Redis,
+                progress: dict[bytes, tuple[bytes, int]],
+                ttl: int, recent_size: int) -> None:
+    """Записывает прогресс в redis одним конвейером команд. Для каждого
+    пользователя обновляются хэш прогресса и сортированное множество недавно
+    просмотренных фильмов (обрезается до recent_size), обоим продлевается
+    время жизни.
+
+    Кол-во попыток ограничено: при длительной недоступности redis ошибка
+    завершает ETL, не зафиксировав смещения, и контейнер перезапускается,
+    а потребитель не удерживает партиции без вызова getmany."""
+    async with progress_storage.pipeline(transaction=False) as pipeline:
+        for user_id, (films, recent) in group_by_user(progress).items():
+            progress_key = PROGRESS_KEY.format(user_id=user_id)
+            recent_key = RECENT_KEY.format(user_id=user_id)
+            pipeline.hset(progress_key, mapping=films)
+            pipeline.expire(progress_key, ttl)
+            pipeline.zadd(recent_key, recent)
+            pipeline.zremrangebyrank(recent_key, 0, -recent_size - 1)
+            pipeline.expire(recent_key, ttl)
+        await pipeline.execute()
+
+
+async def main(broker: AIOKafkaConsumer, progress_storage: Redis):
+    await start_broker(broker)
     logger.info('ETL connected to the sources')
-    while True:
-        current_progress = {}
+    try:
+        while True:
+            current_progress, consumed = await consume_window(
+                broker, settings.project.refresh_period_s,
+                settings.project.max_records
+            )
+            if not consumed:
+                continue
 
-        for messages in broker.poll().values():
-            for message in messages:
-                current_progress[message.key] = message.value
+            if current_progress:
+                await flush(progress_storage, current_progress,
+                            settings.project.progress_ttl_s,
+                            settings.project.recent_size)
 
-        for user_film, timestamp in current_progress.items():
-            await progress_storage.set(user_film.decode(), timestamp.decode())
+            # Смещения фиксируются только после успешной записи в redis
+            try:
+                await broker.commit()
+            except CommitFailedError as err:
+                logger.warning(f'Смещения не зафиксированы: {err}')
+    finally:
+        await broker.stop()
 
-        sleep(settings.project.refresh_period_s)
 
+@async_backoff(KafkaConnectionError)
+async def start_broker(broker: AIOKafkaConsumer):
+    await broker.start()
 
-@backoff(errors.NoBrokersAvailable)
-def get_broker():
-    return KafkaConsumer(
+
+def get_broker() -> AIOKafkaConsumer:
+    """Потребитель в группе: экземпляры ETL с одной группой делят между
+    собой партиции топика."""
+    return AIOKafkaConsumer(
         settings.kafka.views_topic,
         bootstrap_servers=[f'{settings.kafka.host}:{settings.kafka.port}'],
         auto_offset_reset='earliest',
         group_id=settings.project.consumer_group,
+        enable_auto_commit=False,
     )
 
 
-@backoff(ConnectionError)
-def get_progress_storage():
+def get_progress_storage() -> Redis:
     return Redis(host=settings.redis.host, port=settings.redis.port)
 
 
+async def run():
+    await main(get_broker(), get_progress_storage())
+
+
 if __name__ == '__main__':
     logger.info('ETL started')
-    asyncio.run(main(get_broker(), get_progress_storage()))
+    asyncio.run(run())
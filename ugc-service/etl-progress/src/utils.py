@@ -1,7 +1,7 @@
+import asyncio
 import logging
 from functools import wraps
 from sys import stdout
-from time import sleep
 
 LOG_FORMAT = '"%(asctime)s - [%(levelname)s] - %(message)s"'
 LOG_DT_FORMAT = '%d.%m.%Y %H:%M:%S'
@@ -26,43 +26,41 @@ def get_configured_logger(logger_name: str) -> logging.Logger:
 logger = get_configured_logger(__name__)
 
 
-def backoff(exception, start_sleep_time=0.1, factor=2, border_sleep_time=10):
+def async_backoff(exception, start_sleep_time=0.1, factor=2,
+                  border_sleep_time=10, max_tries=None):
     """
-    Функция для повторного выполнения функции через некоторое время, если
-    возникла ошибка. Использует наивный экспоненциальный рост времени повтора
-    (factor) до граничного времени ожидания (border_sleep_time)
-
-    Формула:
-        time = start_sleep_time * 2^(n) if time < border_sleep_time
-        time = border_sleep_time if time >= border_sleep_time
+    Повторяет корутину через некоторое время, если возникла ошибка, не
+    блокируя цикл событий. Время повтора растёт экспоненциально (factor) до
+    граничного времени ожидания (border_sleep_time).
     :param exception: тип ошибки, который перехвачивает функция
     :param start_sleep_time: начальное время повтора
     :param factor: во сколько раз нужно увеличить время ожидания
     :param border_sleep_time: граничное время ожидания
-    :return: результат выполнения функции
+    :param max_tries: максимальное кол-во попыток, после которого ошибка
+    передаётся дальше (None - без ограничения)
+    :return: результат выполнения корутины
     """
 
     def wrapper(func):
         @wraps(func)
-        def inner(*args, **kwargs):
-            try:
-                result = func(*args, **kwargs)
-                inner.fail_count = 0
-                return result
-            except exception as ex:
-                time = start_sleep_time * pow(factor, inner.fail_count)
-                if time > border_sleep_time:
-                    time = border_sleep_time
-                else:
-                    inner.fail_count += 1
-                msg = 'Сбой вызова {function}: {msg}. Повтор через {time} с.'
-                logger.error(
-                    msg.format(function=func.__name__,
-                               msg=str(ex).replace('\n', ' '), time=time)
-                )
-                sleep(time)
-                return inner(*args, **kwargs)
+        async def inner(*args, **kwargs):
+            fail_count = 0
+            while True:
+                try:
+                    return await func(*args, **kwargs)
+                except exception as ex:
+                    fail_count += 1
+                    if max_tries is not None and fail_count >= max_tries:
+                        raise
+                    time = min(start_sleep_time * pow(factor, fail_count - 1),
+                               border_sleep_time)
+                    msg = ('Сбой вызова {function}: {msg}. '
+                           'Повтор через {time} с.')
+                    logger.error(
+                        msg.format(function=func.__name__,
+                                   msg=str(ex).replace('\n', ' '), time=time)
+                    )
+                    await asyncio.sleep(time)
 
-        inner.fail_count = 0
         return inner
     return wrapper
@@ -1,15 +1,18 @@
 from http import HTTPStatus
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Path
+from fastapi import APIRouter, Depends, Path, Query, Response
 from src.api.v1 import openapi
+from src.core.config import settings
 from src.jwt import AuthJWT, login_required
+from src.schemas import BookmarksSync, BookmarksSyncResult
 from src.services.bookmarks_storage import (AbstractBookmarkStorage,
                                             get_bookmarks_storage)
-from src.services.pagination import PaginationView, get_pagination_service
 
 router = APIRouter(prefix='/bookmarks')
 
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
 
 @router.post(
     '/{film_id}',
@@ -45,14 +48,49 @@ async def remove_movie(
 
 @router.get(
     '/',
-    **openapi.bookmarks.get_movies.dict()
+    **openapi.bookmarks.get_movies.dict(),
+    response_model=list[UUID]
 )
 @login_required()
 async def get_movies(
+        response: Response,
+        cursor: str | None = Query(
+            None, description=f'Курсор страницы из заголовка '
+                              f'{NEXT_CURSOR_HEADER}'
+        ),
+        page_size: int = Query(
+            settings.project.default_page_size,
+            ge=1, le=settings.project.max_page_size,
+            description='Количество записей на странице'
+        ),
+        page_number: int = Query(
+            1, ge=1, description='Номер страницы (не применяется с cursor)'
+        ),
+        authorize: AuthJWT = Depends(),
+        storage: AbstractBookmarkStorage = Depends(get_bookmarks_storage)
+):
+    """Получает список id фильмов, находящихся в закладках у пользователя.
+    Курсор следующей страницы передаётся в заголовке ответа."""
+    user_id = await authorize.get_jwt_subject()
+    films, next_cursor = await storage.get(
+        user_id, page_size, cursor, (page_number - 1) * page_size
+    )
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return films
+
+
+@router.patch(
+    '/',
+    **openapi.bookmarks.sync_movies.dict(),
+    response_model=BookmarksSyncResult
+)
+@login_required()
+async def sync_movies(
+        changes: BookmarksSync,
         authorize: AuthJWT = Depends(),
-        pagination: PaginationView = Depends(get_pagination_service),
         storage: AbstractBookmarkStorage = Depends(get_bookmarks_storage)
 ):
-    """Получает список id фильмов, находящихся в закладках у пользователя."""
+    """Добавляет и удаляет несколько фильмов в закладках пользователя."""
     user_id = await authorize.get_jwt_subject()
-    return await storage.get(user_id, pagination.offset, pagination.size)
+    return await storage.sync(user_id, changes.add, changes.remove)
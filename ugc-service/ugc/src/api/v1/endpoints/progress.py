@@ -3,10 +3,12 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, Path, Query
 from src.api.v1 import openapi
+from src.core.config import settings
 from src.jwt import AuthJWT, login_required
 from src.services.broker import AbstractBroker, get_broker
 from src.services.progress_storage import (AbstractProgressStorage,
                                            get_progress_storage)
+from src.utils.exceptions import ServiceUnavailableException
 
 router = APIRouter(prefix='/progress')
 
@@ -25,7 +27,62 @@ async def push_movie_timestamp(
 ):
     """Отправляет в брокер сообщений информацию о времени просмотра фильма."""
     user_id = await authorize.get_jwt_subject()
-    await broker.send(user_id, film_id, timestamp)
+    if not await broker.send(user_id, film_id, timestamp):
+        raise ServiceUnavailableException('Буфер отправки переполнен')
+
+
+@router.get(
+    '/broker/metrics',
+    **openapi.progress.broker_metrics.dict()
+)
+@login_required(['ugc-reader', 'ugc-manager'])
+async def broker_metrics(
+        broker: AbstractBroker = Depends(get_broker),
+        authorize: AuthJWT = Depends()  # noqa
+):
+    """Возвращает счётчики отправки сообщений в брокер."""
+    return broker.get_metrics()
+
+
+@router.get(
+    '/',
+    **openapi.progress.fetch_movies_timestamps.dict()
+)
+@login_required()
+async def fetch_movies_timestamps(
+        film_ids: list[UUID] = Query(
+            ..., max_items=settings.project.max_progress_films,
+            description='ID просматриваемых фильмов'
+        ),
+        authorize: AuthJWT = Depends(),
+        progress_storage: AbstractProgressStorage = Depends(get_progress_storage),  # noqa:E501
+):
+    """Получает информацию о времени просмотра нескольких фильмов."""
+    user_id = await authorize.get_jwt_subject()
+    progress = await progress_storage.get_many(user_id, film_ids)
+    return [
+        {'film_id': film_id, 'timestamp': timestamp}
+        for film_id, timestamp in progress.items()
+    ]
+
+
+@router.get(
+    '/recent',
+    **openapi.progress.fetch_recent_movies.dict()
+)
+@login_required()
+async def fetch_recent_movies(
+        size: int = Query(
+            settings.project.default_page_size, ge=1,
+            le=settings.project.max_progress_films,
+            description='Количество фильмов'
+        ),
+        authorize: AuthJWT = Depends(),
+        progress_storage: AbstractProgressStorage = Depends(get_progress_storage),  # noqa:E501
+):
+    """Получает недавно просмотренные фильмы, начиная с последнего."""
+    user_id = await authorize.get_jwt_subject()
+    return await progress_storage.get_recent(user_id, size)
 
 
 @router.get(
@@ -1,10 +1,11 @@
 from http import HTTPStatus
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Path, Response
+from fastapi import APIRouter, Depends, Path, Query, Response
 from src.api.v1 import openapi
 from src.jwt import AuthJWT, login_required
-from src.schemas import ReviewCreate
+from src.schemas import ReviewCreate, ReviewSort
+from src.services.pagination import PaginationView, get_pagination_service
 from src.services.reviews_storage import (AbstractReviewStorage,
                                           get_reviews_storage)
 
@@ -51,10 +52,14 @@ async def remove(
 )
 async def get(
         film_id: UUID = Path(..., description='ID фильма'),
+        sort: ReviewSort = Query(ReviewSort.newest,
+                                 description='Сортировка рецензий'),
+        pagination: PaginationView = Depends(get_pagination_service),
         storage: AbstractReviewStorage = Depends(get_reviews_storage)
 ):
-    """Получает все рецензии к фильму."""
-    return await storage.get_all(film_id)
+    """Получает страницу рецензий к фильму."""
+    return await storage.get_all(film_id, sort.value, pagination.offset,
+                                 pagination.size)
 
 
 @router.post(
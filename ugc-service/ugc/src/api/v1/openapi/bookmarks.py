@@ -15,6 +15,12 @@ remove_movie = BaseOpenapi(
 
 get_movies = BaseOpenapi(
     summary='Получить список фильмов в закладках',
-    description='Получение списка фильмов осуществляется учётом параметров пагинации',
+    description='Фильмы возвращаются от последних добавленных. Курсор следующей страницы передаётся в заголовке X-Next-Cursor; с курсором page_number не применяется, и запрос не замедляется с номером страницы',
     response_description='Список ID фильмов, находящихся в закладках'
 )
+
+sync_movies = BaseOpenapi(
+    summary='Синхронизировать закладки',
+    description='Добавление и удаление нескольких фильмов одним запросом, например, для синхронизации локального списка закладок устройства. Уже существующие закладки пропускаются',
+    response_description='Количество добавленных и удалённых закладок'
+)
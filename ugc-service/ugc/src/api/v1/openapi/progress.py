@@ -2,7 +2,9 @@ from src.api.v1.openapi.base import BaseOpenapi
 
 push_movie_timestamp = BaseOpenapi(
     summary='Добавить данные о текушем времени просмотра кинопроизведения',
-    description='Добавление происходит в брокер сообщений Kafka',
+    description=('Добавление происходит в брокер сообщений Kafka без '
+                 'ожидания доставки. При переполнении буфера отправки '
+                 'возвращается 503 с заголовком Retry-After'),
     response_description=''
 )
 
@@ -11,3 +13,30 @@ fetch_movie_timestamp = BaseOpenapi(
     description='',
     response_description='Количество просмотренных секунд кинопроизведения'
 )
+
+fetch_movies_timestamps = BaseOpenapi(
+    summary='Получить данные о текушем времени просмотра нескольких '
+            'кинопроизведений',
+    description='Прогресс по всем переданным фильмам читается из хранилища '
+                'за одно обращение. Для непросмотренных фильмов timestamp '
+                'равен null',
+    response_description='Количество просмотренных секунд по каждому '
+                         'кинопроизведению'
+)
+
+fetch_recent_movies = BaseOpenapi(
+    summary='Получить недавно просмотренные кинопроизведения',
+    description='Фильмы упорядочены по времени просмотра, начиная с '
+                'последнего. watched_at - unix-время просмотра в мс',
+    response_description='Кинопроизведения с количеством просмотренных '
+                         'секунд и временем просмотра'
+)
+
+broker_metrics = BaseOpenapi(
+    summary='Получить метрики отправки данных о просмотре в брокер',
+    description='Счётчики текущего процесса сервиса: принятые, отклонённые '
+                'из-за переполнения буфера, доставленные и не доставленные '
+                'сообщения, а также размер буфера. Доступно пользователям с '
+                'разрешением ugc-reader или ugc-manager',
+    response_description='Метрики отправки сообщений'
+)
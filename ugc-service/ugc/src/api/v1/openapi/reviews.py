@@ -13,8 +13,9 @@ remove = BaseOpenapi(
 )
 
 get = BaseOpenapi(
-    summary='Получить все рецензии к фильму',
-    description='',
+    summary='Получить рецензии к фильму',
+    description='Рецензии выдаются постранично с количеством лайков и '
+                'дизлайков, сортировка по дате или по полезности',
     response_description='Список рецензий к фильму'
 )
 
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import sys
+
+from src.commands import rating_summary, review_counters
+from src.core.config import settings
+from src.db import mongo
+from src.services.rating_storage import get_movies_rating_storage
+from src.services.reviews_storage import get_reviews_storage
+
+
+def get_duplicates_pipeline(keys: list[str]) -> list[dict]:
+    """Группы документов с одинаковыми значениями полей keys. В каждой
+    группе остаётся документ с наибольшим _id (записанный последним)."""
+    return [
+        {'$group': {
+            '_id': {key: f'${key}' for key in keys},
+            'keep': {'$max': '$_id'},
+            'count': {'$sum': 1},
+        }},
+        {'$match': {'count': {'$gt': 1}}},
+    ]
+
+
+async def count_duplicates(collection, keys: list[str]) -> int:
+    """Возвращает кол-во лишних документов, мешающих уникальному индексу."""
+    return sum([
+        group['count'] - 1
+        async for group in collection.aggregate(
+            get_duplicates_pipeline(keys), allowDiskUse=True
+        )
+    ])
+
+
+async def remove_duplicates(collection, keys: list[str]) -> int:
+    """Удаляет лишние документы из каждой группы дубликатов.
+    :return: кол-во удалённых документов
+    """
+    removed = 0
+    async for group in collection.aggregate(
+            get_duplicates_pipeline(keys), allowDiskUse=True
+    ):
+        result = await collection.delete_many(
+            {**group['_id'], '_id': {'$ne': group['keep']}}
+        )
+        removed += result.deleted_count
+    return removed
+
+
+async def rebuild_rating_summaries() -> None:
+    storage = get_movies_rating_storage()
+    differences, stale = await rating_summary.get_differences(storage)
+    fixed = await rating_summary.rebuild(storage, differences, stale)
+    print(f'Исправлено сводок оценок фильмов: {fixed}')
+
+
+async def rebuild_review_counters() -> None:
+    storage = get_reviews_storage()
+    differences = await review_counters.get_differences(storage)
+    fixed = await review_counters.rebuild(storage, differences)
+    print(f'Исправлено счётчиков рецензий: {fixed}')
+
+
+def get_aggregates_rebuilders() -> dict:
+    """Пересборка агрегатов, которые учитывали удалённые документы."""
+    return {
+        settings.mongo.movies_rating_collection: rebuild_rating_summaries,
+        settings.mongo.reviews_rating_collection: rebuild_review_counters,
+    }
+
+
+async def main():
+    """Проверяет наличие или удаляет дубликаты, из-за которых при запуске
+    сервиса не строятся уникальные индексы (записаны конкурентными
+    запросами до появления индексов).
+
+    Из каждой группы дубликатов остаётся последний записанный документ,
+    после удаления пересобираются агрегаты, учитывавшие удалённые
+    документы. Команду нужно выполнить один раз, если в журнале сервиса
+    есть ошибка создания индекса, затем перезапустить сервис; повторный
+    запуск безопасен.
+    """
+    parser = argparse.ArgumentParser(
+        description='Проверка и удаление дубликатов для уникальных индексов'
+    )
+    parser.add_argument('action', choices=('verify', 'remove'),
+                        help='Проверить наличие или удалить дубликаты')
+    args = parser.parse_args()
+
+    mongo.mongo_client = mongo.get_mongo_client()
+    try:
+        database = mongo.get_database()
+        rebuilders = get_aggregates_rebuilders()
+        total = 0
+        for collection_name, indexes in mongo.get_unique_indexes().items():
+            collection = database[collection_name]
+            for index in indexes:
+                keys = list(index.document['key'])
+                if args.action == 'verify':
+                    count = await count_duplicates(collection, keys)
+                else:
+                    count = await remove_duplicates(collection, keys)
+                total += count
+                print(f'{collection_name} ({", ".join(keys)}): {count}')
+
+            if args.action == 'remove' and collection_name in rebuilders:
+                await rebuilders[collection_name]()
+
+        if args.action == 'verify':
+            return int(bool(total))
+        return 0
+    finally:
+        mongo.mongo_client.close()
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import sys
+import time
+from uuid import UUID
+
+from redis.asyncio import Redis
+from src.core.config import PROGRESS_KEY, RECENT_KEY, settings
+
+# Прежний формат: отдельная строка на каждую пару пользователь+фильм
+LEGACY_KEY_PATTERN = '*+*'
+
+
+def parse_legacy_key(key: bytes) -> tuple[str, str] | None:
+    """Разбирает ключ '{user_id}+{film_id}'.
+    :return: id пользователя и id фильма или None для ключей другого формата
+    """
+    user_id, _, film_id = key.decode().rpartition('+')
+    try:
+        UUID(film_id)
+    except ValueError:
+        return None
+    return (user_id, film_id) if user_id else None
+
+
+async def migrate_batch(storage: Redis, keys: list[bytes], watched_at: int,
+                        ttl: int, recent_size: int) -> int:
+    """Переносит прогресс из ключей прежнего формата в хэш прогресса и
+    сортированное множество недавно просмотренных фильмов и удаляет их.
+    Значения, уже записанные etl-progress, не перезаписываются.
+    :return: кол-во перенесённых ключей
+    """
+    parsed = {key: parse_legacy_key(key) for key in keys}
+    keys = [key for key, user_film in parsed.items() if user_film]
+    if not keys:
+        return 0
+
+    values = await storage.mget(keys)
+    users = set()
+    async with storage.pipeline(transaction=True) as pipeline:
+        for key, value in zip(keys, values):
+            if value is None:
+                continue
+            user_id, film_id = parsed[key]
+            users.add(user_id)
+            pipeline.hsetnx(PROGRESS_KEY.format(user_id=user_id),
+                            film_id, value)
+            pipeline.zadd(RECENT_KEY.format(user_id=user_id),
+                          {film_id: watched_at}, nx=True)
+        for user_id in users:
+            recent_key = RECENT_KEY.format(user_id=user_id)
+            pipeline.zremrangebyrank(recent_key, 0, -recent_size - 1)
+            pipeline.expire(PROGRESS_KEY.format(user_id=user_id), ttl)
+            pipeline.expire(recent_key, ttl)
+        pipeline.delete(*keys)
+        await pipeline.execute()
+    return len(keys)
+
+
+async def migrate_all(storage: Redis, watched_at: int,
+                      args: argparse.Namespace) -> int:
+    """Один проход SCAN по ключам прежнего формата.
+    :return: кол-во перенесённых ключей
+    """
+    migrated = 0
+    batch = []
+    async for key in storage.scan_iter(match=LEGACY_KEY_PATTERN,
+                                       count=args.batch_size):
+        batch.append(key)
+        if len(batch) >= args.batch_size:
+            migrated += await migrate_batch(storage, batch, watched_at,
+                                            args.ttl, args.recent_size)
+            batch = []
+    if batch:
+        migrated += await migrate_batch(storage, batch, watched_at,
+                                        args.ttl, args.recent_size)
+    return migrated
+
+
+async def main():
+    """Проверяет наличие или переносит прогресс просмотра, записанный до
+    перехода на хэши прогресса пользователей.
+
+    Время просмотра в прежнем формате не хранилось, поэтому перенесённые
+    фильмы попадают в недавно просмотренные со временем переноса. Команду
+    достаточно выполнить один раз после обновления сервиса; повторный
+    запуск безопасен.
+    """
+    parser = argparse.ArgumentParser(
+        description='Перенос прогресса просмотра из ключей прежнего формата'
+    )
+    parser.add_argument('action', choices=('verify', 'migrate'),
+                        help='Проверить наличие или перенести ключи')
+    parser.add_argument('--ttl', type=int, default=30 * 24 * 60 * 60,
+                        help='Время жизни прогресса пользователя (секунд)')
+    parser.add_argument('--recent-size', type=int, default=100,
+                        help='Кол-во хранимых недавно просмотренных фильмов')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Кол-во ключей, переносимых за раз')
+    args = parser.parse_args()
+
+    storage = Redis(host=settings.redis.host, port=settings.redis.port)
+    watched_at = int(time.time() * 1000)
+    try:
+        if args.action == 'verify':
+            count = sum([
+                parse_legacy_key(key) is not None
+                async for key in storage.scan_iter(match=LEGACY_KEY_PATTERN,
+                                                   count=args.batch_size)
+            ])
+            print(f'Ключей прогресса прежнего формата: {count}')
+            return int(bool(count))
+
+        # Удаление ключей во время SCAN может сдвинуть курсор, поэтому
+        # проходы повторяются, пока находятся ключи для переноса
+        count = 0
+        while migrated := await migrate_all(storage, watched_at, args):
+            count += migrated
+        print(f'Перенесено ключей прогресса: {count}')
+        return 0
+    finally:
+        await storage.close()
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
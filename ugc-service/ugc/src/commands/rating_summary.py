@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import sys
+
+from pymongo import DeleteOne, ReplaceOne
+from src.db import mongo
+from src.services.rating_storage import get_movies_rating_storage
+
+SUMMARY_FIELDS = ('sum', 'count', 'likes', 'dislikes')
+
+
+async def get_differences(storage) -> tuple[list[dict], list]:
+    """Сравнивает сводки с агрегацией по всем оценкам.
+    :return: ожидаемые сводки, отличающиеся от сохранённых, и id сводок
+    объектов, у которых нет оценок
+    """
+    expected = {
+        summary['_id']: summary
+        async for summary in storage.collection.aggregate(
+            storage.get_summary_pipeline(), allowDiskUse=True
+        )
+    }
+
+    stale = []
+    async for summary in storage.summary_collection.find():
+        expected_summary = expected.get(summary['_id'])
+        if expected_summary is None:
+            if any(summary.get(field) for field in SUMMARY_FIELDS):
+                stale.append(summary['_id'])
+            continue
+        if all(summary.get(field) == expected_summary[field]
+               for field in SUMMARY_FIELDS):
+            del expected[summary['_id']]
+
+    return list(expected.values()), stale
+
+
+async def rebuild(storage, differences: list[dict], stale: list) -> int:
+    """Заменяет расходящиеся сводки и удаляет сводки без оценок.
+    :return: кол-во исправленных сводок
+    """
+    requests = [
+        ReplaceOne({'_id': summary['_id']}, summary, upsert=True)
+        for summary in differences
+    ] + [DeleteOne({'_id': obj_id}) for obj_id in stale]
+    if requests:
+        await storage.summary_collection.bulk_write(requests, ordered=False)
+    return len(requests)
+
+
+async def main():
+    """Проверяет или пересобирает сводки оценок фильмов.
+
+    Пересборка заменяет только расходящиеся сводки. Оценки, записанные во
+    время пересборки, могут быть потеряны в заменяемых сводках, поэтому
+    после неё стоит повторить проверку.
+    """
+    parser = argparse.ArgumentParser(
+        description='Проверка и пересборка сводок оценок фильмов'
+    )
+    parser.add_argument('action', choices=('verify', 'rebuild'),
+                        help='Проверить или пересобрать сводки')
+    args = parser.parse_args()
+
+    mongo.mongo_client = mongo.get_mongo_client()
+    try:
+        storage = get_movies_rating_storage()
+        differences, stale = await get_differences(storage)
+        print(f'Расходящихся сводок: {len(differences)}, '
+              f'сводок без оценок: {len(stale)}')
+
+        if args.action == 'verify':
+            return int(bool(differences or stale))
+
+        fixed = await rebuild(storage, differences, stale)
+        print(f'Исправлено сводок: {fixed}')
+        return 0
+    finally:
+        mongo.mongo_client.close()
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
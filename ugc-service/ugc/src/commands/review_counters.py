@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import sys
+
+from pymongo import UpdateOne
+from src.db import mongo
+from src.services.reviews_storage import get_reviews_storage
+
+COUNTER_FIELDS = ('likes', 'dislikes')
+
+
+async def get_differences(storage) -> dict:
+    """Сравнивает счётчики лайков и дизлайков рецензий с агрегацией по
+    оценкам рецензий.
+    :return: id рецензии -> ожидаемые счётчики для рецензий, счётчики
+    которых отличаются от сохранённых или отсутствуют
+    """
+    rating_storage = storage.rating_storage
+    expected = {
+        summary['_id']: summary
+        async for summary in rating_storage.collection.aggregate(
+            rating_storage.get_summary_pipeline(), allowDiskUse=True
+        )
+    }
+
+    differences = {}
+    async for review in storage.collection.find(
+            {}, {field: True for field in COUNTER_FIELDS}
+    ):
+        expected_counters = expected.get(review['_id'], {})
+        counters = {
+            field: expected_counters.get(field, 0) for field in COUNTER_FIELDS
+        }
+        if any(review.get(field) != counters[field]
+               for field in COUNTER_FIELDS):
+            differences[review['_id']] = counters
+
+    return differences
+
+
+async def rebuild(storage, differences: dict) -> int:
+    """Записывает ожидаемые счётчики в рецензии.
+    :return: кол-во исправленных рецензий
+    """
+    requests = [
+        UpdateOne({'_id': review_id}, {'$set': counters})
+        for review_id, counters in differences.items()
+    ]
+    if requests:
+        await storage.collection.bulk_write(requests, ordered=False)
+    return len(requests)
+
+
+async def main():
+    """Проверяет или пересобирает счётчики лайков и дизлайков рецензий.
+
+    Рецензии, записанные до появления счётчиков, их не содержат: после
+    обновления сервиса счётчики нужно собрать один раз. Оценки, записанные
+    во время пересборки, могут быть потеряны в заменяемых счётчиках,
+    поэтому после неё стоит повторить проверку.
+    """
+    parser = argparse.ArgumentParser(
+        description='Проверка и пересборка счётчиков оценок рецензий'
+    )
+    parser.add_argument('action', choices=('verify', 'rebuild'),
+                        help='Проверить или пересобрать счётчики')
+    args = parser.parse_args()
+
+    mongo.mongo_client = mongo.get_mongo_client()
+    try:
+        storage = get_reviews_storage()
+        differences = await get_differences(storage)
+        print(f'Рецензий с расходящимися счётчиками: {len(differences)}')
+
+        if args.action == 'verify':
+            return int(bool(differences))
+
+        print(f'Исправлено рецензий: {await rebuild(storage, differences)}')
+        return 0
+    finally:
+        mongo.mongo_client.close()
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -5,6 +5,9 @@ class ProjectSettings(BaseSettings):
     name: str = Field(env='PROJECT_NAME')
     port: int = Field(env='UGC_PORT')
     default_page_size: int = Field(env='DEFAULT_PAGE_SIZE')
+    max_page_size: int = Field(100, env='MAX_PAGE_SIZE')
+    max_progress_films: int = Field(100, env='MAX_PROGRESS_FILMS')
+    max_bookmarks_sync: int = Field(100, env='MAX_BOOKMARKS_SYNC')
     like_score: int = 10
     dislike_score: int = 0
 
@@ -18,6 +21,12 @@ class KafkaSettings(BaseSettings):
     host: str = Field(env='KAFKA_HOST')
     port: int = Field(env='KAFKA_PORT')
     views_topic: str = Field(env='KAFKA_VIEWS_TOPIC')
+    buffer_size: int = Field(10000, env='KAFKA_BUFFER_SIZE')
+    linger_ms: int = Field(20, env='KAFKA_LINGER_MS')
+    max_batch_size: int = Field(65536, env='KAFKA_MAX_BATCH_SIZE')
+    compression_type: str = Field('gzip', env='KAFKA_COMPRESSION_TYPE')
+    acks: int = Field(1, env='KAFKA_ACKS')
+    shutdown_timeout_s: float = Field(5, env='KAFKA_SHUTDOWN_TIMEOUT')
 
 
 class RedisSettings(BaseSettings):
@@ -31,14 +40,27 @@ class MongoSettings(BaseSettings):
     dbname: str = Field(env='MONGO_DBNAME')
     bookmarks_collection: str = Field(env='MONGO_BOOKMARKS_COLLECTION_NAME')
     movies_rating_collection: str = Field(env='MONGO_MOVIES_RATING_COLLECTION_NAME')  # noqa:E501
+    movies_rating_summary_collection: str = Field(
+        'movies_rating_summary',
+        env='MONGO_MOVIES_RATING_SUMMARY_COLLECTION_NAME'
+    )
     reviews_collection: str = Field(env='MONGO_REVIEWS_COLLECTION_NAME')
     reviews_rating_collection: str = Field(env='MONGO_REVIEWS_RATING_COLLECTION_NAME')  # noqa:E501
+    max_pool_size: int = Field(100, env='MONGO_MAX_POOL_SIZE')
+    min_pool_size: int = Field(0, env='MONGO_MIN_POOL_SIZE')
 
     @property
     def connection_uri(self):
         return f'mongodb://{self.host}:{self.port}/'
 
 
+# Прогресс пользователя хранится в хэше (id фильма -> секунда просмотра),
+# недавно просмотренные фильмы - в сортированном множестве (id фильма ->
+# время просмотра). Форматы ключей совпадают с etl-progress.
+PROGRESS_KEY = 'progress:{user_id}'
+RECENT_KEY = 'recent:{user_id}'
+
+
 class Settings(BaseSettings):
     project: ProjectSettings = ProjectSettings()
     jwt: JWTSettings = JWTSettings()
@@ -0,0 +1,120 @@
+import logging
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from src.core.config import settings
+
+DUPLICATE_KEY_ERROR = 11000
+CANNOT_CONVERT_INDEX_TO_UNIQUE_ERROR = 359
+
+mongo_client: Optional[AsyncIOMotorClient] = None
+
+
+def get_mongo_client() -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(
+        settings.mongo.connection_uri,
+        uuidRepresentation='standard',
+        maxPoolSize=settings.mongo.max_pool_size,
+        minPoolSize=settings.mongo.min_pool_size
+    )
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    return mongo_client[settings.mongo.dbname]
+
+
+def get_indexes() -> dict[str, list[IndexModel]]:
+    """Индексы коллекций под все фильтры, используемые хранилищами."""
+    return {
+        settings.mongo.bookmarks_collection: [
+            IndexModel([('user_id', ASCENDING), ('film_id', ASCENDING)],
+                       name='user_id_film_id', unique=True),
+            # Покрывает постраничное чтение закладок: фильтр по user_id,
+            # курсор и сортировка по _id, в ответе только film_id
+            IndexModel([('user_id', ASCENDING), ('_id', DESCENDING),
+                        ('film_id', ASCENDING)],
+                       name='user_id_id_film_id'),
+        ],
+        settings.mongo.movies_rating_collection: [
+            # Уникальность оценки пользователя: без неё конкурентные upsert
+            # создают повторные оценки и искажают сводки оценок фильмов
+            IndexModel([('film_id', ASCENDING), ('user_id', ASCENDING)],
+                       name='film_id_user_id', unique=True),
+            IndexModel([('film_id', ASCENDING), ('score', ASCENDING)],
+                       name='film_id_score'),
+        ],
+        settings.mongo.reviews_collection: [
+            IndexModel([('film_id', ASCENDING), ('user_id', ASCENDING)],
+                       name='film_id_user_id'),
+            IndexModel([('film_id', ASCENDING), ('created_at', ASCENDING),
+                        ('_id', ASCENDING)],
+                       name='film_id_created_at'),
+            IndexModel([('film_id', ASCENDING), ('likes', ASCENDING),
+                        ('_id', ASCENDING)],
+                       name='film_id_likes'),
+        ],
+        settings.mongo.reviews_rating_collection: [
+            # Уникальность оценки пользователя: без неё конкурентные upsert
+            # создают повторные оценки и искажают счётчики рецензий. Индекс
+            # начинается с ключа шардирования, как требует mongo для
+            # уникальных индексов.
+            IndexModel([('review_id', ASCENDING), ('user_id', ASCENDING)],
+                       name='review_id_user_id', unique=True),
+            IndexModel([('review_id', ASCENDING), ('score', ASCENDING)],
+                       name='review_id_score'),
+        ],
+    }
+
+
+def get_unique_indexes() -> dict[str, list[IndexModel]]:
+    """Уникальные индексы коллекций (см. src.commands.duplicates)."""
+    return {
+        collection_name: unique
+        for collection_name, indexes in get_indexes().items()
+        if (unique := [index for index in indexes
+                       if index.document.get('unique')])
+    }
+
+
+async def convert_to_unique(database: AsyncIOMotorDatabase,
+                            collection_name: str, name: str) -> None:
+    """Делает существующий индекс уникальным без перестроения: сначала
+    индекс запрещает запись новых дубликатов, затем проверяются
+    существующие документы. Если дубликаты есть, индекс остаётся
+    неуникальным, но продолжает запрещать новые."""
+    for option in ('prepareUnique', 'unique'):
+        await database.command('collMod', collection_name,
+                               index={'name': name, option: True})
+
+
+async def create_indexes() -> None:
+    """Создаёт недостающие индексы коллекций. Существующий индекс,
+    ставший уникальным, преобразуется на месте: уникальные индексы должны
+    начинаться с ключа шардирования, поэтому совпадают по полям с прежними
+    неуникальными. Если уникальный индекс не построен из-за дубликатов,
+    записанных до его появления, прежний индекс продолжает работать, а
+    дубликаты нужно удалить командой src.commands.duplicates: при запуске
+    сервиса данные не удаляются."""
+    database = get_database()
+    for collection_name, indexes in get_indexes().items():
+        collection = database[collection_name]
+        existing = await collection.index_information()
+        for index in indexes:
+            document = index.document
+            try:
+                if (document.get('unique')
+                        and document['name'] in existing
+                        and not existing[document['name']].get('unique')):
+                    await convert_to_unique(database, collection_name,
+                                            document['name'])
+                else:
+                    await collection.create_indexes([index])
+            except OperationFailure as err:
+                if err.code not in (DUPLICATE_KEY_ERROR,
+                                    CANNOT_CONVERT_INDEX_TO_UNIQUE_ERROR):
+                    raise
+                logging.error('Индекс %s коллекции %s не создан из-за '
+                              'дубликатов: %s', index.document['name'],
+                              collection_name, err)
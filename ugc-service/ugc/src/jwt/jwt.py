@@ -10,7 +10,12 @@ def login_required(required_permissions: list[str] | None = None):
     """Декоратор для авторизации пользователя по jwt токену. Если установлен
     параметр required_permissions, то в случае отсутствия указанного разрешения
     в списке разрешений пользователя, находящемся в jwt токене, выбрасывается
-    исключение."""
+    исключение. Набор разрешений, дающих доступ, формируется один раз при
+    объявлении эндпоинта."""
+    allowed_permissions = frozenset(
+        {SUPERUSER_PERMISSION, *required_permissions}
+    ) if required_permissions else None
+
     def wrapper(func):
         @wraps(func)
         async def inner(*args, **kwargs):
@@ -25,10 +30,10 @@ def login_required(required_permissions: list[str] | None = None):
 
             await authorize.jwt_required()
 
-            if required_permissions:
+            if allowed_permissions:
                 raw_jwt = await authorize.get_raw_jwt()
                 user_permissions = raw_jwt.get('permissions')
-                _check_permission(user_permissions, required_permissions)
+                _check_permission(user_permissions, allowed_permissions)
 
             return await func(*args, **kwargs)
         return inner
@@ -36,13 +41,12 @@ def login_required(required_permissions: list[str] | None = None):
 
 
 def _check_permission(
-        user_permissions: list[str],
-        required_permissions: list[str]
+        user_permissions: list[str] | None,
+        allowed_permissions: frozenset[str]
 ) -> None:
-    """Проверяет наличие требуемого разрешения, среди пользовательских."""
-    allowed_permissions = {SUPERUSER_PERMISSION, *required_permissions}
-
-    if not allowed_permissions & {*user_permissions}:
+    """Проверяет наличие разрешения, дающего доступ, среди
+    пользовательских."""
+    if allowed_permissions.isdisjoint(user_permissions or ()):
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN,
             detail='Permission denied'
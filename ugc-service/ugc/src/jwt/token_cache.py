@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from hashlib import sha256
+from time import time
+from typing import Optional
+
+from async_fastapi_jwt_auth import AuthJWT as BaseAuthJWT
+
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_TTL_S = 60
+
+
+class TokenCache:
+    """Ограниченный по размеру LRU-кэш проверенных jwt токенов. Ключом
+    служит хэш токена, значением - его claims. Запись живёт не дольше
+    срока действия токена (exp) и не дольше ttl."""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE,
+                 ttl: float = TOKEN_CACHE_TTL_S):
+        self.storage: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self.max_size = max_size
+        self.ttl = ttl
+
+    @staticmethod
+    def get_key(encoded_token: str, issuer: Optional[str]) -> tuple:
+        return sha256(encoded_token.encode()).digest(), issuer
+
+    def get(self, key: tuple) -> Optional[dict]:
+        item = self.storage.get(key)
+        if item is None:
+            return None
+
+        expire_at, claims = item
+        if expire_at <= time():
+            del self.storage[key]
+            return None
+
+        self.storage.move_to_end(key)
+        return claims
+
+    def set(self, key: tuple, claims: dict) -> None:
+        expire_at = time() + self.ttl
+        if 'exp' in claims:
+            expire_at = min(expire_at, claims['exp'])
+        self.storage[key] = (expire_at, claims)
+        self.storage.move_to_end(key)
+        while len(self.storage) > self.max_size:
+            self.storage.popitem(last=False)
+
+
+token_cache = TokenCache()
+
+
+class AuthJWT(BaseAuthJWT):
+    """AuthJWT, не проверяющий подпись одного и того же токена повторно.
+    Библиотека декодирует токен при каждом обращении к claims (проверка
+    токена, get_raw_jwt, get_jwt_subject), здесь результат проверки
+    берётся из кэша. Проверка отзыва токена (denylist) выполняется как
+    прежде."""
+
+    async def _verified_token(self, encoded_token: str,
+                              issuer: Optional[str] = None) -> dict:
+        key = token_cache.get_key(encoded_token, issuer)
+        claims = token_cache.get(key)
+        if claims is None:
+            claims = await super()._verified_token(encoded_token, issuer)
+            token_cache.set(key, claims)
+        return claims
@@ -2,7 +2,9 @@ from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 from src.api.v1.routers import v1_router
 from src.core.config import settings
+from src.db import mongo
 from src.jwt import AuthJWT, AuthJWTException, authjwt_exception_handler
+from src.services.broker import get_broker
 
 app = FastAPI(
     title=settings.project.name,
@@ -14,6 +16,19 @@ app = FastAPI(
 app.include_router(v1_router)
 
 
+@app.on_event('startup')
+async def startup():
+    mongo.mongo_client = mongo.get_mongo_client()
+    await mongo.create_indexes()
+    await get_broker().start()
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    await get_broker().stop()
+    mongo.mongo_client.close()
+
+
 @AuthJWT.load_config
 def get_config():
     """Сервисная функция библиотеки fastapi-jwt-auth для загрузки настроек."""
@@ -1,2 +1,3 @@
 # flake8: noqa:F401
-from .review import ReviewCreate
+from .bookmark import BookmarksSync, BookmarksSyncResult
+from .review import ReviewCreate, ReviewSort
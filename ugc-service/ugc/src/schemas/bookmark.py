@@ -0,0 +1,27 @@
+from uuid import UUID
+
+from pydantic import BaseModel, Field, root_validator
+from src.core.config import settings
+
+
+class BookmarksSync(BaseModel):
+    """Изменения локального списка закладок устройства."""
+    add: list[UUID] = Field(
+        [], max_items=settings.project.max_bookmarks_sync
+    )
+    remove: list[UUID] = Field(
+        [], max_items=settings.project.max_bookmarks_sync
+    )
+
+    @root_validator(skip_on_failure=True)
+    @classmethod
+    def check_disjoint(cls, values):
+        if set(values['add']) & set(values['remove']):
+            raise ValueError('Фильм не может быть одновременно добавлен и '
+                             'удалён')
+        return values
+
+
+class BookmarksSyncResult(BaseModel):
+    added: int
+    removed: int
@@ -1,5 +1,14 @@
+from enum import Enum
+
 from pydantic import BaseModel
 
 
 class ReviewCreate(BaseModel):
     text: str
+
+
+class ReviewSort(str, Enum):
+    """Варианты сортировки рецензий: по дате и по полезности (лайкам)."""
+    newest = '-created_at'
+    oldest = 'created_at'
+    helpful = '-likes'
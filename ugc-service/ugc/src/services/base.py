@@ -9,7 +9,21 @@ class AbstractBroker(ABC):
         self.broker = broker
 
     @abstractmethod
-    async def send(self, user_id: int, film_id: UUID, timestamp: int):
+    async def start(self):
+        pass
+
+    @abstractmethod
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def send(self, user_id: int, film_id: UUID, timestamp: int) -> bool:
+        """Ставит сообщение в очередь на отправку. Возвращает False, если
+        сообщение не принято из-за переполнения буфера."""
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Any:
         pass
 
 
@@ -23,6 +37,15 @@ class AbstractProgressStorage(ABC):
     async def get(self, user_id: int, film_id: UUID) -> int | None:
         pass
 
+    @abstractmethod
+    async def get_many(self, user_id: int,
+                       film_ids: list[UUID]) -> dict[UUID, int | None]:
+        pass
+
+    @abstractmethod
+    async def get_recent(self, user_id: int, size: int) -> list[dict]:
+        pass
+
 
 class AbstractBookmarkStorage(ABC):
     """Абстратный класс, представляющий хранилище закладок пользователей."""
@@ -35,18 +58,26 @@ class AbstractBookmarkStorage(ABC):
         pass
 
     @abstractmethod
-    async def get(self, user_id: int, offset: int, size: int) -> list[UUID]:
+    async def get(self, user_id: int, size: int, cursor: str | None = None,
+                  offset: int = 0) -> Any:
+        """Возвращает страницу закладок, начиная с курсора или смещения, и
+        курсор следующей страницы."""
+        pass
+
+    @abstractmethod
+    async def sync(self, user_id: int, add: list[UUID],
+                   remove: list[UUID]) -> Any:
         pass
 
 
 class AbstractRatingStorage(ABC):
     """Абстрактный класс, представляющий хранилище рейтинга."""
     @abstractmethod
-    async def add_or_update_score(self, user_id: int, obj_id: UUID, score: int):  # noqa:E501
+    async def add_or_update_score(self, user_id: int, obj_id: UUID, score: int) -> int | None:  # noqa:E501
         pass
 
     @abstractmethod
-    async def remove_score(self, user_id: int, obj_id: UUID):
+    async def remove_score(self, user_id: int, obj_id: UUID) -> int:
         pass
 
     @abstractmethod
@@ -73,7 +104,8 @@ class AbstractReviewStorage(ABC):
         pass
 
     @abstractmethod
-    async def get_all(self, film_id: UUID) -> list[Any]:
+    async def get_all(self, film_id: UUID, sort: str, offset: int,
+                      size: int) -> list[Any]:
         pass
 
     @abstractmethod
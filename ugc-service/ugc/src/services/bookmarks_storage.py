@@ -1,41 +1,110 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
 from uuid import UUID
 
-import motor.motor_asyncio as motor
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING, DeleteOne, InsertOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from src.core.config import settings
+from src.db.mongo import DUPLICATE_KEY_ERROR, get_database
 from src.db.mongo_base import MongoBase
+from src.schemas import BookmarksSyncResult
 from src.services.base import AbstractBookmarkStorage
-from src.utils.exceptions import AlreadyExistsException, NotFoundException
+from src.utils.exceptions import (AlreadyExistsException, BadRequestException,
+                                  NotFoundException)
 
 
 class MongoBookmarksStorage(MongoBase, AbstractBookmarkStorage):
     async def add(self, user_id: int, film_id: UUID):
-        _filter = {'user_id': user_id, 'film_id': film_id}
-        if await self._check_if_exists(_filter):
+        try:
+            await self.collection.insert_one(
+                {'user_id': user_id, 'film_id': film_id}
+            )
+        except DuplicateKeyError:
             raise AlreadyExistsException('Такая закладка уже существует')
 
-        await self.collection.insert_one({**_filter})
-
     async def remove(self, user_id: int, film_id: UUID):
-        _filter = {'user_id': user_id, 'film_id': film_id}
-        if not await self._check_if_exists(_filter):
+        result = await self.collection.delete_one(
+            {'user_id': user_id, 'film_id': film_id}
+        )
+        if not result.deleted_count:
             raise NotFoundException('Такой закладки не существует')
 
-        await self.collection.delete_one(_filter)
+    async def get(self, user_id: int, size: int, cursor: str | None = None,
+                  offset: int = 0) -> tuple[list[UUID], str | None]:
+        """Закладки читаются от новых к старым по _id (время добавления)
+        запросом, покрытым индексом user_id_id_film_id. Читается на одну
+        закладку больше, чтобы узнать, есть ли следующая страница.
+        :param cursor: курсор из предыдущей страницы. Если передан, offset
+        не применяется
+        :param offset: смещение от начала списка, оставлено для
+        совместимости: стоимость запроса растёт с номером страницы
+        :return: id фильмов и курсор следующей страницы (None, если
+        страница последняя)
+        """
+        _filter = {'user_id': user_id}
+        if cursor is not None:
+            _filter['_id'] = {'$lt': self._decode_cursor(cursor)}
+        query = self.collection.find(_filter, {'_id': 1, 'film_id': 1})
+        if cursor is None and offset:
+            query = query.skip(offset)
+
+        bookmarks = await (
+            query.sort('_id', DESCENDING)
+            .hint('user_id_id_film_id')
+            .limit(size + 1)
+            .to_list(length=None)
+        )
+
+        next_cursor = None
+        if len(bookmarks) > size:
+            bookmarks = bookmarks[:size]
+            next_cursor = self._encode_cursor(bookmarks[-1]['_id'])
+
+        return [bookmark['film_id'] for bookmark in bookmarks], next_cursor
 
-    async def get(self, user_id: int, offset: int, size: int) -> list[UUID]:
-        bookmarks = await self.collection.find(
-            {'user_id': user_id}
-        ).skip(offset).limit(size).to_list(length=None)
-        return [bookmark['film_id'] for bookmark in bookmarks]
+    async def sync(self, user_id: int, add: list[UUID],
+                   remove: list[UUID]) -> BookmarksSyncResult:
+        """Добавляет и удаляет закладки одной неупорядоченной пакетной
+        операцией. Уже существующие закладки пропускаются."""
+        requests = [
+            InsertOne({'user_id': user_id, 'film_id': film_id})
+            for film_id in add
+        ] + [
+            DeleteOne({'user_id': user_id, 'film_id': film_id})
+            for film_id in remove
+        ]
+        if not requests:
+            return BookmarksSyncResult(added=0, removed=0)
+
+        try:
+            result = await self.collection.bulk_write(requests, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as err:
+            details = err.details
+            if any(error['code'] != DUPLICATE_KEY_ERROR
+                   for error in details['writeErrors']):
+                raise
+
+        return BookmarksSyncResult(added=details['nInserted'],
+                                   removed=details['nRemoved'])
+
+    @staticmethod
+    def _encode_cursor(_id: ObjectId) -> str:
+        return urlsafe_b64encode(_id.binary).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> ObjectId:
+        try:
+            return ObjectId(urlsafe_b64decode(cursor.encode()))
+        except (DecodeError, InvalidId, ValueError):
+            raise BadRequestException('Некорректный курсор')
 
 
 def get_bookmarks_storage() -> AbstractBookmarkStorage:
-    client = motor.AsyncIOMotorClient(settings.mongo.connection_uri,
-                                      uuidRepresentation='standard')
-    database = motor.AsyncIOMotorDatabase(client, settings.mongo.dbname)
+    database = get_database()
 
     return MongoBookmarksStorage(
-        motor.AsyncIOMotorCollection(
-            database, settings.mongo.bookmarks_collection
-        )
+        database[settings.mongo.bookmarks_collection]
     )
@@ -1,36 +1,117 @@
+import asyncio
+import logging
+from contextlib import suppress
 from functools import cache
 from uuid import UUID
 
 from aiokafka import AIOKafkaProducer
+from aiokafka.errors import KafkaError
+from pydantic import BaseModel
 from src.core.config import settings
 from src.services.base import AbstractBroker
 
 
+class BrokerMetrics(BaseModel):
+    """Счётчики отправки сообщений в брокер."""
+    enqueued: int = 0
+    rejected: int = 0
+    delivered: int = 0
+    failed: int = 0
+    buffered: int = 0
+
+
 class KafkaBroker(AbstractBroker):
-    def __init__(self, host: str, port: int, topic: str):
+    """Отправка сообщений в kafka без ожидания доставки. Сообщения
+    складываются в ограниченный буфер, откуда фоновая задача передаёт их
+    продюсеру, собирающему пачки (linger, сжатие). Если буфер заполнен,
+    сообщение отклоняется."""
+    def __init__(self, host: str, port: int, topic: str,
+                 buffer_size: int = settings.kafka.buffer_size):
         self.bootstrap_server = f'{host}:{port}'
         self.topic = topic
+        self.buffer: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.metrics = BrokerMetrics()
+        self._sender: asyncio.Task | None = None
         super().__init__(None)
 
-    async def init(self):
-        # https://github.com/aio-libs/aiokafka/issues/689
+    async def start(self):
         self.broker = AIOKafkaProducer(
-            bootstrap_servers=[self.bootstrap_server]
+            bootstrap_servers=[self.bootstrap_server],
+            linger_ms=settings.kafka.linger_ms,
+            max_batch_size=settings.kafka.max_batch_size,
+            compression_type=settings.kafka.compression_type,
+            acks=settings.kafka.acks
         )
         await self.broker.start()
+        self._start_sender()
 
-    async def send(self, user_id: int, film_id: UUID, timestamp: int):
-        if self.broker is None:
-            await self.init()
+    async def stop(self):
+        try:
+            await asyncio.wait_for(self.buffer.join(),
+                                   settings.kafka.shutdown_timeout_s)
+        except asyncio.TimeoutError:
+            logging.warning('Не отправлено сообщений при остановке: %s',
+                            self.buffer.qsize())
+        self._sender.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._sender
+        await self.broker.stop()
 
-        await self.broker.send(
-            topic=self.topic,
-            key=f'{user_id}+{film_id}'.encode(),
-            value=f'{timestamp}'.encode()
-        )
+    async def send(self, user_id: int, film_id: UUID, timestamp: int) -> bool:
+        try:
+            self.buffer.put_nowait((user_id, film_id, timestamp))
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            return False
+        self.metrics.enqueued += 1
+        return True
+
+    def get_metrics(self) -> BrokerMetrics:
+        self.metrics.buffered = self.buffer.qsize()
+        return self.metrics
+
+    def _start_sender(self):
+        self._sender = asyncio.create_task(self._send_buffered())
+        self._sender.add_done_callback(self._on_sender_done)
+
+    def _on_sender_done(self, sender: asyncio.Task):
+        """Перезапускает задачу отправки, завершившуюся непредвиденной
+        ошибкой (отправляемое сообщение
+        теряется): без неё буфер заполняется и все сообщения отклоняются."""
+        if sender.cancelled():
+            return
+        self.metrics.failed += 1
+        logging.error('Задача отправки сообщений в kafka завершилась с '
+                      'ошибкой, перезапуск', exc_info=sender.exception())
+        self._start_sender()
+
+    async def _send_buffered(self):
+        """Передаёт сообщения из буфера продюсеру. Продюсер ожидает только
+        при заполнении собственного буфера пачек."""
+        while True:
+            user_id, film_id, timestamp = await self.buffer.get()
+            try:
+                delivery = await self.broker.send(
+                    topic=self.topic,
+                    key=f'{user_id}+{film_id}'.encode(),
+                    value=f'{timestamp}'.encode()
+                )
+            except (KafkaError, asyncio.TimeoutError) as err:
+                self.metrics.failed += 1
+                logging.warning('Ошибка отправки сообщения в kafka: %s', err)
+            else:
+                delivery.add_done_callback(self._on_delivery)
+            finally:
+                self.buffer.task_done()
 
-    def __del__(self):
-        self.broker.stop()
+    def _on_delivery(self, delivery: asyncio.Future):
+        if delivery.cancelled() or delivery.exception() is not None:
+            self.metrics.failed += 1
+            logging.warning('Сообщение не доставлено в kafka: %s',
+                            None if delivery.cancelled()
+                            else delivery.exception())
+        else:
+            self.metrics.delivered += 1
 
 
 @cache
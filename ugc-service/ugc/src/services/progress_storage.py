@@ -2,7 +2,7 @@ from functools import cache
 from uuid import UUID
 
 from redis.asyncio import Redis
-from src.core.config import settings
+from src.core.config import PROGRESS_KEY, RECENT_KEY, settings
 from src.services.base import AbstractProgressStorage
 
 
@@ -12,12 +12,52 @@ class RedisProgressStorage(AbstractProgressStorage):
 
     async def get(self, user_id: int, film_id: UUID) -> int | None:
         """См. описание метода в базовом классе."""
-        result = await self.storage.get(self._make_key(user_id, film_id))
-        return int(result) if result else result
+        result = await self.storage.hget(self._make_key(user_id), str(film_id))
+        return self._to_int(result)
+
+    async def get_many(self, user_id: int,
+                       film_ids: list[UUID]) -> dict[UUID, int | None]:
+        """Получает прогресс по нескольким фильмам одной командой HMGET.
+        :return: номер просмотренной секунды по id фильмов
+        """
+        result = await self.storage.hmget(
+            self._make_key(user_id), [str(film_id) for film_id in film_ids]
+        )
+        return {
+            film_id: self._to_int(timestamp)
+            for film_id, timestamp in zip(film_ids, result)
+        }
+
+    async def get_recent(self, user_id: int, size: int) -> list[dict]:
+        """Получает недавно просмотренные фильмы, начиная с последнего.
+        :return: id фильма, номер просмотренной секунды и время просмотра
+        (unix-время в мс) для каждого фильма
+        """
+        recent = await self.storage.zrevrange(
+            RECENT_KEY.format(user_id=user_id), 0, size - 1, withscores=True
+        )
+        if not recent:
+            return []
+
+        result = await self.storage.hmget(
+            self._make_key(user_id), [film_id for film_id, _ in recent]
+        )
+        return [
+            {
+                'film_id': UUID(film_id.decode()),
+                'timestamp': self._to_int(timestamp),
+                'watched_at': int(watched_at)
+            }
+            for (film_id, watched_at), timestamp in zip(recent, result)
+        ]
+
+    @staticmethod
+    def _make_key(user_id: int) -> str:
+        return PROGRESS_KEY.format(user_id=user_id)
 
     @staticmethod
-    def _make_key(user_id: int, film_id: UUID):
-        return f'{user_id}+{film_id}'
+    def _to_int(value: bytes | None) -> int | None:
+        return int(value) if value is not None else None
 
 
 @cache
@@ -1,32 +1,68 @@
 from uuid import UUID
 
-import motor.motor_asyncio as motor
 from src.core.config import settings
+from src.db.mongo import get_database
 from src.db.mongo_base import MongoBase
 from src.services.base import AbstractRatingStorage
 from src.utils.exceptions import NotFoundException
 
 
 class MongoRatingStorage(MongoBase, AbstractRatingStorage):
-    def __init__(self, collection, scored_field_name: str):
+    """Хранилище оценок. Если передана коллекция сводок, для каждого
+    оцениваемого объекта в ней поддерживаются сумма и кол-во оценок, кол-во
+    лайков и дизлайков (см. get_summary_pipeline), и чтение агрегатов
+    выполняется по одному документу.
+
+    Сводка обновляется атомарным $inc после записи оценки. Предыдущая оценка
+    возвращается той же операцией, что и записывает новую, а уникальный
+    индекс по пользователю и объекту (см. src.db.mongo) не даёт конкурентным
+    upsert записать вторую оценку: mongo повторяет upsert, завершившийся
+    ошибкой дубликата, как замену. Поэтому конкурентные запросы дают верные
+    приращения. Расхождение возможно при сбое между двумя операциями, а
+    также пока индекс не стал уникальным из-за прежних дубликатов, и
+    исправляется командами src.commands.rating_summary и
+    src.commands.duplicates.
+    """
+
+    def __init__(self, collection, scored_field_name: str,
+                 summary_collection=None):
         self.scored_field_name = scored_field_name
+        self.summary_collection = summary_collection
         super().__init__(collection)
 
-    async def add_or_update_score(self, user_id: int, obj_id: UUID, score: int):  # noqa:E501
+    async def add_or_update_score(self, user_id: int, obj_id: UUID, score: int) -> int | None:  # noqa:E501
+        """Сохраняет оценку и возвращает предыдущую оценку пользователя."""
         _filter = {'user_id': user_id, self.scored_field_name: obj_id}
-        await self.collection.replace_one(
+        previous = await self.collection.find_one_and_replace(
             _filter, {'score': score, **_filter}, upsert=True
         )
+        previous_score = previous['score'] if previous else None
+        await self._update_summary(obj_id, previous_score, score)
+        return previous_score
 
-    async def remove_score(self, user_id: int, obj_id: UUID) -> None:
+    async def remove_score(self, user_id: int, obj_id: UUID) -> int:
+        """Удаляет оценку и возвращает её значение."""
         _filter = {'user_id': user_id, self.scored_field_name: obj_id}
-        await self._check_if_exists(_filter)
-        await self.collection.delete_one(_filter)
+        removed = await self.collection.find_one_and_delete(_filter)
+        if removed is None:
+            self._raise_not_found(obj_id)
+        await self._update_summary(obj_id, removed['score'], None)
+        return removed['score']
 
     async def remove_scores(self, _filter: dict) -> None:
         await self.collection.delete_many(_filter)
+        if self.summary_collection is not None:
+            await self.summary_collection.delete_one(
+                {'_id': _filter[self.scored_field_name]}
+            )
 
     async def get_likes_and_dislikes(self, obj_id: UUID) -> tuple[int, int]:
+        if self.summary_collection is not None:
+            summary = await self.summary_collection.find_one({'_id': obj_id})
+            if summary is None:
+                return 0, 0
+            return summary['likes'], summary['dislikes']
+
         likes_amount = await self.collection.count_documents(
             {
                 self.scored_field_name: obj_id,
@@ -42,6 +78,12 @@ class MongoRatingStorage(MongoBase, AbstractRatingStorage):
         return likes_amount, dislikes_amount
 
     async def get_avg_score(self, obj_id: UUID) -> float | None:
+        if self.summary_collection is not None:
+            summary = await self.summary_collection.find_one({'_id': obj_id})
+            if summary is None or not summary['count']:
+                self._raise_not_found(obj_id)
+            return summary['sum'] / summary['count']
+
         await self._check_if_exists({self.scored_field_name: obj_id})
         avg_result = await self.collection.aggregate([
             {'$match': {self.scored_field_name: obj_id}},
@@ -56,23 +98,69 @@ class MongoRatingStorage(MongoBase, AbstractRatingStorage):
             return avg_result[0]['avg_score']
         return None
 
+    def get_summary_pipeline(self) -> list[dict]:
+        """Агрегация, вычисляющая сводки по всем оценкам коллекции."""
+        return [
+            {'$group': {
+                '_id': f'${self.scored_field_name}',
+                'sum': {'$sum': '$score'},
+                'count': {'$sum': 1},
+                'likes': {'$sum': self._count_score(
+                    settings.project.like_score
+                )},
+                'dislikes': {'$sum': self._count_score(
+                    settings.project.dislike_score
+                )},
+            }}
+        ]
+
+    @staticmethod
+    def _count_score(score: int) -> dict:
+        return {'$cond': [{'$eq': ['$score', score]}, 1, 0]}
+
+    async def _update_summary(self, obj_id: UUID, previous: int | None,
+                              current: int | None) -> None:
+        """Применяет к сводке приращения от замены оценки previous на
+        current (None - оценки нет)."""
+        if self.summary_collection is None:
+            return
+
+        delta = {
+            'sum': (current or 0) - (previous or 0),
+            'count': (current is not None) - (previous is not None),
+            'likes': self._is_score(current, settings.project.like_score)
+            - self._is_score(previous, settings.project.like_score),
+            'dislikes': self._is_score(current, settings.project.dislike_score)
+            - self._is_score(previous, settings.project.dislike_score),
+        }
+        if not any(delta.values()):
+            return
+
+        await self.summary_collection.update_one(
+            {'_id': obj_id}, {'$inc': delta}, upsert=True
+        )
+
+    @staticmethod
+    def _is_score(score: int | None, expected: int) -> int:
+        return int(score == expected)
+
     async def _check_if_exists(self, _filter: dict) -> None:
         if not await super()._check_if_exists(_filter):
-            message = (
-                'Нет ни одной оценки для '
-                f'{self.scored_field_name}={_filter[self.scored_field_name]}'
-            )
-            raise NotFoundException(message)
+            self._raise_not_found(_filter[self.scored_field_name])
+
+    def _raise_not_found(self, obj_id: UUID):
+        message = (
+            'Нет ни одной оценки для '
+            f'{self.scored_field_name}={obj_id}'
+        )
+        raise NotFoundException(message)
 
 
 def get_movies_rating_storage() -> AbstractRatingStorage:
-    client = motor.AsyncIOMotorClient(settings.mongo.connection_uri,
-                                      uuidRepresentation='standard')
-    database = motor.AsyncIOMotorDatabase(client, settings.mongo.dbname)
+    database = get_database()
 
     return MongoRatingStorage(
-        motor.AsyncIOMotorCollection(
-            database, settings.mongo.movies_rating_collection
-        ),
-        'film_id'
+        database[settings.mongo.movies_rating_collection],
+        'film_id',
+        database[settings.mongo.movies_rating_summary_collection]
     )
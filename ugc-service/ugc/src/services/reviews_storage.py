@@ -2,8 +2,9 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID, uuid4
 
-import motor.motor_asyncio as motor
+from pymongo import ASCENDING, DESCENDING
 from src.core.config import settings
+from src.db.mongo import get_database
 from src.db.mongo_base import MongoBase
 from src.services.base import AbstractReviewStorage
 from src.services.rating_storage import MongoRatingStorage
@@ -24,7 +25,9 @@ class MongoReviewStorage(AbstractReviewStorage, MongoBase):
             '_id': uuid4(),
             'created_at': datetime.now(),
             **_filter,
-            **review.dict()
+            **review.dict(),
+            'likes': 0,
+            'dislikes': 0
         }
         await self.collection.insert_one(review)
         return review
@@ -41,14 +44,24 @@ class MongoReviewStorage(AbstractReviewStorage, MongoBase):
         _filter = {'user_id': user_id, 'film_id': film_id}
         return await self.collection.find_one(_filter)
 
-    async def get_all(self, film_id: UUID) -> list[dict]:
-        reviews = await self.collection.find({'film_id': film_id}).to_list(length=None)  # noqa:E501
-        for review in reviews:
-            likes, dislikes = await self.rating_storage.get_likes_and_dislikes(
-                review['_id']
-            )
-            review.update({'likes': likes, 'dislikes': dislikes})
-        return reviews
+    async def get_all(self, film_id: UUID, sort: str, offset: int,
+                      size: int) -> list[dict]:
+        """Получает страницу рецензий к фильму одним запросом. Количество
+        лайков и дизлайков хранится в самой рецензии.
+        :param film_id: id фильма
+        :param sort: поле и направление сортировки ([-]field)
+        :param offset: кол-во пропускаемых рецензий
+        :param size: кол-во рецензий на странице
+        """
+        field = sort.lstrip('-')
+        direction = DESCENDING if sort.startswith('-') else ASCENDING
+        cursor = self.collection.find({'film_id': film_id}).sort(
+            [(field, direction), ('_id', direction)]
+        ).skip(offset).limit(size)
+        return [
+            {'likes': 0, 'dislikes': 0, **review}
+            async for review in cursor
+        ]
 
     async def like(self, user_id: int, review_id: UUID) -> None:
         await self._add_or_update_score(user_id, review_id,
@@ -72,27 +85,47 @@ class MongoReviewStorage(AbstractReviewStorage, MongoBase):
             raise NotFoundException('Такой рецензии не существует')
 
         if score is None:
-            await self.rating_storage.remove_score(user_id, review_id)
+            previous = await self.rating_storage.remove_score(
+                user_id, review_id
+            )
         else:
-            await self.rating_storage.add_or_update_score(
+            previous = await self.rating_storage.add_or_update_score(
                 user_id, review_id, score
             )
 
+        counters = self._get_counters_delta(previous, score)
+        if counters:
+            await self.collection.update_one(
+                {'_id': review_id}, {'$inc': counters}
+            )
+
+    @staticmethod
+    def _get_counters_delta(previous: int | None,
+                            score: int | None) -> dict[str, int]:
+        """Вычисляет изменение счётчиков лайков и дизлайков рецензии при
+        замене оценки previous на score."""
+        counter_by_score = {
+            settings.project.like_score: 'likes',
+            settings.project.dislike_score: 'dislikes'
+        }
+        delta = {}
+        if previous == score:
+            return delta
+        if previous in counter_by_score:
+            delta[counter_by_score[previous]] = -1
+        if score in counter_by_score:
+            delta[counter_by_score[score]] = 1
+        return delta
+
 
 def get_reviews_storage() -> AbstractReviewStorage:
-    client = motor.AsyncIOMotorClient(settings.mongo.connection_uri,
-                                      uuidRepresentation='standard')
-    database = motor.AsyncIOMotorDatabase(client, settings.mongo.dbname)
+    database = get_database()
 
     return MongoReviewStorage(
-        motor.AsyncIOMotorCollection(
-            database, settings.mongo.reviews_collection
-        ),
+        database[settings.mongo.reviews_collection],
 
         MongoRatingStorage(
-            motor.AsyncIOMotorCollection(
-                database, settings.mongo.reviews_rating_collection
-            ),
+            database[settings.mongo.reviews_rating_collection],
             'review_id'
         )
     )
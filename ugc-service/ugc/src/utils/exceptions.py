@@ -11,3 +11,15 @@ class NotFoundException(HTTPException):
 class AlreadyExistsException(HTTPException):
     def __init__(self, message: str):
         super().__init__(status_code=HTTPStatus.BAD_REQUEST, detail=message)
+
+
+class BadRequestException(HTTPException):
+    def __init__(self, message: str):
+        super().__init__(status_code=HTTPStatus.BAD_REQUEST, detail=message)
+
+
+class ServiceUnavailableException(HTTPException):
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                         detail=message,
+                         headers={'Retry-After': str(retry_after)})